@@ -0,0 +1,85 @@
+"""Synthetic archive: writes a TinyDB database of finished Swiss tournaments in the format of DBAdapter.
+
+    python benchmarks/archive.py archive.json [--players 2000] [--tournaments 100] [--entrants 32] [--rounds 7]
+"""
+import argparse
+import json
+import pathlib
+import random
+from datetime import date, datetime, timedelta
+
+FIRST_NAMES = ["Jean", "Marie", "Pierre", "Sophie", "Louis", "Camille", "Paul", "Julie", "Hugo", "Emma",
+               "Lucas", "Chloé", "Nathan", "Léa", "Thomas", "Manon"]
+LAST_NAMES = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+              "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David", "Bertrand", "Roux", "Vincent", "Fournier"]
+CITIES = ["Paris", "Lyon", "Marseille", "Lille", "Nantes", "Bordeaux"]
+
+
+def build_archive(players=2000, tournaments=100, entrants=32, rounds=7, seed=0):
+    """Tables of the archive as stored by TinyDB, every round is finished with random results"""
+    rng = random.Random(seed)
+    tables: dict[str, dict[str, dict]] = {"players": {}, "tournaments": {}, "rounds": {}, "matchs": {}}
+    for player_id in range(1, players + 1):
+        birthdate = date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 60))
+        tables["players"][str(player_id)] = {
+            "first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES),
+            "birthdate": birthdate.isoformat(), "gender": rng.choice("HF"), "rank": player_id,
+            "rating": float(rng.randrange(1000, 2600)), "_version": 1,
+        }
+    round_id = match_id = 0
+    for tournament_id in range(1, tournaments + 1):
+        when = date(2010, 1, 1) + timedelta(days=7 * tournament_id)
+        tables["tournaments"][str(tournament_id)] = {
+            "name": f"Open {tournament_id}", "where": rng.choice(CITIES), "when": when.isoformat(), "style": rng.randrange(3),
+            "round_count": rounds, "finished": True, "accelerated_rounds": 0, "seeds": [], "withdrawn": [], "system": 0,
+            "_version": 1,
+        }
+        field = rng.sample(range(1, players + 1), entrants)
+        tables["tournaments"][str(tournament_id)]["seeds"] = sorted(field)
+        # Circle method: no pair meets twice within `entrants - 1` rounds, an odd field leaves one player out each round
+        circle: list[int | None] = field + [None] * (entrants % 2)
+        for number in range(1, rounds + 1):
+            round_id += 1
+            start = datetime.combine(when, datetime.min.time()) + timedelta(hours=9 + 2 * number)
+            tables["rounds"][str(round_id)] = {
+                "name": f"Round {number}", "number": number, "tid": tournament_id,
+                "start_time": start.isoformat(timespec="minutes"),
+                "end_time": (start + timedelta(hours=2)).isoformat(timespec="minutes"), "_version": 1,
+            }
+            shift = (number - 1) % (len(circle) - 1)
+            order = circle[:1] + circle[1 + shift:] + circle[1:1 + shift]
+            for idx in range(len(order) // 2):
+                pair = [order[idx], order[-1 - idx]]
+                if None in pair:
+                    continue
+                rng.shuffle(pair)
+                match_id += 1
+                tables["matchs"][str(match_id)] = {
+                    "round": round_id, "player1": pair[0], "player2": pair[1],
+                    "result": rng.choice((1, 2, 3)), "ratings": None, "_version": 1,
+                }
+    return tables
+
+
+def write_archive(path: pathlib.Path, **options):
+    tables = build_archive(**options)
+    with open(path, "w", encoding="utf-8") as stream:
+        json.dump(tables, stream)
+    return sum(len(x) for x in tables.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", type=pathlib.Path)
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--tournaments", type=int, default=100)
+    parser.add_argument("--entrants", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+    count = write_archive(args.path, players=args.players, tournaments=args.tournaments, entrants=args.entrants,
+                          rounds=args.rounds)
+    print("%d documents written to %s" % (count, args.path))
+
+
+if __name__ == "__main__":
+    main()
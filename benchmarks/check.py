@@ -0,0 +1,37 @@
+"""Integrity check benchmark: time taken by the check of a synthetic archive, or of an existing database.
+
+    python benchmarks/check.py [--db archive.json] [--players 5000] [--tournaments 2000]
+"""
+import argparse
+import pathlib
+import sys
+import tempfile
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from archive import write_archive  # noqa: E402
+from chess.database.dbadapter import DBAdapter  # noqa: E402
+from chess.database.maintenance import check  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=pathlib.Path, default=None, help="database to check instead of a synthetic archive")
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--tournaments", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = args.db
+        if path is None:
+            path = pathlib.Path(workdir) / "archive.json"
+            write_archive(path, players=args.players, tournaments=args.tournaments)
+            with DBAdapter(path):
+                pass  # split in tournament files, as the application does on first use
+        report = check(DBAdapter(path, read_only=True))
+    print("%d documents checked in %.2f s, %d problems" % (report.documents, report.elapsed, len(report.problems)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Codec benchmark: decoding and load times with the json module and with the fastest codec installed, both must write the same bytes.
+
+    python benchmarks/codec.py [--db db.json] [--players 2000] [--tournaments 100] [--runs 5]
+"""
+import argparse
+import filecmp
+import gc
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from archive import write_archive  # noqa: E402
+from chess.database.dbadapter import DBAdapter  # noqa: E402
+from chess.database.storage import CodecJSONStorage, JSONCodec, default_codec  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=pathlib.Path, default=None, help="database measured instead of a synthetic archive")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--tournaments", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = args.db
+        if source is None:
+            source = pathlib.Path(workdir) / "source" / "db.json"
+            source.parent.mkdir()
+            write_archive(source, players=args.players, tournaments=args.tournaments)
+            with DBAdapter(source):
+                pass
+        copies = []
+        for codec in (JSONCodec(), default_codec()):
+            loads = []
+            for _ in range(args.runs):
+                db = DBAdapter(source, read_only=True, codec=codec)
+                gc.collect()
+                start = time.perf_counter()
+                with db:
+                    db.load()
+                loads.append(time.perf_counter() - start)
+                del db
+            db = DBAdapter(source, read_only=True)
+            files = [source] + sorted(db.shards_path.glob("*" + db.suffix))
+            reads = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                for path in files:
+                    reader = CodecJSONStorage(path, access_mode="r", codec=codec)
+                    reader.read()
+                    reader.close()
+                reads.append(time.perf_counter() - start)
+            copies.append(DBAdapter(source, read_only=True, codec=codec).copy(pathlib.Path(workdir) / codec.name / "copy" / "db.json"))
+            print("%-8s read and decode %8.1f ms   load %8.1f ms" % (
+                codec.name, statistics.median(reads) * 1000, statistics.median(loads) * 1000))
+        plain, fast = copies
+        names = [x.name for x in plain.shards_path.iterdir()] if plain.shards_path.is_dir() else []
+        match, mismatch, errors = filecmp.cmpfiles(plain.shards_path, fast.shards_path, names, shallow=False)
+        identical = filecmp.cmp(plain.path, fast.path, shallow=False) and not mismatch and not errors
+        print("files written by both codecs are %s (%d files)" % ("identical" if identical else "DIFFERENT", len(names) + 1))
+        return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
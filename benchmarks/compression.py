@@ -0,0 +1,67 @@
+"""Compression benchmark: size, load time and time to write a copy of the database for each file extension.
+
+    python benchmarks/compression.py [--db db.json] [--players 2000] [--tournaments 100] [--runs 3]
+"""
+import argparse
+import pathlib
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from archive import write_archive  # noqa: E402
+from chess.database.dbadapter import DBAdapter  # noqa: E402
+
+EXTENSIONS = [".json", ".json.gz", ".json.xz", ".json.zz"]
+
+
+def files_size(db: DBAdapter):
+    shards = db.shards_path.glob("*" + db.suffix) if db.shards_path.is_dir() else []
+    return db.path.stat().st_size + sum(x.stat().st_size for x in shards)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=pathlib.Path, default=None, help="database copied instead of a synthetic archive")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--tournaments", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = pathlib.Path(workdir) / "source" / "db.json"
+        source.parent.mkdir()
+        if args.db is None:
+            write_archive(source, players=args.players, tournaments=args.tournaments)
+            source_db = DBAdapter(source)
+        else:
+            source_db = DBAdapter(args.db, read_only=True)
+        reference = None
+        for extension in EXTENSIONS:
+            saves = []
+            for run in range(args.runs):
+                target = pathlib.Path(workdir) / f"run{run}" / ("db" + extension)
+                start = time.perf_counter()
+                db = source_db.copy(target)
+                saves.append(time.perf_counter() - start)
+            loads = []
+            for _ in range(args.runs):
+                db = DBAdapter(target, read_only=True)
+                start = time.perf_counter()
+                with db:
+                    db.load()
+                loads.append(time.perf_counter() - start)
+            size = files_size(db)
+            reference = reference or size
+            print("%-9s %10.1f KiB (%5.1f%%)  load %8.1f ms  copy %8.1f ms" % (
+                extension, size / 1024, 100.0 * size / reference, statistics.median(loads) * 1000, statistics.median(saves) * 1000))
+            for run in range(args.runs):
+                shutil.rmtree(pathlib.Path(workdir) / f"run{run}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Startup benchmark: import time of main.py and time until the main menu is usable.
+
+Compares the median of several runs with the budget tracked in startup_budget.json
+and exits with a non-zero status when a budget is exceeded.
+
+    python benchmarks/startup.py [--db db.json] [--runs 5]
+"""
+import argparse
+import json
+import os
+import pathlib
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+BUDGET_FILE = pathlib.Path(__file__).resolve().parent / "startup_budget.json"
+IMPORT_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(\S+)\s*$")
+
+
+def import_time_ms():
+    """Cumulative import time of the `main` module, as reported by `-X importtime`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        found = IMPORT_LINE.match(line)
+        if found is not None and found.group(3) == "main":
+            return int(found.group(2)) / 1000
+    raise RuntimeError("`main` not found in the -X importtime output")
+
+
+def first_menu_ms(db_path: pathlib.Path | None):
+    """Time for main.py to start, load the database, show the main menu and quit on `q`"""
+    with tempfile.TemporaryDirectory() as workdir:
+        if db_path is not None:
+            shutil.copy(db_path, pathlib.Path(workdir) / "db.json")
+        env = dict(os.environ, TERM="dumb")
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(ROOT / "main.py")],
+            cwd=workdir, input="q\n", text=True, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True, timeout=60,
+        )
+        return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=pathlib.Path, default=None, help="database copied for the time-to-first-menu run")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    budget = json.loads(BUDGET_FILE.read_text())
+    measures = {
+        "import_main_ms": statistics.median(import_time_ms() for _ in range(args.runs)),
+        "first_menu_ms": statistics.median(first_menu_ms(args.db) for _ in range(args.runs)),
+    }
+    failed = False
+    for name, value in measures.items():
+        limit = budget[name]
+        status = "ok" if value <= limit else "OVER BUDGET"
+        failed = failed or value > limit
+        print("%-16s %8.1f ms  (budget %6.1f ms)  %s" % (name, value, limit, status))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Storage benchmark: file reads, writes and time of a load, edit and save session, with and without BufferedStorage.
+
+    python benchmarks/storage.py [--db archive.json] [--players 2000] [--tournaments 100]
+"""
+import argparse
+import pathlib
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from archive import write_archive  # noqa: E402
+from chess.database.dbadapter import DBAdapter  # noqa: E402
+from chess.database.storage import CodecJSONStorage  # noqa: E402
+from chess.models.match import Match, Result  # noqa: E402
+from chess.models.player import Player  # noqa: E402
+from chess.models.round import Round  # noqa: E402
+from chess.models.tournament import Tournament  # noqa: E402
+
+
+class Counters:
+    """Calls of CodecJSONStorage.read and CodecJSONStorage.write, the file accesses of TinyDB, and the bytes written"""
+
+    def __init__(self) -> None:
+        self.reads = 0
+        self.writes = 0
+        self.written = 0
+        self._read = CodecJSONStorage.read
+        self._write = CodecJSONStorage.write
+
+    def __enter__(self):
+        counters = self
+
+        def read(storage):
+            counters.reads += 1
+            return counters._read(storage)
+
+        def write(storage, data):
+            counters.writes += 1
+            counters._write(storage, data)
+            counters.written += storage._handle.tell()
+        CodecJSONStorage.read = read  # type: ignore
+        CodecJSONStorage.write = write  # type: ignore
+        return self
+
+    def __exit__(self, *_):
+        CodecJSONStorage.read = self._read  # type: ignore
+        CodecJSONStorage.write = self._write  # type: ignore
+
+
+def session(path: pathlib.Path, buffered: bool):
+    """Load like MainController, edit the results of the last round and a player, save, then export the last tournament"""
+    db = DBAdapter(path, buffered=buffered)
+    with db:
+        players, tournaments, rounds, matchs = db.load()
+    last = max(rounds, key=lambda x: x.model_id)
+    for match in last.matchs:
+        match.result = Result.DRAW
+    players[0].rating += 10.0
+    players.append(Player(first_name="Nouveau", last_name="Joueur", rank=len(players) + 1))
+    with db:
+        for values in (players, tournaments, rounds, matchs):
+            db.save(*values)
+    with db:
+        tournament = db.fromID(Tournament, last.tournament.model_id)  # type: ignore
+        for round_ in db.search(Round, tid=tournament.model_id):  # type: ignore
+            list(db.search(Match, round=round_.model_id))
+
+
+def result_save(path: pathlib.Path, buffered: bool, counters: "Counters"):
+    """Save after entering a single result, the whole data is saved the way MainController does"""
+    db = DBAdapter(path, buffered=buffered)
+    with db:
+        players, tournaments, rounds, matchs = db.load()
+    last = max(rounds, key=lambda x: x.model_id)
+    last.matchs[0].result = Result.WHITE_WIN
+    reads, writes, written = counters.reads, counters.writes, counters.written
+    with db:
+        for values in (players, tournaments, rounds, matchs):
+            db.save(*values)
+    return counters.reads - reads, counters.writes - writes, counters.written - written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=pathlib.Path, default=None, help="database copied instead of a synthetic archive")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--tournaments", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = pathlib.Path(workdir) / "source" / "db.json"
+        source.parent.mkdir()
+        if args.db is None:
+            write_archive(source, players=args.players, tournaments=args.tournaments)
+        else:
+            shutil.copy(args.db, source)
+            if args.db.with_name(args.db.stem + ".tournaments").is_dir():
+                shutil.copytree(args.db.with_name(args.db.stem + ".tournaments"), source.with_name("db.tournaments"))
+        with DBAdapter(source):
+            pass  # moves the rounds and matchs of a single file database to the tournament files
+        for buffered in (False, True):
+            path = pathlib.Path(workdir) / ("buffered" if buffered else "plain") / "db.json"
+            shutil.copytree(source.parent, path.parent)
+            with Counters() as counters:
+                start = time.perf_counter()
+                session(path, buffered)
+                elapsed = time.perf_counter() - start
+                single = result_save(path, buffered, counters)
+            print("%-10s %6d file reads %6d file writes %10.1f KiB written %10.1f ms" % (
+                "buffered" if buffered else "plain", counters.reads, counters.writes, counters.written / 1024, elapsed * 1000))
+            print("%-10s %6d file reads %6d file writes %10.1f KiB written  (saving a single result)" % ("", *single[:2], single[2] / 1024))
+
+
+if __name__ == "__main__":
+    main()
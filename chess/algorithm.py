@@ -1,88 +1,373 @@
+import collections
 import datetime
-from chess.models.match import Match
+import operator
+import threading
+from typing import Any, Callable
+from chess.colours import ColourHistory, alternate_boards
+from chess.models.match import Match, Result
 from chess.models.player import Player
 from chess.models.round import Round
-from chess.models.tournament import Tournament
+from chess.models.tournament import PairingSystem, Tournament
+from chess.seeding import first_round_pairs, seed_players, virtual_points
+
+
+class PairingCache:
+    """LRU cache of pairings keyed by the standings order and the opponent history, shared by every SwissSystem"""
+
+    def __init__(self, maxsize=256) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: collections.OrderedDict[tuple, tuple[tuple[Player, Player | None], ...]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: tuple):
+        with self._lock:
+            pairs = self._entries.get(key)
+            if pairs is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(pairs)
+
+    def put(self, key: tuple, pairs: list[tuple[Player, Player | None]]):
+        with self._lock:
+            self._entries[key] = tuple(pairs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+PAIRING_CACHE = PairingCache()
 
 
 class SwissSystem:
 
-    def __init__(self, tournament: Tournament) -> None:
+    def __init__(self, tournament: Tournament, cache: PairingCache | None = PAIRING_CACHE) -> None:
         self.tournament: Tournament = tournament
+        self.cache = cache
+        self.colours = ColourHistory.from_rounds(self.tournament.rounds)
         if len(self.tournament.rounds) > 0 and len(self.tournament.rounds) < self.tournament.round_count:
             self.round = self.tournament.rounds[0]
         else:
             self.round = None
 
-    def _has_already_fought(self, player1: Player, player2: Player):
-        for round_ in self.tournament.rounds:
-            for match in round_.matchs:
-                if match.player1 is player1 or match.player2 is player1:
-                    if match.player1 is player2 or match.player2 is player2:
-                        return True
-        return False
+    def _opponent_history(self):
+        """Every pair of players who already played each other in the tournament"""
+        return frozenset(
+            frozenset((match.player1, match.player2))
+            for round_ in self.tournament.rounds
+            for match in round_.matchs
+            if match.player2 is not None
+        )
+
+    def _scores_before(self, round_: Round):
+        scores = dict.fromkeys(self.tournament.seeds, 0.0)
+        for other in self.tournament.rounds:
+            if other is not round_:
+                for player, score in other.scores.items():
+                    scores[player] = scores.get(player, 0.0) + score
+        return scores
 
-    def _create_matches(self, round_: Round, players: list[Player]):
+    def standings_order(self, scores: dict[Player, float], tie_break: Callable[[Player], Any] | None = None,
+                        round_number: int | None = None):
+        """Players in the order they are paired, the last one is paired first.
+
+        The virtual points of an accelerated tournament are added, ties are broken by rank unless `tie_break` is given."""
+        if tie_break is None:
+            tie_break = operator.attrgetter("rank")
+        if round_number is None:
+            round_number = len(self.tournament.rounds) + 1
+        points = virtual_points(self.tournament, round_number)
+        return list(map(lambda x: x[0], sorted(scores.items(), key=lambda x: (x[1] + points.get(x[0], 0.0), tie_break(x[0])))))
+
+    def pair_players(self, players: list[Player]):
+        """Pairs of the next round for players given in `standings_order`, without modifying the tournament"""
+        history = self._opponent_history()
+        key = (tuple(players), history, tuple(map(self.colours.preference, players)))
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        players = list(players)
+        pairs: list[tuple[Player, Player | None]] = []
         while players != []:
             p1 = players.pop()
             if players == []:
-                round_.matchs.append(Match(
-                    mapped_round=round_,
-                    player1=p1,
-                    player2=None,
-                    scores=(1.0, 0.0),
-                ))
+                pairs.append((p1, None))
+            # First opponent not met yet whose colour preference is compatible, else the first one not met
+            opponent = None
             for p2 in players:
-                if not self._has_already_fought(p1, p2):
-                    round_.matchs.append(Match(
-                        mapped_round=round_,
-                        player1=p1,
-                        player2=p2,
-                    ))
-                    players.remove(p2)
+                if frozenset((p1, p2)) in history:
+                    continue
+                if opponent is None:
+                    opponent = p2
+                if self.colours.compatible(p1, p2):
+                    opponent = p2
                     break
+            if opponent is not None:
+                pairs.append(self.colours.allocate(p1, opponent))
+                players.remove(opponent)
+        if self.cache is not None:
+            self.cache.put(key, pairs)
+        return pairs
+
+    def _create_matches(self, round_: Round, pairs: list[tuple[Player, Player | None]], reuse: list[Match] | None = None):
+        """Append the matchs of `pairs` to the round, taking the match objects of `reuse` first"""
+        created: list[Match] = []
+        for p1, p2 in pairs:
+            if p2 is not None:
+                self.colours.push(p1, p2)
+            if reuse:
+                match = reuse.pop()
+                match.player1 = p1
+                match.player2 = p2
+                match.result = Result.BYE if p2 is None else Result.NOT_PLAYED
+                match.rating_snapshot = None
+                match.updated = True
+            else:
+                match = Match(
+                    mapped_round=round_,
+                    player1=p1,
+                    player2=p2,
+                    result=Result.BYE if p2 is None else Result.NOT_PLAYED,
+                )
+            round_.matchs.append(match)
+            created.append(match)
+        return created
+
+    def _open_round(self):
+        if self.tournament.rounds and not self.tournament.rounds[-1].finished:
+            return self.tournament.rounds[-1]
+        return None
+
+    def _repair(self, round_: Round, removed: list[Match], players: list[Player]):
+        """Pair again the score bracket of `players` in an unfinished round, the other brackets are left alone.
+
+        An odd pool takes the player of the bye, else its last player gets the bye. The next bracket is only added
+        when the pool cannot be paired without a repeated game. Returns the matchs paired again and the matchs dropped
+        from the round."""
+        before = self._scores_before(round_)
 
-    def _create_round(self, players: list[Player] | None = None):
+        def bracket(match: Match):
+            if match.player2 is None:
+                return -1.0
+            return max(before.get(match.player1, 0.0), before.get(match.player2, 0.0))  # type: ignore
+
+        target = max(before.get(x, 0.0) for x in players)
+        open_matchs = [x for x in round_.matchs if x not in removed and (x.player2 is None or x.result == Result.NOT_PLAYED)]
+        byes = [x for x in open_matchs if x.player2 is None]
+        lower = sorted((x for x in open_matchs if -1.0 < bracket(x) < target), key=bracket, reverse=True)
+        dissolved = list(removed) + [x for x in open_matchs if bracket(x) == target]
+        while True:
+            pool = list(players) + [y for x in dissolved if x not in removed for y in (x.player1, x.player2) if y is not None]
+            if len(pool) % 2 == 1 and byes:
+                dissolved.append(byes.pop())
+                continue
+            for match in dissolved:
+                if match in round_.matchs:
+                    round_.matchs.remove(match)
+            self.colours = ColourHistory.from_rounds(self.tournament.rounds)
+            order = self.standings_order({x: before.get(x, 0.0) for x in pool}, round_number=round_.number)
+            pairs = self.pair_players(order)
+            if not lower or sum(2 - (x[1] is None) for x in pairs) == len(pool):
+                break
+            # A player could not be paired: the next bracket joins the pool
+            score = bracket(lower[0])
+            while lower and bracket(lower[0]) == score:
+                dissolved.append(lower.pop(0))
+        reuse = list(reversed(dissolved))
+        paired = self._create_matches(round_, pairs, reuse)
+        return paired, reuse
+
+    def withdraw(self, player: Player):
+        """Withdraw a player from the next rounds, the opponent of an unplayed game of the current round is paired again.
+
+        Returns the matchs paired again and the matchs dropped from the current round."""
+        if player not in self.tournament.withdrawn:
+            self.tournament.withdrawn.append(player)
+            self.tournament.updated = True
+        round_ = self._open_round()
+        if round_ is None:
+            return [], []
+        for match in round_.matchs:
+            if player is not match.player1 and player is not match.player2:
+                continue
+            if match.player2 is None:
+                round_.matchs.remove(match)
+                return [], [match]
+            if match.result == Result.NOT_PLAYED:
+                opponent: Player = match.player2 if player is match.player1 else match.player1  # type: ignore
+                return self._repair(round_, [match], [opponent])
+            break
+        return [], []
+
+    def enter(self, player: Player):
+        """Register a late entry, paired within its score bracket when the current round is not finished.
+
+        Returns the matchs paired again and the matchs dropped from the current round."""
+        if not self.tournament.seeds:
+            self.tournament.seeds = seed_players(self.tournament.scores)
+        if player in self.tournament.withdrawn:
+            self.tournament.withdrawn.remove(player)
+        if player not in self.tournament.seeds:
+            self.tournament.seeds.append(player)
+        self.tournament.updated = True
+        round_ = self._open_round()
+        if round_ is None or any(player is x.player1 or player is x.player2 for x in round_.matchs):
+            return [], []
+        return self._repair(round_, [], [player])
+
+    def _create_round(self, players: list[Player] | None = None, pairs: list[tuple[Player, Player | None]] | None = None):
         self.round = Round(
             name=f"Round {len(self.tournament.rounds) + 1}",
             number=len(self.tournament.rounds) + 1,
             tournament=self.tournament,
             start_time=datetime.datetime.now(),
         )
-        if players is None:
-            players = list(map(lambda x: x[0], sorted(self.tournament.scores.items(), key=lambda x: (x[1], x[0].rank))))
-        self._create_matches(self.round, players)
+        if pairs is None:
+            if players is None:
+                players = self.standings_order(self.tournament.participants)
+            pairs = self.pair_players(players)
+        self._create_matches(self.round, pairs)
         self.tournament.rounds.append(self.round)
 
     def first_round(self, players: list[Player]):
         if self.tournament.rounds != []:
             return
+        self.tournament.seeds = seed_players(players)
+        self.tournament.updated = True
+        self._create_round(pairs=alternate_boards(first_round_pairs(self.tournament.seeds, self.tournament.accelerated_rounds)))
+        return self.round
+
+    def next_round(self, pairs: list[tuple[Player, Player | None]] | None = None):
+        if self.tournament.round_count == len(self.tournament.rounds):
+            return None
+        self._create_round(pairs=pairs)
+        return self.round
+
+
+class RoundRobinSystem:
+    """Closed round-robin, single or double, scheduled from the Berger tables without searching the match history"""
+
+    def __init__(self, tournament: Tournament) -> None:
+        self.tournament: Tournament = tournament
+        self.round = self.tournament.rounds[-1] if self.tournament.rounds else None
+
+    @property
+    def cycles(self):
+        return 2 if self.tournament.system == PairingSystem.DOUBLE_ROUND_ROBIN else 1
+
+    def _table_size(self):
+        """Number of the Berger table, the field size rounded up to an even number (the extra number is the bye)"""
+        return len(self.tournament.seeds) + len(self.tournament.seeds) % 2
+
+    def berger_pairs(self, round_number: int):
+        """(white, black) pairing numbers of a round, O(1) per board, colours are reversed in the second cycle.
+
+        In a double round-robin the last two rounds of the first cycle are swapped (FIDE recommendation), otherwise
+        some players would get the same colour three times in a row across the cycles"""
+        size = self._table_size()
+        if size < 2:
+            return []
+        cycle, number = divmod(round_number - 1, size - 1)
+        if self.cycles == 2 and cycle == 0 and size > 3 and number >= size - 3:
+            number = 2 * size - 5 - number
+        half = size // 2
+        first = (number * half) % (size - 1) + 1
+        boards = [(first, size) if number % 2 == 0 else (size, first)]
+        boards += [((first + board - 2) % (size - 1) + 1, (first - board) % (size - 1) + 1) for board in range(2, half + 1)]
+        if cycle % 2 == 1:
+            boards = [(black, white) for white, black in boards]
+        return boards
+
+    def pairs(self, round_number: int):
+        """Pairs of a round, the opponent of the bye number or of a withdrawn player gets the bye"""
+        seeds = self.tournament.seeds
+        withdrawn = set(self.tournament.withdrawn)
+        pairs: list[tuple[Player, Player | None]] = []
+        for white, black in self.berger_pairs(round_number):
+            players = [seeds[x - 1] for x in (white, black) if x <= len(seeds) and seeds[x - 1] not in withdrawn]
+            if len(players) == 2:
+                pairs.append((players[0], players[1]))
+            elif len(players) == 1:
+                pairs.append((players[0], None))
+        return pairs
+
+    def _create_round(self, pairs: list[tuple[Player, Player | None]]):
         self.round = Round(
-            name="Round 1",
-            number=1,
+            name=f"Round {len(self.tournament.rounds) + 1}",
+            number=len(self.tournament.rounds) + 1,
             tournament=self.tournament,
             start_time=datetime.datetime.now(),
         )
-        higher_half = players[:len(players) // 2]
-        lower_half = players[len(players) // 2:]
-        while higher_half != [] and lower_half != []:
+        for p1, p2 in pairs:
             self.round.matchs.append(Match(
                 mapped_round=self.round,
-                player1=higher_half.pop(0),
-                player2=lower_half.pop(0),
-            ))
-        if higher_half != [] or lower_half != []:
-            self.round.matchs.append(Match(
-                mapped_round=self.round,
-                player1=higher_half.pop() if higher_half != [] else lower_half.pop(),
-                player2=None,
-                scores=(1.0, 0.0),
+                player1=p1,
+                player2=p2,
+                result=Result.BYE if p2 is None else Result.NOT_PLAYED,
             ))
         self.tournament.rounds.append(self.round)
+
+    def first_round(self, players: list[Player]):
+        if self.tournament.rounds != []:
+            return
+        if len(players) < 2:
+            raise ValueError("Un tournoi toutes rondes demande au moins 2 joueurs")
+        self.tournament.seeds = seed_players(players)
+        self.tournament.round_count = self.cycles * (self._table_size() - 1)
+        self.tournament.updated = True
+        self._create_round(self.pairs(1))
         return self.round
 
-    def next_round(self):
+    def next_round(self, pairs: list[tuple[Player, Player | None]] | None = None):
         if self.tournament.round_count == len(self.tournament.rounds):
             return None
-        self._create_round()
+        self._create_round(self.pairs(len(self.tournament.rounds) + 1) if pairs is None else pairs)
         return self.round
+
+    def withdraw(self, player: Player):
+        """Withdraw a player from the next rounds, the opponent of an unplayed game of the current round gets the bye.
+
+        Returns the matchs changed and the matchs dropped from the current round."""
+        if player not in self.tournament.withdrawn:
+            self.tournament.withdrawn.append(player)
+            self.tournament.updated = True
+        if not self.tournament.rounds or self.tournament.rounds[-1].finished:
+            return [], []
+        round_ = self.tournament.rounds[-1]
+        for match in round_.matchs:
+            if player is not match.player1 and player is not match.player2:
+                continue
+            if match.player2 is None:
+                round_.matchs.remove(match)
+                return [], [match]
+            if match.result == Result.NOT_PLAYED:
+                match.player1 = match.player2 if player is match.player1 else match.player1
+                match.player2 = None
+                match.result = Result.BYE
+                match.updated = True
+                return [match], []
+            break
+        return [], []
+
+    def enter(self, player: Player) -> tuple[list[Match], list[Match]]:
+        raise ValueError("Inscription impossible, le calendrier d'un tournoi toutes rondes est fixé au demarrage")
+
+
+def pairing_system(tournament: Tournament):
+    """Pairing system matching the kind of the tournament"""
+    if tournament.system in (PairingSystem.ROUND_ROBIN, PairingSystem.DOUBLE_ROUND_ROBIN):
+        return RoundRobinSystem(tournament)
+    return SwissSystem(tournament)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from chess.models.player import Player
+    from chess.models.round import Round
+
+WHITE = 0
+BLACK = 1
+HISTORY_BITS = 64
+
+ABSOLUTE = 2
+STRONG = 1
+MILD = 0
+
+
+class ColourHistory:
+    """Colours played by each player, packed in an integer (last game in the lowest bit) with the white/black balance.
+
+    `player1` of a match has the white pieces, byes have no colour."""
+
+    def __init__(self) -> None:
+        self._bits: dict[Player, int] = {}
+        self._count: dict[Player, int] = {}
+        self._balance: dict[Player, int] = {}
+
+    @classmethod
+    def from_rounds(cls, rounds: Iterable[Round]):
+        history = cls()
+        for round_ in sorted(rounds, key=lambda x: x.number):
+            for match in round_.matchs:
+                if match.player1 is not None and match.player2 is not None:
+                    history.push(match.player1, match.player2)
+        return history
+
+    def push(self, white: Player, black: Player):
+        """Record a game, called as each match is created"""
+        for player, colour in ((white, WHITE), (black, BLACK)):
+            self._bits[player] = ((self._bits.get(player, 0) << 1) | colour) & ((1 << HISTORY_BITS) - 1)
+            self._count[player] = self._count.get(player, 0) + 1
+            self._balance[player] = self._balance.get(player, 0) + (1 if colour == WHITE else -1)
+
+    def pop(self, white: Player, black: Player):
+        """Forget the last game of both players, when a match of the current round is paired again.
+
+        A player without recorded game is skipped, e.g. a history built before the round was paired"""
+        for player, colour in ((white, WHITE), (black, BLACK)):
+            if self._count.get(player, 0) == 0:
+                continue
+            self._bits[player] >>= 1
+            self._count[player] -= 1
+            self._balance[player] -= 1 if colour == WHITE else -1
+            if self._count[player] == 0:
+                del self._bits[player], self._count[player], self._balance[player]
+
+    def last(self, player: Player):
+        if self._count.get(player, 0) == 0:
+            return None
+        return self._bits[player] & 1
+
+    def balance(self, player: Player):
+        """Games played with white minus games played with black"""
+        return self._balance.get(player, 0)
+
+    def preference(self, player: Player) -> tuple[int | None, int]:
+        """Colour wanted for the next game and how strongly, no colour three times in a row and a balance within 2"""
+        count = self._count.get(player, 0)
+        if count == 0:
+            return None, MILD
+        bits = self._bits[player]
+        balance = self._balance[player]
+        if balance >= 2 or (count >= 2 and bits & 3 == 0):
+            return BLACK, ABSOLUTE
+        if balance <= -2 or (count >= 2 and bits & 3 == 3):
+            return WHITE, ABSOLUTE
+        if balance == 1:
+            return BLACK, STRONG
+        if balance == -1:
+            return WHITE, STRONG
+        return 1 - (bits & 1), MILD
+
+    def compatible(self, player1: Player, player2: Player):
+        """Both players can get their colour, only two absolute preferences for the same colour conflict"""
+        colour1, strength1 = self.preference(player1)
+        colour2, strength2 = self.preference(player2)
+        return not (strength1 == strength2 == ABSOLUTE and colour1 == colour2)
+
+    def allocate(self, player1: Player, player2: Player):
+        """(white, black) for a pair, the strongest preference wins and `player1` (paired first) wins ties"""
+        colour1, strength1 = self.preference(player1)
+        colour2, strength2 = self.preference(player2)
+        if colour1 is None and colour2 is None:
+            colour1 = WHITE
+        elif colour1 is None or (colour1 == colour2 and strength2 > strength1):
+            colour1 = 1 - colour2  # type: ignore
+        if colour1 == WHITE:
+            return player1, player2
+        return player2, player1
+
+
+def alternate_boards(pairs: list[tuple[Player, Player | None]]):
+    """Colours of the first round, the higher seed has white on odd boards and black on even boards"""
+    return [x if i % 2 == 0 or x[1] is None else (x[1], x[0]) for i, x in enumerate(pairs)]
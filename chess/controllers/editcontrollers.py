@@ -3,7 +3,7 @@ from typing import Type, TypeVar, Generic
 from datetime import date, time, datetime
 from chess.controllers.mainstate import MainViewState
 from chess.controllers.menueditcontrollers import ItemSelectionController
-from chess.models.tournament import StyleTournament
+from chess.models.tournament import PairingSystem, StyleTournament
 from chess.view.editviews import EditView
 
 T = TypeVar('T', str, int, float, date, time)
@@ -169,3 +169,26 @@ class EditTournamentStyleController(ItemSelectionController[str]):
     def run(self):
         self.view.exitName = f"Valeure par defaut: {StyleTournament(self.oldValue).name}"
         return super().run()
+
+
+class EditPairingSystemController(ItemSelectionController[str]):
+
+    @property
+    def value(self):
+        if 0 <= self.selected_index < len(PairingSystem):
+            return PairingSystem(self.selected_index)
+        return self.oldValue
+
+    def __init__(self) -> None:
+        super().__init__(
+            "Systeme suisse",
+            "Toutes rondes",
+            "Toutes rondes aller-retour",
+        )
+        self.oldValue: PairingSystem = PairingSystem.SWISS
+        self.view.can_repeat_list = False
+        self.view.can_save = False
+
+    def run(self):
+        self.view.exitName = f"Valeure par defaut: {PairingSystem(self.oldValue).name}"
+        return super().run()
@@ -0,0 +1,122 @@
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import TextIO
+
+from chess.database.dbadapter import DBAdapter
+from chess.models.match import Match
+from chess.models.player import Player
+from chess.models.round import Round
+from chess.models.standings import Standings
+from chess.models.tournament import StyleTournament, Tournament
+from chess.view.exportviews import EXPORT_VIEWS, ExportView
+
+PLAYER_COLUMNS = ["Classement", "Elo", "Prenom", "Nom", "Date de naissance", "Genre"]
+STANDING_COLUMNS = ["Classement", "Prenom", "Nom", "Score"]
+TOURNAMENT_COLUMNS = ["Identifiant", "Nom", "Lieu", "Date", "Style", "Nombre de rondes"]
+ROUND_COLUMNS = ["Numero", "Nom", "Debut", "Fin"]
+MATCH_COLUMNS = ["Ronde", "Joueur 1", "Joueur 2", "Score 1", "Score 2", "Statut"]
+
+
+def _player_repr(player: Player | None):
+    if player is None:
+        return "Auncun Joueur"
+    return f"{player.first_name} {player.last_name}"
+
+
+def _open_view(out_dir: pathlib.Path, name: str, fmt: str, title: str, columns: list[str]) -> tuple[TextIO, ExportView]:
+    view_type = EXPORT_VIEWS[fmt]
+    stream = open(out_dir / f"{name}.{view_type.extension}", "w", encoding="utf-8", newline="")
+    return stream, view_type(stream, title, columns)
+
+
+def export_tournament(db_path: pathlib.Path, tournament_id: int, out_dir: pathlib.Path, fmt: str) -> list[pathlib.Path]:
+    """Write the rounds, matchs and players reports of a tournament with its own database connection"""
+    written: list[pathlib.Path] = []
+    with DBAdapter(db_path, read_only=True) as db:
+        tournament = db.fromID(Tournament, tournament_id)
+        if tournament is None:
+            return written
+        name = f"tournament-{tournament_id}"
+
+        stream, view = _open_view(out_dir, f"{name}-rounds", fmt, f"Rondes du tournoi {tournament.name}", ROUND_COLUMNS)
+        with stream, view:
+            for round_ in db.search(Round, tid=tournament_id):
+                view.render_row(round_.number, round_.name, round_.start_time, round_.end_time)
+        written.append(pathlib.Path(stream.name))
+
+        stream, view = _open_view(out_dir, f"{name}-matchs", fmt, f"Matchs du tournoi {tournament.name}", MATCH_COLUMNS)
+        with stream, view:
+            for round_ in sorted(tournament.rounds, key=lambda x: x.number):
+                for match in db.search(Match, round=round_.model_id):
+                    view.render_row(
+                        round_.number,
+                        _player_repr(match.player1),
+                        _player_repr(match.player2),
+                        match.scores[0],
+                        match.scores[1],
+                        "En cours" if not match.played else ("Forfait" if match.forfeit else "Terminé"),
+                    )
+        written.append(pathlib.Path(stream.name))
+
+        stream, view = _open_view(out_dir, f"{name}-players", fmt, f"Joueurs du tournoi {tournament.name}", STANDING_COLUMNS)
+        with stream, view:
+            standings = Standings(tournament)
+            for player in standings.by_name:
+                view.render_row(player.rank, player.first_name, player.last_name, standings.scores[player])
+        written.append(pathlib.Path(stream.name))
+    return written
+
+
+class ExportController:
+    """Non interactive controller writing every report to files"""
+
+    def __init__(self, db: DBAdapter, out_dir: pathlib.Path | str, fmt="text", jobs: int | None = None):
+        if fmt not in EXPORT_VIEWS:
+            raise ValueError("Format non supporté: %s" % fmt)
+        self._db = db
+        self.out_dir = pathlib.Path(out_dir)
+        self.fmt = fmt
+        self.jobs = jobs
+
+    def _export_players(self, db: DBAdapter):
+        stream, view = _open_view(self.out_dir, "players", self.fmt, "Raports des Joueurs", PLAYER_COLUMNS)
+        with stream, view:
+            for player in db.all(Player):
+                view.render_row(player.rank, round(player.rating), player.first_name, player.last_name, player.birthdate, player.gender)
+        return pathlib.Path(stream.name)
+
+    def _export_tournaments(self, db: DBAdapter, tournament_ids: list[int]):
+        stream, view = _open_view(self.out_dir, "tournaments", self.fmt, "Raports des Tournois", TOURNAMENT_COLUMNS)
+        with stream, view:
+            for tournament in db.all(Tournament):
+                if tournament_ids and tournament.model_id not in tournament_ids:
+                    continue
+                view.render_row(
+                    tournament.model_id,
+                    tournament.name,
+                    tournament.where,
+                    tournament.when,
+                    StyleTournament(tournament.style),
+                    tournament.round_count,
+                )
+        return pathlib.Path(stream.name)
+
+    def run(self, *tournament_ids: int) -> list[pathlib.Path]:
+        """Export the reports of the given tournaments (all of them if none given), returns the written files"""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        written: list[pathlib.Path] = []
+        with self._db as db:
+            ids = list(tournament_ids)
+            written.append(self._export_players(db))
+            written.append(self._export_tournaments(db, ids))
+            if not ids:
+                ids = [x.model_id for x in db.all(Tournament)]
+        if len(ids) > 1 and self.jobs != 1:
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                futures = [pool.submit(export_tournament, self._db.path, x, self.out_dir, self.fmt) for x in ids]
+                for future in futures:
+                    written.extend(future.result())
+        else:
+            for tournament_id in ids:
+                written.extend(export_tournament(self._db.path, tournament_id, self.out_dir, self.fmt))
+        return written
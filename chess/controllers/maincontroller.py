@@ -1,20 +1,29 @@
 import sys
 import datetime
-from typing import Any, Type
-from chess.algorithm import SwissSystem
+from typing import TYPE_CHECKING, Any, Type
+from chess.algorithm import PAIRING_CACHE, RoundRobinSystem, SwissSystem, pairing_system
 from chess.controllers.controller import Controller
 from chess.controllers.mainstate import MainViewState
-import chess.controllers.menucontrollers as mc
-import chess.controllers.menueditcontrollers as mec
-import chess.controllers.editcontrollers as ec
-import chess.controllers.reportcontrollers as rc
-from chess.database.dbadapter import DBAdapter
-from chess.models.match import Match
+from chess.database.dbadapter import DBAdapter, StaleDocumentError
+from chess.lazyimport import LazyModule
+from chess.models.match import Match, Result
 from chess.models.player import Player
 from chess.models.round import Round
+from chess.models.standings import PlayerIndex, Standings
 from chess.models.tournament import Tournament
+from chess.rating import EloRating
 import copy
 
+if TYPE_CHECKING:
+    from chess.speculation import SpeculativePairing
+
+# Controller modules (and the views they pull in) are only imported once a state needs them
+mc = LazyModule("chess.controllers.menucontrollers")
+mec = LazyModule("chess.controllers.menueditcontrollers")
+ec = LazyModule("chess.controllers.editcontrollers")
+rc = LazyModule("chess.controllers.reportcontrollers")
+speculation = LazyModule("chess.speculation")
+
 
 class MainController(Controller):
     """Main class handling the logic behind the root View."""
@@ -39,7 +48,8 @@ class MainController(Controller):
         self.current_tournament: Tournament | None = None
         self.current_round: Round | None = None
         self.current_match: Match | None = None
-        self.current_system: SwissSystem | None = None
+        self.current_system: SwissSystem | RoundRobinSystem | None = None
+        self.speculation: SpeculativePairing | None = None
 
         self.edited_data: Player | Tournament | Round | Match | None = None
         self.edited_field: str | None = None
@@ -47,6 +57,16 @@ class MainController(Controller):
 
         self.selected_item: Player | Tournament | Round | Match | None = None
         self.selected_players: list[Player] = []
+        self.removed: list[Match] = []
+        """Matchs dropped from their round, deleted from the database on the next save"""
+        self.rejected: list[StaleDocumentError] = []
+        """Changes rejected by the last save, the models hold the version saved by the other process"""
+
+        self.player_index = PlayerIndex()
+        self.standings: dict[Tournament, Standings] = {}
+        self.rating = EloRating()
+        self.revision = 0
+        """Incremented whenever displayed data changes, used to invalidate the live server responses"""
 
     def _clearFields(self):
         """Clear all data within the controller, reseting it to default values"""
@@ -55,6 +75,12 @@ class MainController(Controller):
         self.rounds.clear()
         self.matchs.clear()
         self.states.clear()
+        self.player_index = PlayerIndex()
+        self.standings.clear()
+        self.removed.clear()
+        if self.speculation is not None:
+            self.speculation.close()
+            self.speculation = None
 
         self.current_player = None
         self.current_tournament = None
@@ -66,12 +92,14 @@ class MainController(Controller):
     def onLoadDatabase(self):
         """Called upon requesting a database load, this also reset the states to the MAIN_MENU"""
         self._clearFields()
+        # The cached pairings hold the players of the previous load
+        PAIRING_CACHE.clear()
 
         with self._db as db:
-            self.players = list(db.all(Player))
-            self.tournaments = list(db.all(Tournament))
-            self.rounds = list(db.all(Round))
-            self.matchs = list(db.all(Match))
+            self.players, self.tournaments, self.rounds, self.matchs = db.load()
+        self.player_index = PlayerIndex(self.players)
+        self.rating.count_games(self.rounds)
+        self.revision += 1
 
         self.states.append(MainViewState.MAIN_MENU)
 
@@ -79,10 +107,95 @@ class MainController(Controller):
         """Called upon requesting a database save"""
 
         with self._db as db:
-            db.save(*self.players)
-            db.save(*self.tournaments)
-            db.save(*self.rounds)
-            db.save(*self.matchs)
+            db.delete(*self.removed)
+            self.removed.clear()
+            errors = db.save(*self.players)
+            errors += db.save(*self.tournaments)
+            errors += db.save(*self.rounds)
+            errors += db.save(*self.matchs)
+        if errors:
+            self._on_models_refreshed()
+        return errors
+
+    def _on_models_refreshed(self):
+        """Rebuild what is derived from the models after some of them took the version saved by another process"""
+        self.revision += 1
+        self.player_index = PlayerIndex(self.players)
+        self.standings.clear()
+        self.rating.count_games(self.rounds)
+        if self.speculation is not None:
+            self.speculation.clear()
+
+    def tournament_standings(self, tournament: Tournament):
+        """Standings of the tournament, built on first access then maintained incrementally"""
+        standings = self.standings.get(tournament)
+        if standings is None:
+            standings = Standings(tournament)
+            self.standings[tournament] = standings
+        return standings
+
+    def _on_player_changed(self, player: Player):
+        """Keep the sorted indexes in sync after a player was added or edited"""
+        self.revision += 1
+        if player in self.player_index:
+            self.player_index.update(player)
+        else:
+            self.player_index.add(player)
+        for standings in self.standings.values():
+            standings.update(player)
+
+    def _on_round_created(self, round_: Round):
+        """Register the players and scores of a newly created round in its tournament standings"""
+        self.revision += 1
+        if round_.tournament in self.standings:
+            self.standings[round_.tournament].add_round(round_)
+        self._speculate(round_.tournament)
+
+    def _on_match_result(self, match: Match, old_result: Result):
+        """Apply the score difference of a match to its tournament standings"""
+        self.revision += 1
+        tournament = match.round.tournament if match.round is not None else None
+        if tournament in self.standings:
+            self.standings[tournament].record_result(match, old_result)  # type: ignore
+        if self.rating.correct_match(match, old_result, self.rounds):
+            self._on_ratings_changed()
+        self._speculate(tournament)
+
+    def _speculate(self, tournament: Tournament | None):
+        """Refresh the speculative pairings of the next round when the tournament is the one being played"""
+        if not isinstance(self.current_system, SwissSystem) or self.current_system.tournament is not tournament:
+            return
+        if self.speculation is None or self.speculation.system is not self.current_system:
+            if self.speculation is not None:
+                self.speculation.close()
+            self.speculation = speculation.SpeculativePairing(self.current_system, self.rating)
+        self.speculation.update()
+
+    def _on_pairings_changed(self, tournament: Tournament, before: dict[Player, float], paired: list[Match], removed: list[Match],
+                             player: Player):
+        """Keep the matchs, standings and speculative pairings in sync after a withdrawal or a late entry"""
+        self.revision += 1
+        for match in paired:
+            if match not in self.matchs:
+                self.matchs.append(match)
+        for match in removed:
+            if match in self.matchs:
+                self.matchs.remove(match)
+            self.removed.append(match)
+        standings = self.standings.get(tournament)
+        if standings is not None:
+            after = tournament.rounds[-1].scores if tournament.rounds else {}
+            for changed in set(before) | set(after) | {player}:
+                standings.add_points(changed, after.get(changed, 0.0) - before.get(changed, 0.0))
+        if self.speculation is not None:
+            self.speculation.clear()
+        self._speculate(tournament)
+
+    def _on_ratings_changed(self):
+        """Derive the ranks from the new ratings and keep the sorted indexes in sync"""
+        self.revision += 1
+        for player in self.rating.rerank(self.players):
+            self._on_player_changed(player)
 
     def run(self):
         """Main loop that runs all sub controllers and contains the root logic"""
@@ -154,12 +267,14 @@ class MainController(Controller):
         """SAVE_ITEM: Save the currently edited item on the database depending on the state that requested it"""
         self.states.pop()
         old_state = self.states.pop()
+        self.revision += 1
         if old_state == MainViewState.EDIT_PLAYER:
             if self.current_player is None:
                 self.players.append(self.edited_data)  # type: ignore
                 self.current_player = self.edited_data  # type: ignore
             else:
                 self.current_player.update(self.edited_data)  # type: ignore
+            self._on_player_changed(self.current_player)  # type: ignore
         elif old_state == MainViewState.EDIT_TOURNAMENT:
             if self.current_tournament is None:
                 self.tournaments.append(self.edited_data)  # type: ignore
@@ -177,7 +292,9 @@ class MainController(Controller):
                 self.matchs.append(self.edited_data)  # type: ignore
                 self.current_match = self.edited_data  # type: ignore
             else:
+                old_result = self.current_match.result
                 self.current_match.update(self.edited_data)  # type: ignore
+                self._on_match_result(self.current_match, old_result)
 
     def _unsupported(self):
         """Default behaviour when an unknown/non-implemented state """
@@ -193,15 +310,33 @@ class MainController(Controller):
     def _save_database(self):
         """SAVE_DATABASE: save all items onto the database"""
         print("Saving to database", file=sys.stderr)
-        self.onSaveDatabase()
+        self.rejected = self.onSaveDatabase()
         self.states.pop()
+        if self.rejected:
+            return MainViewState.REJECTED_CHANGES
+        return None
+
+    def _rejected_changes(self):
+        """REJECTED_CHANGES: Show the changes rejected by the last save, offer to reload the whole database"""
+        current_controller = self.current_controller
+        if not isinstance(current_controller, mc.RejectedChangesController):
+            current_controller = mc.RejectedChangesController(self.rejected)
+            self.previous_controllers.append(current_controller)
+        new_state, _ = current_controller.run()
+        if new_state is None:
+            return None
+        self.previous_controllers.pop()
+        self.states.pop()
+        self.rejected = []
+        if new_state == MainViewState.LOAD_DATABASE:
+            return new_state
         return None
 
     def _load_database(self):
         """LOAD_DATABASE: resets the controller and load all data from the database, ignoring pending changes"""
         print("Reloading from database", file=sys.stderr)
         self.onLoadDatabase()
-        self.states.pop()
+        self.previous_controllers.clear()
         return None
 
     def _back(self):
@@ -224,6 +359,10 @@ class MainController(Controller):
                 if not isinstance(current_controller, ec.EditTournamentStyleController):
                     current_controller = ec.EditTournamentStyleController()
                     self.previous_controllers.append(current_controller)
+            elif self.edited_field in ["system"]:
+                if not isinstance(current_controller, ec.EditPairingSystemController):
+                    current_controller = ec.EditPairingSystemController()
+                    self.previous_controllers.append(current_controller)
             else:
                 if not isinstance(current_controller, ec.EditController):
                     current_controller = ec.EditController[Any](self.edited_type)
@@ -291,9 +430,9 @@ class MainController(Controller):
         current_controller = self.current_controller
         if not isinstance(current_controller, rc.ReportPlayersController):
             if self.current_tournament is not None:
-                players = sorted(self.current_tournament.scores.keys(), key=lambda x: (x.first_name, x.last_name, x.rank))
+                players = self.tournament_standings(self.current_tournament).by_name
             else:
-                players = sorted(self.players, key=lambda x: (x.first_name, x.last_name, x.rank))
+                players = self.player_index.by_name
             current_controller = rc.ReportPlayersController(*players)
             self.previous_controllers.append(current_controller)
         new_state, _ = current_controller.run()
@@ -306,9 +445,9 @@ class MainController(Controller):
         current_controller = self.current_controller
         if not isinstance(current_controller, rc.ReportPlayersController):
             if self.current_tournament is not None:
-                players = sorted(self.current_tournament.scores.keys(), key=lambda x: (x.rank, x.last_name, x.first_name))
+                players = self.tournament_standings(self.current_tournament).by_rank
             else:
-                players = sorted(self.players, key=lambda x: (x.rank, x.last_name, x.first_name))
+                players = self.player_index.by_rank
             current_controller = rc.ReportPlayersController(*players)
             self.previous_controllers.append(current_controller)
         new_state, _ = current_controller.run()
@@ -321,9 +460,9 @@ class MainController(Controller):
         current_controller = self.current_controller
         if not isinstance(current_controller, rc.ReportPlayersController):
             if self.current_tournament is not None:
-                players = map(lambda x: x[0], sorted(self.current_tournament.scores.items(), key=lambda x: (x[1], x[0].rank, x[0].last_name, x[0].first_name)))
+                players = self.tournament_standings(self.current_tournament).by_score
             else:
-                players = sorted(self.players, key=lambda x: (x.rank, x.last_name, x.first_name))
+                players = self.player_index.by_rank
             current_controller = rc.ReportPlayersController(*players)
             self.previous_controllers.append(current_controller)
         new_state, _ = current_controller.run()
@@ -362,7 +501,7 @@ class MainController(Controller):
         new_state, _ = current_controller.run()
         if isinstance(current_controller.selected_item, Tournament):
             self.current_tournament = current_controller.selected_item
-            self.current_system = SwissSystem(self.current_tournament)
+            self.current_system = pairing_system(self.current_tournament)
             return MainViewState.CONTINUE_TOURNAMENT
         if new_state == MainViewState.BACK:
             self.current_tournament = None
@@ -378,7 +517,7 @@ class MainController(Controller):
             self.current_system = None
             return MainViewState.BACK
         if self.current_system is None:
-            self.current_system = SwissSystem(self.current_tournament)
+            self.current_system = pairing_system(self.current_tournament)
         if self.current_tournament.finished:
             return MainViewState.CONTINUE_FINISHED_TOURNAMENT
         if len(self.current_tournament.rounds) == 0:
@@ -405,8 +544,13 @@ class MainController(Controller):
             self.previous_controllers.append(current_controller)
         state, _ = current_controller.run()
         if state == MainViewState.CONTINUE_STARTED_ROUND:
-            self.current_round = self.current_system.first_round(self.selected_players)
+            try:
+                self.current_round = self.current_system.first_round(self.selected_players)
+            except ValueError as error:
+                current_controller.show_error(str(error))
+                return None
             self.rounds.append(self.current_round)  # type: ignore
+            self._on_round_created(self.current_round)  # type: ignore
             self.matchs.extend(self.current_round.matchs)  # type: ignore
             self.selected_players = []
             self.states.pop()
@@ -454,13 +598,16 @@ class MainController(Controller):
         """CONTINUE_END_ROUND: Terminate the current round"""
         if self.current_round is not None:
             for match in self.current_round.matchs:
-                if match.scores == (0.0, 0.0):
+                if not match.played:
                     self.current_match = match
                     self.edited_data = match
                     return MainViewState.CONTINUE_END_MATCH
             if self.current_round.end_time == datetime.datetime.min:
                 self.current_round.updated = True
                 self.current_round.end_time = datetime.datetime.now()
+                self.revision += 1
+                self.rating.rate_round(self.current_round)
+                self._on_ratings_changed()
         self.current_round = None
         self.states.pop()
         return MainViewState.BACK
@@ -468,7 +615,7 @@ class MainController(Controller):
     def _continue_end_match(self):
         """CONTINUE_END_MATCH: Terminate the current match"""
         if self.current_match is not None:
-            if self.current_match.scores == (0.0, 0.0):
+            if not self.current_match.played:
                 self.edited_data = self.current_match
                 return MainViewState.CHOOSE_MATCH_WINNER
         self.current_match = None
@@ -493,15 +640,25 @@ class MainController(Controller):
                 self.states.pop()
                 self.states.pop()
             elif state == MainViewState.CONTINUE_END_ROUND:
+                old_result = self.edited_data.result
                 if current_controller.winner is not None:
                     if current_controller.winner is self.edited_data.player1:
-                        self.edited_data.scores = (1.0, 0.0)
+                        self.edited_data.result = Result.WHITE_WIN
                     else:
-                        self.edited_data.scores = (0.0, 1.0)
+                        self.edited_data.result = Result.BLACK_WIN
                     self.edited_data.updated = True
                 elif current_controller.equality:
-                    self.edited_data.scores = (0.5, 0.5)
+                    self.edited_data.result = Result.DRAW
+                    self.edited_data.updated = True
+                elif current_controller.absent is not None:
+                    if current_controller.absent is self.edited_data.player1:
+                        self.edited_data.result = Result.BLACK_WIN_FORFEIT
+                    else:
+                        self.edited_data.result = Result.WHITE_WIN_FORFEIT
                     self.edited_data.updated = True
+                if self.edited_data is self.current_match:
+                    # Continuing the round: the result is final. Editing a match changes a copy applied on SAVE_ITEM
+                    self._on_match_result(self.edited_data, old_result)
             self.previous_controllers.pop()
             return MainViewState.BACK
         self.states.pop()
@@ -510,8 +667,12 @@ class MainController(Controller):
     def _continue_start_round(self):
         """CONTINUE_START_ROUND: Start the current round"""
         if self.current_round is None:
-            self.current_round = self.current_system.next_round()  # type: ignore
+            pairs = None
+            if self.speculation is not None and self.speculation.system is self.current_system:
+                pairs = self.speculation.take()
+            self.current_round = self.current_system.next_round(pairs)  # type: ignore
             self.rounds.append(self.current_round)  # type: ignore
+            self._on_round_created(self.current_round)  # type: ignore
             self.matchs.extend(self.current_round.matchs)  # type: ignore
             self.edited_data = self.current_round
             return MainViewState.EDIT_ROUND
@@ -519,6 +680,41 @@ class MainController(Controller):
         self.states.pop()
         return MainViewState.BACK
 
+    def _change_participant(self, candidates: list[Player], change):
+        current_controller = self.current_controller
+        if not isinstance(current_controller, mec.PlayerSelectionController):
+            current_controller = mec.PlayerSelectionController(*candidates)
+            self.previous_controllers.append(current_controller)
+        state, _ = current_controller.run()
+        if state is None:
+            return None
+        player = current_controller.selected_item
+        self.previous_controllers.pop()
+        if player is not None:
+            tournament: Tournament = self.current_system.tournament  # type: ignore
+            before = tournament.rounds[-1].scores if tournament.rounds else {}
+            try:
+                paired, removed = change(player)
+            except ValueError as error:
+                print(error, file=sys.stderr)
+            else:
+                self._on_pairings_changed(tournament, before, paired, removed, player)
+        return MainViewState.BACK
+
+    def _withdraw_player(self):
+        """WITHDRAW_PLAYER: Withdraw a player from the current tournament, the opponent of an unplayed game is paired again"""
+        if self.current_system is None:
+            return MainViewState.BACK
+        participants = self.current_system.tournament.participants
+        return self._change_participant([x for x in self.player_index.by_name if x in participants], self.current_system.withdraw)
+
+    def _late_entry(self):
+        """LATE_ENTRY: Register a player in the current tournament, paired in the current round when it is not finished"""
+        if self.current_system is None:
+            return MainViewState.BACK
+        participants = self.current_system.tournament.participants
+        return self._change_participant([x for x in self.player_index.by_name if x not in participants], self.current_system.enter)
+
     def _continue_start_match(self):
         """CONTINUE_START_MATCH: Start the current match"""
         self.current_match = None
@@ -552,7 +748,8 @@ class MainController(Controller):
             current_controller = mec.EditMatchController()
             self.previous_controllers.append(current_controller)
         new_state, _ = current_controller.run()
-        self.edited_data = self.current_match or self.edited_data
+        if not isinstance(self.edited_data, Match):
+            self.edited_data = self.current_match
         if new_state == MainViewState.EDIT_FIELD:
             self.edited_field = current_controller.field_edit
             self.edited_type = current_controller.vtype
@@ -700,6 +897,13 @@ class MainController(Controller):
             self.previous_controllers.pop()
         return new_state
 
+    def _recompute_ratings(self):
+        """RECOMPUTE_RATINGS: Replay every finished round to recompute the ratings and ranks of all players"""
+        self.rating.recompute(self.players, self.rounds)
+        self._on_ratings_changed()
+        self.states.pop()
+        return None
+
     def _new_player(self):
         """NEW_PLAYER: Create a new player and redirect to EDIT_PLAYER"""
         self.current_player = None
@@ -737,6 +941,7 @@ MAPPED_STATE_METHODS = {
     MainViewState.NEW_PLAYER: MainController._new_player,
     MainViewState.EDIT_PLAYER_MENU: MainController._edit_player_menu,
     MainViewState.EDIT_PLAYER: MainController._edit_player,
+    MainViewState.RECOMPUTE_RATINGS: MainController._recompute_ratings,
 
     MainViewState.TOURNAMENTS_MENU: MainController._tournament_menu,
 
@@ -760,6 +965,8 @@ MAPPED_STATE_METHODS = {
     MainViewState.CONTINUE_START_MATCH: MainController._continue_start_match,
     MainViewState.CONTINUE_FINISHED_ROUND: MainController._continue_finished_round,
     MainViewState.CONTINUE_END_TOURNAMENT: MainController._continue_end_tournament,
+    MainViewState.WITHDRAW_PLAYER: MainController._withdraw_player,
+    MainViewState.LATE_ENTRY: MainController._late_entry,
 
     MainViewState.REPORTS_MENU: MainController._reports_menu,
     MainViewState.REPORTS_ALPHA_PLAYERS: MainController._reports_players_alpha,
@@ -779,6 +986,7 @@ MAPPED_STATE_METHODS = {
     MainViewState.SAVE_ITEM: MainController._save_item,
     MainViewState.LOAD_DATABASE: MainController._load_database,
     MainViewState.SAVE_DATABASE: MainController._save_database,
+    MainViewState.REJECTED_CHANGES: MainController._rejected_changes,
 
     MainViewState.BACK: MainController._back,
     MainViewState.QUIT: MainController._quit,
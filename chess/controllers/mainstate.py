@@ -49,6 +49,11 @@ class MainViewState(int, Enum):
     SELECT_MATCH = 33
     SELECT_PLAYER = 34
 
+    RECOMPUTE_RATINGS = 35
+    WITHDRAW_PLAYER = 36
+    LATE_ENTRY = 37
+    REJECTED_CHANGES = 38
+
     SAVE_ITEM = -6
     EDIT_FIELD = -5
     BACK = -4
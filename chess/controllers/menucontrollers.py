@@ -1,4 +1,4 @@
-from chess.algorithm import SwissSystem
+from chess.algorithm import RoundRobinSystem, SwissSystem
 from chess.controllers.controller import Controller, MainStateReturn
 from chess.controllers.mainstate import MainViewState
 from chess.controllers.menueditcontrollers import ItemSelectionController
@@ -6,6 +6,7 @@ from chess.models.player import Player
 from chess.models.tournament import Tournament
 import chess.controllers.reportcontrollers as rc
 import chess.view.reportviews as rv
+from chess.view.textview import TextView
 from chess.view.view import View
 
 
@@ -45,6 +46,7 @@ class PlayersMenuController(MenuController):
         super().__init__(
             "Nouveau Joueur",
             "Modifier Joueur",
+            "Recalculer les classements Elo depuis l'historique (remplace les classements saisis)",
         )
         self.view.title = "Menu de Gestion des Joueurs"
         self.view.exitName = "Retour"
@@ -57,6 +59,8 @@ class PlayersMenuController(MenuController):
             return MainViewState.NEW_PLAYER, []
         elif value == 1:
             return MainViewState.EDIT_PLAYER_MENU, []
+        elif value == 2:
+            return MainViewState.RECOMPUTE_RATINGS, []
         return super().handle_input(value)
 
 
@@ -85,7 +89,7 @@ class TournamentsMenuController(MenuController):
 
 
 class ContinueFinishedTournamentController(MenuController):
-    def __init__(self, system: SwissSystem):
+    def __init__(self, system: SwissSystem | RoundRobinSystem):
         super().__init__()
         self.system = system
 
@@ -113,9 +117,13 @@ class ContinueFinishedTournamentController(MenuController):
 
 
 class ContinueStartedRoundController(MenuController):
-    def __init__(self, system: SwissSystem):
+    def __init__(self, system: SwissSystem | RoundRobinSystem):
+        # The schedule of a round-robin is fixed when it starts, no late entry
+        self.late_entries = not isinstance(system, RoundRobinSystem)
         super().__init__(
             "Terminer la ronde en cours",
+            "Retirer un joueur",
+            *(["Inscrire un joueur en retard"] if self.late_entries else []),
         )
         self.system = system
         self._report_matchs = rc.ReportsMatchsController()
@@ -124,6 +132,10 @@ class ContinueStartedRoundController(MenuController):
     def handle_input(self, value: int):
         if value == 0:
             return MainViewState.CONTINUE_END_ROUND, []
+        elif value == 1:
+            return MainViewState.WITHDRAW_PLAYER, []
+        elif value == 2 and self.late_entries:
+            return MainViewState.LATE_ENTRY, []
         return super().handle_input(value)
 
     def run(self) -> MainStateReturn:
@@ -133,9 +145,13 @@ class ContinueStartedRoundController(MenuController):
 
 
 class ContinueFinishedRoundController(MenuController):
-    def __init__(self, system: SwissSystem):
+    def __init__(self, system: SwissSystem | RoundRobinSystem):
+        # The schedule of a round-robin is fixed when it starts, no late entry
+        self.late_entries = not isinstance(system, RoundRobinSystem)
         super().__init__(
             "Demarrer la ronde suivante",
+            "Retirer un joueur",
+            *(["Inscrire un joueur en retard"] if self.late_entries else []),
         )
         self.system = system
         self._report_matchs = rc.ReportsMatchsController()
@@ -144,6 +160,10 @@ class ContinueFinishedRoundController(MenuController):
     def handle_input(self, value: int):
         if value == 0:
             return MainViewState.CONTINUE_START_ROUND, []
+        elif value == 1:
+            return MainViewState.WITHDRAW_PLAYER, []
+        elif value == 2 and self.late_entries:
+            return MainViewState.LATE_ENTRY, []
         return super().handle_input(value)
 
     def run(self) -> MainStateReturn:
@@ -162,6 +182,12 @@ class ContinueInitTournamentController(Controller):
         self.tournament = tournament
         self.err_str: str | None = None
 
+    def show_error(self, message: str):
+        """Print `message` above the menu on the next run"""
+        self.err_str = message
+        self._menu_view.selected_index = -1
+        self._menu_view.view.show_header = False
+
     def run(self) -> MainStateReturn:
         if self.err_str is not None:
             print(self.err_str)
@@ -189,11 +215,20 @@ class WinnerChooserController(ItemSelectionController[Player | str | None]):
     def equality(self):
         return self.selected_index == 2
 
+    @property
+    def absent(self):
+        """Player who forfeited the match"""
+        if self.selected_index in (3, 4):
+            return self._items[self.selected_index - 3]
+        return None
+
     def __init__(self, player1: Player | None, player2: Player | None):
         super().__init__(
             player1,
             player2,
             "Egalité",
+            "Forfait du premier joueur",
+            "Forfait du second joueur",
         )
         self.view.title = "Selection du vainqueur du match"
         self.view.can_save = False
@@ -219,6 +254,28 @@ class WinnerChooserController(ItemSelectionController[Player | str | None]):
         return super().run()
 
 
+class RejectedChangesController(MenuController):
+    def __init__(self, errors: list[Exception]):
+        super().__init__(
+            "Continuer avec les versions enregistrées",
+            "Recharger toute la base",
+        )
+        self.view.title = "Modifications rejetées"
+        self.view.exitName = "Retour"
+        self.view.can_save = False
+        self.view.can_repeat_list = False
+        self.view.before_view = TextView()
+        self.view.before_view.text = "\n".join(str(x) for x in errors) + \
+            "\nUn autre processus a enregistré ces éléments en premier, sa version a été reprise."
+
+    def handle_input(self, value: int) -> MainStateReturn:
+        if value == 0:
+            return MainViewState.BACK, []
+        elif value == 1:
+            return MainViewState.LOAD_DATABASE, []
+        return super().handle_input(value)
+
+
 class ReportsMenuController(MenuController):
     def __init__(self, /):
         super().__init__(
@@ -5,7 +5,7 @@ from chess.controllers.mainstate import MainViewState
 from chess.models.match import Match
 from chess.models.player import Player
 from chess.models.round import Round
-from chess.models.tournament import StyleTournament, Tournament
+from chess.models.tournament import PairingSystem, StyleTournament, Tournament
 from chess.view.menuview import MenuItemsView
 from chess.view.reportviews import MatchReportView, PlayerReportView, RoundReportView, TournamentReportView
 from chess.view.textview import TextView
@@ -179,7 +179,7 @@ class MatchSelectionController(ItemSelectionController[Match]):
             return str(value)
         return MatchReportView(
             index=idx,
-            scores=value.scores,
+            result=value.result,
         )
 
 
@@ -281,7 +281,7 @@ class EditMatchMenuController(ItemSelectionController[Match | str]):
             return match
         return MatchReportView(
             index=idx,
-            scores=match.scores,
+            result=match.result,
         )
 
     def run(self) -> MainStateReturn:
@@ -344,6 +344,7 @@ class EditPlayerController(EditController):
             EditField("Definir la date de naissance", date, "birthdate"),
             EditField("Definir le genre", str, "gender"),
             EditField("Definir le classement", int, "rank"),
+            EditField("Definir le classement Elo", float, "rating"),
         )
         self.view.title = "Modification du Joueur"
 
@@ -356,6 +357,8 @@ class EditTournamentController(EditController):
             EditField("Definir la date", date, "when"),
             EditField("Definir le style", StyleTournament, "style"),
             EditField("Definir le nombre de round", int, "round_count"),
+            EditField("Definir le nombre de rondes accelerees", int, "accelerated_rounds"),
+            EditField("Definir le systeme d'appariement", PairingSystem, "system"),
             OutStateField("Modifier une ronde du Tournoi", MainViewState.EDIT_ROUND_MENU),
         )
         self.view.title = "Modification du Tournoi"
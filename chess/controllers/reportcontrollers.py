@@ -25,6 +25,7 @@ class ReportPlayersController(ItemSelectionController[Player]):
             birthdate=item.birthdate,
             gender=item.gender,
             rank=item.rank,
+            rating=item.rating,
         )
 
 
@@ -44,7 +45,7 @@ class ReportsMatchsController(ItemSelectionController[Match]):
 
     def item_view_factory(self, item: Match, idx: int) -> View:
         return MatchLongReportView(
-            scores=item.scores,
+            result=item.result,
             player1=ReportsMatchsController.get_player_repr(item.player1),
             player2=ReportsMatchsController.get_player_repr(item.player2),
         )
@@ -1,50 +1,370 @@
-import pathlib
-from typing import Generator, Type, TypeVar
-from weakref import WeakSet
+from __future__ import annotations
 
-from tinydb import TinyDB
-from tinydb.table import Document
+import os
+import pathlib
+from datetime import datetime
+from typing import TYPE_CHECKING, Generator, Type, TypeVar
+from weakref import WeakValueDictionary
 
+from chess.database.filelock import FileLock
+from chess.database.modelcache import ModelCache
 from chess.models.model import Model
-from chess.models.player import Player
+from chess.models.player import DEFAULT_RATING, Player
 from chess.models.tournament import Tournament
 from chess.models.round import Round
-from chess.models.match import Match
+from chess.models.match import RESULTS, Match, result_of
 from chess.serializers import deserialize_date, deserialize_datetime, serialize_date, serialize_datetime
 
+if TYPE_CHECKING:
+    from chess.database.storage import JSONCodec
+    from tinydb import TinyDB
+    from tinydb.table import Document
+
 
 TModel = TypeVar('TModel', bound=Model)
 
+VERSION_FIELD = "_version"
+SEQUENCES_TABLE = "_sequences"
+"""Last document id given in each sharded table, ids stay unique across the shards"""
+SHARDED_TABLES = ("rounds", "matchs")
+
+
+def document_version(document: dict | None) -> int:
+    if document is None:
+        return 0
+    return document.get(VERSION_FIELD, 0)
+
+
+def document_fields(document: dict):
+    return {x: y for x, y in document.items() if x != VERSION_FIELD}
+
+
+def merge_documents(base: dict, theirs: dict, ours: dict):
+    """Three way merge of the changes made since `base` was read, None when both sides changed the same field"""
+    merged = dict(theirs)
+    for key, value in ours.items():
+        if value == base.get(key) or value == theirs.get(key):
+            continue
+        if theirs.get(key) != base.get(key):
+            return None
+        merged[key] = value
+    return merged
+
+
+def replace_fields(document: dict):
+    """TinyDB update operation replacing every field, fields dropped from the format disappear from the file"""
+    def transform(stored: dict):
+        stored.clear()
+        stored.update(document)
+    return transform
+
+
+class StaleDocumentError(Exception):
+    """A model could not be saved because another process changed the same fields first"""
+
+    def __init__(self, value: Model) -> None:
+        super().__init__(f"{type(value).__name__} {value.model_id} modifié par un autre processus")
+        self.value = value
+
 
 class DBAdapter:
 
-    def __init__(self):
-        self.__dbPath = pathlib.Path(".") / pathlib.Path("db.json")
+    @property
+    def path(self):
+        return self.__dbPath
+
+    def __init__(self, path: pathlib.Path | str = "db.json", read_only=False, cache_size=256,
+                 buffered=True, flush_writes=1000, flush_interval: float | None = 5.0, codec: JSONCodec | None = None):
+        self.__dbPath = pathlib.Path(".") / pathlib.Path(path)
         self.__db: TinyDB | None = None
-        self.__types_refs: dict[Type[Model], WeakSet[Model]] = {}
+        self.__types_refs: dict[Type[Model], WeakValueDictionary[int, Model]] = {}
+        """Identity map of the models alive, by type and document id"""
+        self.__lock = FileLock(self.__dbPath.with_name(self.__dbPath.name + ".lock"), shared=read_only)
+        self.read_only = read_only
+        self.__shards: dict[int, TinyDB] = {}
+        """Tournament files opened during the session, by tournament id"""
+        self.__routes: dict[tuple[str, int], int] = {}
+        """Tournament file of each round and match document read or written"""
+        self.__single_file = False
+        """Rounds and matchs still in the main file, a database written before the shards opened read only"""
+        self.__known: dict[tuple[str, int], tuple[int, dict]] = {}
+        """Version and fields of each document as last read or written by this process"""
+        self.cache = ModelCache(cache_size)
+        """Recently read models kept alive so that reading them again does not rebuild them"""
+        self.buffered = buffered
+        """Keep the file in memory for the session and flush the writes by batches, see BufferedStorage"""
+        self.flush_writes = flush_writes
+        self.flush_interval = flush_interval
+        self.codec = codec
+        """JSON codec of the files, the fastest installed when None"""
+        self.__graph: dict[Type[Model], dict[int, Model]] | None = None
+        """Models hydrated by the running `load`, references are resolved from it instead of reading their documents"""
+
+    @property
+    def suffix(self):
+        """Extensions of the database files, `.json` or `.json` followed by the extension of a compression"""
+        from chess.database.storage import compression_of
+        if compression_of(self.__dbPath) is None:
+            return self.__dbPath.suffix
+        return pathlib.Path(self.__dbPath.stem).suffix + self.__dbPath.suffix
+
+    @property
+    def shards_path(self):
+        """Directory of the tournament files, next to the main file holding the players and tournaments"""
+        return self.__dbPath.with_name(self.__dbPath.name.removesuffix(self.suffix) + ".tournaments")
+
+    def _open(self, path: pathlib.Path):
+        from tinydb import TinyDB
+        from chess.database.storage import BufferedStorage, storage_class
+        if self.buffered:
+            # The main file is locked for the whole session, no other process can change the files behind the cache
+            storage = BufferedStorage(storage_class(path), self.flush_writes, self.flush_interval)
+            return TinyDB(path, storage=storage, codec=self.codec)
+        return TinyDB(path, storage=storage_class(path), codec=self.codec)
 
     def __enter__(self):
-        self.__db = TinyDB(self.__dbPath)
+        self.__lock.acquire()
+        try:
+            if self._rewrite_manifest_path().exists():
+                self._finish_interrupted_rewrite()
+            self.__db = self._open(self.__dbPath)
+            if set(SHARDED_TABLES) & self.__db.tables():
+                if self.read_only:
+                    self.__single_file = True
+                else:
+                    self._split_main_file()
+        except BaseException:
+            self.__exit__()
+            raise
         return self
 
     def __exit__(self, *_):
-        if self.__db is not None:
-            self.__db.close()
-        self.__db = None
+        try:
+            for shard in self.__shards.values():
+                shard.close()
+            if self.__db is not None:
+                self.__db.close()
+        finally:
+            self.__shards.clear()
+            self.__db = None
+            self.__single_file = False
+            self.__lock.release()
+
+    def flush(self):
+        """Write the changes still buffered to the files, the session stays open"""
+        if self.buffered:
+            for shard in self.__shards.values():
+                shard.storage.flush()  # type: ignore
+            if self.__db is not None:
+                self.__db.storage.flush()  # type: ignore
+
+    def copy(self, path: pathlib.Path | str):
+        """Copy the database files to `path` and its tournament files, compressed or not depending on the extension of
+        `path` (e.g. db.json.gz)"""
+        target = DBAdapter(path)
+        with self:
+            self.flush()
+            files = [(self.__dbPath, target.path)] + [(self._shard_path(x), target._shard_path(x)) for x in self._shard_ids()]
+            for source, destination in files:
+                if source.exists():
+                    self._write_file(destination, self._read_file(source))
+        return target
+
+    def _read_file(self, path: pathlib.Path) -> dict[str, dict[str, dict]]:
+        from chess.database.storage import storage_class
+        if not path.exists():
+            return {}
+        reader = storage_class(path)(path, access_mode="r", codec=self.codec)
+        try:
+            return reader.read() or {}
+        finally:
+            reader.close()
+
+    def _write_file(self, path: pathlib.Path, data: dict):
+        from chess.database.storage import storage_class
+        writer = storage_class(path)(path, create_dirs=True, codec=self.codec)
+        try:
+            writer.write(data)
+        finally:
+            writer.close()
+
+    def read_files(self):
+        """Tables of the main file and of each tournament file as stored, by table name then document id, without
+        building any model. Rounds and matchs are still in the main file for a database written before the shards
+        opened read only"""
+        self.flush()
+        main = self._read_file(self.__dbPath)
+        shards = {tid: self._read_file(self._shard_path(tid)) for tid in self._shard_ids()}
+        return main, shards
+
+    def _rewrite_path(self):
+        return self.__dbPath.with_name(self.__dbPath.name + ".rewrite")
+
+    def _rewrite_manifest_path(self):
+        return self.__dbPath.with_name(self.__dbPath.name + ".rewrite.json")
+
+    def rewrite_files(self, main: dict[str, dict[str, dict]], shards: dict[int, dict[str, dict[str, dict]]]):
+        """Replace every file of the database with the tables of `main` and `shards`, in the format of `read_files`.
+
+        The new files are written aside first, the list of the tournament files is then written as a manifest: once it
+        exists the replacement is completed, by the next session if interrupted. Models read before are forgotten"""
+        import json
+        import shutil
+        assert self.__db is not None and not self.read_only
+        self.flush()
+        staging = self._rewrite_path()
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        suffix = self.suffix
+        for tid, tables in shards.items():
+            self._write_file(staging / f"{tid}{suffix}", tables)
+        self._write_file(staging / f"main{suffix}", main)
+        manifest = self._rewrite_manifest_path()
+        temporary = manifest.with_name(manifest.name + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as stream:
+            json.dump({"shards": sorted(f"{x}{suffix}" for x in shards)}, stream)
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temporary, manifest)
+        for shard in self.__shards.values():
+            shard.close()
+        self.__shards.clear()
+        self.__db.close()
+        self._finish_rewrite()
+        self.__db = self._open(self.__dbPath)
+        self.__known.clear()
+        self.__routes.clear()
+        self.__types_refs.clear()
+        self.cache.clear()
+
+    def _finish_rewrite(self):
+        """Move the files written by `rewrite_files` in place, can be run again until the manifest is removed"""
+        import json
+        import shutil
+        manifest = self._rewrite_manifest_path()
+        with open(manifest, encoding="utf-8") as stream:
+            names = set(json.load(stream)["shards"])
+        staging = self._rewrite_path()
+        suffix = self.suffix
+        if self.shards_path.is_dir():
+            for path in self.shards_path.glob("*" + suffix):
+                if path.name not in names and path.name.removesuffix(suffix).lstrip("-").isdigit():
+                    path.unlink()
+        self.shards_path.mkdir(exist_ok=True)
+        for name in names:
+            if (staging / name).exists():
+                os.replace(staging / name, self.shards_path / name)
+        if (staging / f"main{suffix}").exists():
+            os.replace(staging / f"main{suffix}", self.__dbPath)
+        shutil.rmtree(staging, ignore_errors=True)
+        manifest.unlink()
+
+    def _finish_interrupted_rewrite(self):
+        """Complete a rewrite interrupted in another session, under an exclusive lock even in a read only session"""
+        if not self.read_only:
+            self._finish_rewrite()
+            return
+        self.__lock.release()
+        try:
+            with FileLock(self.__lock.path):
+                if self._rewrite_manifest_path().exists():
+                    self._finish_rewrite()
+        finally:
+            self.__lock.acquire()
+
+    def _split_main_file(self):
+        """Move the rounds and matchs of a database written before the shards to the file of their tournament, the
+        document ids are kept. Started again from the main file if interrupted before it is written"""
+        from tinydb.table import Document
+        assert self.__db is not None
+        round_tournaments = {x.doc_id: x.get('tid', -1) for x in self.__db.table("rounds").all()}
+        shards: dict[int, dict[str, list[Document]]] = {}
+        last_ids: dict[str, int] = {}
+        for name in SHARDED_TABLES:
+            for document in self.__db.table(name).all():
+                tid = document.get('tid', -1) if name == "rounds" else round_tournaments.get(document['round'], -1)
+                shards.setdefault(tid, {x: [] for x in SHARDED_TABLES})[name].append(Document(dict(document), document.doc_id))
+                last_ids[name] = max(last_ids.get(name, 0), document.doc_id)
+        for tid, tables in shards.items():
+            shard = self._shard(tid, create=True)
+            for name, documents in tables.items():
+                table = shard.table(name)  # type: ignore
+                table.truncate()
+                table.insert_multiple(documents)
+        self.flush()
+        self.__db.table(SEQUENCES_TABLE).upsert(Document(last_ids, doc_id=1))
+        for name in SHARDED_TABLES:
+            self.__db.drop_table(name)
+
+    def _shard_path(self, tid: int):
+        return self.shards_path / f"{tid}{self.suffix}"
+
+    def _shard(self, tid: int, create=False):
+        """File of a tournament, opened on first use in the session, None when it does not exist and `create` is False"""
+        shard = self.__shards.get(tid)
+        if shard is None:
+            path = self._shard_path(tid)
+            if not create and not path.exists():
+                return None
+            path.parent.mkdir(exist_ok=True)
+            shard = self.__shards[tid] = self._open(path)
+        return shard
+
+    def _shard_ids(self):
+        found = set(self.__shards)
+        if self.shards_path.is_dir():
+            suffix = self.suffix
+            names = (x.name.removesuffix(suffix) for x in self.shards_path.glob("*" + suffix))
+            found.update(int(x) for x in names if x.lstrip("-").isdigit())
+        return sorted(found)
+
+    def _shard_id(self, value: Model):
+        """Tournament whose file holds the document of a round or a match"""
+        if isinstance(value, Match):
+            value = value.round  # type: ignore
+        if isinstance(value, Round) and value.tournament is not None:
+            return value.tournament.model_id
+        return -1
+
+    def _next_id(self, name: str):
+        """Document id of a new round or match, unique across every tournament file"""
+        from tinydb.table import Document
+        sequences = self.__db.table(SEQUENCES_TABLE)  # type: ignore
+        last_ids = dict(sequences.get(doc_id=1) or {})
+        last_ids[name] = last_ids.get(name, 0) + 1
+        sequences.upsert(Document(last_ids, doc_id=1))
+        return last_ids[name]
 
     def register_model(self, value: Model):
-        self._ensure_refs(type(value))
-        refs = self.__types_refs[type(value)]
-        if value not in refs:
-            refs.add(value)
+        if value.model_id >= 0:
+            self._ensure_refs(type(value))[value.model_id] = value
 
-    def _ensure_refs(self, vtype: Type[TModel]) -> WeakSet[TModel]:
+    def _ensure_refs(self, vtype: Type[TModel]) -> WeakValueDictionary[int, TModel]:
         if vtype not in self.__types_refs:
-            weak_set = WeakSet[TModel]()
-            self.__types_refs[vtype] = weak_set  # type: ignore
-            return weak_set
+            refs = WeakValueDictionary[int, TModel]()
+            self.__types_refs[vtype] = refs  # type: ignore
+            return refs
         return self.__types_refs[vtype]  # type: ignore
 
+    def _loaded(self, vtype: Type[TModel], model_id: int) -> TModel | None:
+        """Model already built for a document, looked up in the recently used ones then in the weak identity map"""
+        found = self.cache.get(vtype, model_id)
+        if found is not None:
+            return found
+        found = self._ensure_refs(vtype).get(model_id)
+        if found is not None and found.model_id == model_id:
+            self.cache.identity_hits += 1
+            self.cache.put(found)
+            return found
+        self.cache.misses += 1
+        return None
+
+    def _reference(self, vtype: Type[TModel], model_id: int) -> TModel | None:
+        """Model referenced by a document, taken from the graph being loaded when there is one"""
+        if self.__graph is not None:
+            return self.__graph.get(vtype, {}).get(model_id)  # type: ignore
+        return self.fromID(vtype, model_id)
+
     def _get_table_name(self, type_: Type[TModel]):
         if type_ is Player:
             return "players"
@@ -56,60 +376,98 @@ class DBAdapter:
             return "matchs"
         return None
 
-    def _table(self, vtype: Type[TModel]):
+    def _sharded(self, name: str | None):
+        return name in SHARDED_TABLES and not self.__single_file
+
+    def _tables(self, vtype: Type[TModel], tid: int | None = None):
+        """Tournament ids and tables holding the documents of `vtype`, only the file of tournament `tid` when given"""
         if self.__db is None:
-            return None
+            return []
         self._ensure_refs(vtype)
         name = self._get_table_name(vtype)
         if name is None:
-            return None
-        return self.__db.table(name)
+            return []
+        if not self._sharded(name):
+            return [(None, self.__db.table(name))]
+        tables = []
+        for shard_id in (self._shard_ids() if tid is None else [tid]):
+            shard = self._shard(shard_id)
+            if shard is not None:
+                tables.append((shard_id, shard.table(name)))
+        return tables
+
+    def _write_table(self, value: Model):
+        """Tournament id and table where the document of `value` is written, the tournament file is created if needed"""
+        name: str = self._get_table_name(type(value))  # type: ignore
+        if not self._sharded(name):
+            return None, self.__db.table(name)  # type: ignore
+        tid = self._shard_id(value)
+        return tid, self._shard(tid, create=True).table(name)  # type: ignore
+
+    def _hydrate(self, vtype: Type[TModel], tid: int | None, documents: list[Document]) -> Generator[TModel, None, None]:
+        name: str = self._get_table_name(vtype)  # type: ignore
+        for document in documents:
+            if tid is not None:
+                self.__routes[(name, document.doc_id)] = tid
+            found = self._from_type_document(vtype, document)
+            if found is not None:
+                yield found
 
     def _from_player_document(self, document: Document | None) -> Player | None:
         if document is None:
             return None
         model_id: int = document.doc_id
-        for ref_ in self._ensure_refs(Player):
-            if ref_.model_id == model_id:
-                return ref_
-        player = Player(
-            model_id=model_id,
-            first_name=document['first_name'],
-            last_name=document['last_name'],
-            birthdate=deserialize_date(document['birthdate'], None),
-            gender=document['gender'],
-            rank=document['rank'],
-        )
+        found = self._loaded(Player, model_id)
+        if found is not None:
+            return found
+        player = Player(model_id=model_id, **self._player_fields(document))
         self.register_model(player)
         return player
 
+    def _player_fields(self, document: dict):
+        return {
+            'first_name': document['first_name'],
+            'last_name': document['last_name'],
+            'birthdate': deserialize_date(document['birthdate'], None),
+            'gender': document['gender'],
+            'rank': document['rank'],
+            'rating': document.get('rating', DEFAULT_RATING),
+        }
+
     def _to_player_document(self, player: Player):
         return {
             'first_name': player.first_name,
             'last_name': player.last_name,
             'birthdate': serialize_date(player.birthdate, ""),
             'gender': player.gender,
-            'rank': player.rank
+            'rank': player.rank,
+            'rating': player.rating,
         }
 
     def _from_tournament_document(self, document: Document | None) -> Tournament | None:
         if document is None:
             return None
         model_id: int = document.doc_id
-        for ref_ in self._ensure_refs(Tournament):
-            if ref_.model_id == model_id:
-                return ref_
-        tournament = Tournament(
-            model_id=model_id,
-            name=document['name'],
-            where=document['where'],
-            when=deserialize_date(document['when']),
-            style=document['style'],
-            round_count=document['round_count'],
-        )
+        found = self._loaded(Tournament, model_id)
+        if found is not None:
+            return found
+        tournament = Tournament(model_id=model_id, **self._tournament_fields(document))
         self.register_model(tournament)
         return tournament
 
+    def _tournament_fields(self, document: dict):
+        return {
+            'name': document['name'],
+            'where': document['where'],
+            'when': deserialize_date(document['when']),
+            'style': document['style'],
+            'round_count': document['round_count'],
+            'accelerated_rounds': document.get('accelerated_rounds', 0),
+            'seeds': [x for x in map(lambda x: self._reference(Player, x), document.get('seeds', [])) if x is not None],
+            'withdrawn': [x for x in map(lambda x: self._reference(Player, x), document.get('withdrawn', [])) if x is not None],
+            'system': document.get('system', 0),
+        }
+
     def _to_tournament_document(self, tournament: Tournament):
         return {
             'name': tournament.name,
@@ -118,28 +476,37 @@ class DBAdapter:
             'style': tournament.style,
             'round_count': tournament.round_count,
             'finished': tournament.finished,
+            'accelerated_rounds': tournament.accelerated_rounds,
+            'seeds': [x.model_id for x in tournament.seeds],
+            'withdrawn': [x.model_id for x in tournament.withdrawn],
+            'system': tournament.system,
         }
 
     def _from_round_document(self, document: Document | None) -> Round | None:
         if document is None:
             return None
         model_id: int = document.doc_id
-        for ref_ in self._ensure_refs(Round):
-            if ref_.model_id == model_id:
-                return ref_
+        found = self._loaded(Round, model_id)
+        if found is not None:
+            return found
         round_ = Round(
             model_id=model_id,
-            name=document["name"],
-            number=document["number"],
-            start_time=deserialize_datetime(document['start_time'], None),
-            end_time=deserialize_datetime(document['end_time'], None),
-            tournament=self.fromID(Tournament, document['tid']),
+            tournament=self._reference(Tournament, document['tid']),
+            **self._round_fields(document),
         )
         self.register_model(round_)
         if round_.tournament is not None:
             round_.tournament.rounds.append(round_)
         return round_
 
+    def _round_fields(self, document: dict):
+        return {
+            'name': document["name"],
+            'number': document["number"],
+            'start_time': deserialize_datetime(document['start_time'], None) or datetime.min,
+            'end_time': deserialize_datetime(document['end_time'], None) or datetime.min,
+        }
+
     def _to_round_document(self, round_: Round):
         return {
             'name': round_.name,
@@ -153,41 +520,87 @@ class DBAdapter:
         if document is None:
             return None
         model_id: int = document.doc_id
-        for ref_ in self._ensure_refs(Match):
-            if ref_.model_id == model_id:
-                return ref_
+        found = self._loaded(Match, model_id)
+        if found is not None:
+            return found
         match_ = Match(
             match_id=model_id,
-            mapped_round=self.fromID(Round, document['round']),
-            scores=tuple(float(x) for x in document['scores'].split('/')),
-            player1=self.fromID(Player, document['player1']),
-            player2=self.fromID(Player, document['player2']),
+            mapped_round=self._reference(Round, document['round']),
+            **self._match_fields(document),
         )
         self.register_model(match_)
         if match_.round is not None:
             match_.round.matchs.append(match_)
         return match_
 
+    def _match_fields(self, document: dict):
+        result = document.get('result')
+        if result is None:
+            # Documents written before the result codes, rewritten with a code on the next save
+            result = result_of(
+                tuple(float(x) for x in document['scores'].split('/')),  # type: ignore
+                document.get('forfeit', False),
+                document['player2'] < 0,
+            )
+        else:
+            result = RESULTS[result]
+        return {
+            'result': result,
+            'player1': self._reference(Player, document['player1']),
+            'player2': self._reference(Player, document['player2']),
+            'rating_snapshot': tuple(document['ratings']) if document.get('ratings') else None,
+        }
+
+    def _apply_document(self, value: Model, document: dict):
+        """Refresh a loaded model with the fields of a newer version of its document"""
+        if isinstance(value, Player):
+            fields = self._player_fields(document)
+        elif isinstance(value, Tournament):
+            fields = self._tournament_fields(document)
+        elif isinstance(value, Round):
+            fields = self._round_fields(document)
+        elif isinstance(value, Match):
+            fields = self._match_fields(document)
+        else:
+            return
+        for name, field in fields.items():
+            setattr(value, name, field)
+
     def _to_match_document(self, match: Match):
         return {
             'round': -1 if match.round is None else match.round.model_id,
             'player1': -1 if match.player1 is None else match.player1.model_id,
             'player2': -1 if match.player2 is None else match.player2.model_id,
-            'scores': "%.1f/%.1f" % match.scores
+            'result': int(match.result),
+            'ratings': None if match.rating_snapshot is None else list(match.rating_snapshot),
         }
 
+    def _remember(self, vtype: Type[TModel], doc_id: int, document: dict):
+        self.__known[(self._get_table_name(vtype), doc_id)] = (document_version(document), document_fields(document))  # type: ignore
+
     def _from_type_document(self, vtype: Type[TModel], document: Document | None) -> TModel | None:
         if document is None:
             return None
         if vtype is Player:
-            return self._from_player_document(document)  # type: ignore
+            value = self._from_player_document(document)
         elif vtype is Tournament:
-            return self._from_tournament_document(document)  # type: ignore
+            value = self._from_tournament_document(document)
         elif vtype is Round:
-            return self._from_round_document(document)  # type: ignore
+            value = self._from_round_document(document)
         elif vtype is Match:
-            return self._from_match_document(document)  # type: ignore
-        return None
+            value = self._from_match_document(document)
+        else:
+            return None
+        if value is not None:
+            self.cache.put(value)
+            if self.__graph is not None:
+                self.__graph.setdefault(vtype, {})[document.doc_id] = value
+        known = self.__known.get((self._get_table_name(vtype), document.doc_id))  # type: ignore
+        if value is not None and known is not None and known[0] != document_version(document):
+            # Changed by another process since last read, only this document is hydrated again
+            self._apply_document(value, document)
+        self._remember(vtype, document.doc_id, document)
+        return value  # type: ignore
 
     def _to_type_document(self, value: TModel) -> dict | None:
         if isinstance(value, Player):
@@ -203,38 +616,102 @@ class DBAdapter:
     def fromID(self, vtype: Type[TModel], model_id: int):
         if model_id < 0:
             return None
-        table = self._table(vtype)
-        if table is None:
-            return None
-        document = table.get(doc_id=model_id)
-        return self._from_type_document(vtype, document)
+        for tid, table in self._tables(vtype, self.__routes.get((self._get_table_name(vtype), model_id))):  # type: ignore
+            document = table.get(doc_id=model_id)
+            if document is not None:
+                return next(self._hydrate(vtype, tid, [document]), None)  # type: ignore
+        return None
 
     def all(self, vtype: Type[TModel]) -> Generator[TModel, None, None]:
-        table = self._table(vtype)
-        if table is None:
-            return
-        refs = self._ensure_refs(vtype)
-        for document in table.all():
-            found: TModel | None = None
-            for ref_ in refs:
-                if ref_.model_id == document.doc_id:
-                    found = ref_
-                    break
-            if found is None:
-                found = self._from_type_document(vtype, document)
-            if found is not None:
-                yield found
+        for tid, table in self._tables(vtype):
+            yield from self._hydrate(vtype, tid, table.all())
 
-    def save(self, *values: TModel):
+    def load(self):
+        """Hydrate the whole database in a single pass: each table is read once, in reference order, and the
+        references are resolved from the models already built instead of reading their documents one by one"""
+        self.__graph = {}
+        try:
+            players = list(self.all(Player))
+            tournaments = list(self.all(Tournament))
+            rounds = list(self.all(Round))
+            matchs = list(self.all(Match))
+        finally:
+            self.__graph = None
+        return players, tournaments, rounds, matchs
+
+    def search(self, vtype: Type[TModel], **fields) -> Generator[TModel, None, None]:
+        """Yield the models of `vtype` whose document matches all `fields`, hydrating them one at a time.
+
+        Only the file of the tournament is read when searching the rounds of a tournament or the matchs of a known round"""
+        from tinydb import Query
+        tid = None
+        if vtype is Round and 'tid' in fields:
+            tid = fields['tid']
+        elif vtype is Match and 'round' in fields:
+            tid = self.__routes.get(("rounds", fields['round']))
+        for shard_id, table in self._tables(vtype, tid):
+            yield from self._hydrate(vtype, shard_id, table.search(Query().fragment(fields)))
+
+    def save(self, *values: TModel) -> list[StaleDocumentError]:
+        """Write the models changed since last read, merging or rejecting the changes made meanwhile by other processes"""
+        errors: list[StaleDocumentError] = []
+        from tinydb.table import Document
+        stored_tables: dict[tuple[str, int | None], dict[int, Document]] = {}
         for value in values:
             dict_document = self._to_type_document(value)
             if dict_document is not None:
                 type_val = type(value)
-                table = self._table(type_val)
+                name: str = self._get_table_name(type_val)  # type: ignore
                 if value.model_id == -1:
-                    self._ensure_refs(type_val)
+                    tid, table = self._write_table(value)
+                    dict_document[VERSION_FIELD] = 1
+                    if tid is None:
+                        value.model_id = table.insert(dict_document)
+                    else:
+                        value.model_id = table.insert(Document(dict_document, doc_id=self._next_id(name)))
+                        self.__routes[(name, value.model_id)] = tid
                     self.register_model(value)
-                    value.model_id = table.insert(dict_document)  # type: ignore
+                    self.cache.put(value)
+                    self._remember(type_val, value.model_id, dict_document)
+                    value.updated = True
+                    continue
+                known = self.__known.get((name, value.model_id))
+                if known is not None and known[1] == dict_document:
+                    continue
+                tid, table = self._write_table(value)
+                if (name, tid) not in stored_tables:
+                    stored_tables[(name, tid)] = {x.doc_id: x for x in table.all()}
+                stored = stored_tables[(name, tid)].get(value.model_id)
+                if known is not None and stored is not None and document_version(stored) != known[0]:
+                    merged = merge_documents(known[1], document_fields(stored), dict_document)
+                    if merged is None:
+                        self._apply_document(value, stored)
+                        self._remember(type_val, value.model_id, stored)
+                        errors.append(StaleDocumentError(value))
+                        continue
+                    self._apply_document(value, merged)
+                    dict_document = merged
+                dict_document[VERSION_FIELD] = document_version(stored) + 1
+                if stored is None:
+                    table.insert(Document(dict_document, doc_id=value.model_id))
                 else:
-                    table.update(dict_document, doc_ids=[value.model_id])  # type: ignore
+                    table.update(replace_fields(dict_document), doc_ids=[value.model_id])
+                if tid is not None:
+                    self.__routes[(name, value.model_id)] = tid
+                self._remember(type_val, value.model_id, dict_document)
                 value.updated = True
+        return errors
+
+    def delete(self, *values: TModel):
+        """Remove the documents of models taken out of the data (e.g. matchs dropped when a round is paired again)"""
+        for value in values:
+            if value.model_id < 0:
+                continue
+            name: str = self._get_table_name(type(value))  # type: ignore
+            for _, table in self._tables(type(value), self.__routes.pop((name, value.model_id), None)):
+                if table.contains(doc_id=value.model_id):
+                    table.remove(doc_ids=[value.model_id])
+            self.__known.pop((name, value.model_id), None)
+            self.cache.discard(value)
+            self._ensure_refs(type(value)).pop(value.model_id, None)
+            value.model_id = -1
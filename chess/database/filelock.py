@@ -0,0 +1,49 @@
+import os
+import pathlib
+import time
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """Advisory lock on a file, shared by every process working on the same database"""
+
+    def __init__(self, path: pathlib.Path, shared=False) -> None:
+        self.path = path
+        self.shared = shared
+        self._file = None
+
+    def acquire(self):
+        self._file = open(self.path, "a+")
+        if os.name == "nt":
+            # msvcrt has no shared lock and gives up after 10 attempts, keep retrying
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+
+    def release(self):
+        if self._file is None:
+            return
+        if os.name == "nt":
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *_):
+        self.release()
@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import gc
+import sys
+import time
+from typing import NamedTuple
+
+from chess.database.dbadapter import SEQUENCES_TABLE, SHARDED_TABLES, DBAdapter
+from chess.models.match import RESULTS, Result, result_of
+
+Tables = dict[str, dict[str, dict]]
+
+
+def sharded_documents(main: Tables, shards: dict[int, Tables], name: str):
+    """Tournament file id and document of every round or match as returned by `DBAdapter.read_files`, the documents
+    still in the main file of a database written before the shards come with a None file id"""
+    for doc_id, document in main.get(name, {}).items():
+        yield None, int(doc_id), document
+    for tid, tables in shards.items():
+        for doc_id, document in tables.get(name, {}).items():
+            yield tid, int(doc_id), document
+
+
+def database_size(db: DBAdapter):
+    """Bytes of the main file and of the tournament files"""
+    size = db.path.stat().st_size if db.path.exists() else 0
+    if db.shards_path.is_dir():
+        size += sum(x.stat().st_size for x in db.shards_path.glob("*" + db.suffix))
+    return size
+
+
+def load_time(db: DBAdapter, repeat=3):
+    """Best time in seconds of a read only load of the whole database"""
+    best = None
+    for _ in range(repeat):
+        reader = DBAdapter(db.path, read_only=True, codec=db.codec)
+        gc.collect()
+        start = time.perf_counter()
+        with reader:
+            reader.load()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best or 0.0
+
+
+class CompactionReport:
+    """Documents dropped by `compact` and what was recovered"""
+
+    def __init__(self) -> None:
+        self.orphans = {name: 0 for name in SHARDED_TABLES}
+        self.renumbered = False
+        self.size_before = 0
+        self.size_after = 0
+        self.load_before = 0.0
+        self.load_after = 0.0
+
+    def __str__(self) -> str:
+        lines = [
+            "rondes orphelines supprimées : %d" % self.orphans["rounds"],
+            "matchs orphelins supprimés   : %d" % self.orphans["matchs"],
+            "identifiants renumérotés     : %s" % ("oui" if self.renumbered else "non"),
+            "taille                       : %.1f Kio -> %.1f Kio (%.1f Kio récupérés)" % (
+                self.size_before / 1024, self.size_after / 1024, (self.size_before - self.size_after) / 1024),
+            "chargement                   : %.3f s -> %.3f s" % (self.load_before, self.load_after),
+        ]
+        return "\n".join(lines)
+
+
+def renumbering(ids):
+    """New id of each document id, 1 to n in the order of the old ids"""
+    return {x: y for y, x in enumerate(sorted(ids), 1)}
+
+
+def rebuilt_files(main: Tables, players: dict[int, dict], tournaments: dict[int, dict],
+                  rounds: dict[int, tuple[int, dict]], matchs: dict[int, tuple[int, dict]], last_ids: dict[str, int]):
+    """Main and tournament files for `DBAdapter.rewrite_files`, each round and match in the file of its tournament.
+    The sequences never go back below `last_ids`: ids are not given twice, even those of documents dropped"""
+    new_main = {x: y for x, y in main.items() if x not in SHARDED_TABLES}
+    new_main["players"] = {str(x): y for x, y in players.items()}
+    new_main["tournaments"] = {str(x): y for x, y in tournaments.items()}
+    new_main[SEQUENCES_TABLE] = {"1": {
+        x: max(max(y, default=0), last_ids.get(x, 0)) for x, y in (("rounds", rounds), ("matchs", matchs))
+    }}
+    new_shards: dict[int, Tables] = {}
+    for name, documents in (("rounds", rounds), ("matchs", matchs)):
+        for doc_id, (tid, document) in sorted(documents.items()):
+            tables = new_shards.setdefault(tid, {x: {} for x in SHARDED_TABLES})
+            tables[name][str(doc_id)] = document
+    return new_main, new_shards
+
+
+def compact(db: DBAdapter, renumber=False):
+    """Rewrite the database without the rounds of a missing tournament and the matchs of a missing round, e.g. left
+    behind by a tournament whose creation was interrupted, and optionally with contiguous document ids.
+
+    Every document is read and indexed once, the application must not be using the database meanwhile when renumbering"""
+    report = CompactionReport()
+    report.size_before = database_size(db)
+    report.load_before = load_time(db)
+    with db:
+        main, shards = db.read_files()
+        tournaments: dict[int, dict] = {int(x): y for x, y in main.get("tournaments", {}).items()}
+        rounds: dict[int, tuple[int, dict]] = {}
+        for _, doc_id, document in sharded_documents(main, shards, "rounds"):
+            if document.get('tid', -1) in tournaments:
+                rounds.setdefault(doc_id, (document['tid'], document))
+            else:
+                report.orphans["rounds"] += 1
+        matchs: dict[int, tuple[int, dict]] = {}
+        for _, doc_id, document in sharded_documents(main, shards, "matchs"):
+            if document.get('round', -1) in rounds:
+                matchs.setdefault(doc_id, (rounds[document['round']][0], document))
+            else:
+                report.orphans["matchs"] += 1
+
+        players: dict[int, dict] = {int(x): y for x, y in main.get("players", {}).items()}
+        if renumber:
+            players, tournaments, rounds, matchs = _renumbered(players, tournaments, rounds, matchs)
+            report.renumbered = True
+
+        last_ids = {} if renumber else main.get(SEQUENCES_TABLE, {}).get("1", {})
+        new_main, new_shards = rebuilt_files(main, players, tournaments, rounds, matchs, last_ids)
+        db.rewrite_files(new_main, new_shards)
+    report.size_after = database_size(db)
+    report.load_after = load_time(db)
+    return report
+
+
+def _renumbered(players: dict[int, dict], tournaments: dict[int, dict], rounds: dict[int, tuple[int, dict]],
+                matchs: dict[int, tuple[int, dict]]):
+    """Documents with contiguous ids and the references between them rewritten, refused when a reference is dangling"""
+    player_ids = renumbering(players)
+    player_ids[-1] = -1
+    tournament_ids = renumbering(tournaments)
+    round_ids = renumbering(rounds)
+
+    def player_id(old_id: int):
+        try:
+            return player_ids[old_id]
+        except KeyError:
+            raise ValueError(f"joueur {old_id} référencé mais absent de la base, renumérotation impossible") from None
+
+    new_tournaments = {}
+    for old_id, document in tournaments.items():
+        document = dict(document)
+        document['seeds'] = [player_id(x) for x in document.get('seeds', [])]
+        document['withdrawn'] = [player_id(x) for x in document.get('withdrawn', [])]
+        new_tournaments[tournament_ids[old_id]] = document
+    new_rounds = {}
+    for old_id, (tid, document) in rounds.items():
+        new_rounds[round_ids[old_id]] = (tournament_ids[tid], dict(document, tid=tournament_ids[tid]))
+    new_matchs = {}
+    for new_id, old_id in enumerate(sorted(matchs), 1):
+        tid, document = matchs[old_id]
+        document = dict(document, round=round_ids[document['round']], player1=player_id(document['player1']),
+                        player2=player_id(document['player2']))
+        new_matchs[new_id] = (tournament_ids[tid], document)
+    return {player_ids[x]: y for x, y in players.items()}, new_tournaments, new_rounds, new_matchs
+
+
+class Problem(NamedTuple):
+    table: str
+    doc_id: int
+    message: str
+    repairable: bool = True
+
+
+class CheckReport:
+    """Problems found by `check` in the documents of the database"""
+
+    def __init__(self) -> None:
+        self.problems: list[Problem] = []
+        self.documents = 0
+        self.elapsed = 0.0
+        self.repaired = False
+
+    def add(self, table: str, doc_id: int, message: str, repairable=True):
+        self.problems.append(Problem(table, doc_id, message, repairable))
+
+    @property
+    def remaining(self):
+        """Problems still in the database: all of them, or the non repairable ones once repaired"""
+        return [x for x in self.problems if not (self.repaired and x.repairable)]
+
+    def lines(self, limit: int | None = 50):
+        shown = self.problems if limit is None else self.problems[:limit]
+        for problem in shown:
+            yield "%s %d : %s%s" % (problem.table, problem.doc_id, problem.message,
+                                    "" if problem.repairable else " (non réparable)")
+        if len(shown) < len(self.problems):
+            yield "... et %d autres" % (len(self.problems) - len(shown))
+        repairable = sum(x.repairable for x in self.problems)
+        yield "%d documents vérifiés en %.2f s, %d problèmes dont %d réparables%s" % (
+            self.documents, self.elapsed, len(self.problems), repairable, ", réparés" if self.repaired else "")
+
+    def __str__(self) -> str:
+        return "\n".join(self.lines())
+
+
+def check(db: DBAdapter, repair=False):
+    """Check the references between the documents, the results, the numbering of the rounds and the pairings, in one
+    pass over the documents with an index of the ids of each table.
+
+    With `repair` the database is rewritten with the problems fixed: documents referencing a missing document are
+    dropped, the invalid fields reset and the rounds numbered again"""
+    report = CheckReport()
+    start = time.perf_counter()
+    checked = db if repair else DBAdapter(db.path, read_only=True, codec=db.codec)
+    with checked:
+        main, shards = checked.read_files()
+        documents = _checked_documents(main, shards, report)
+        if repair and any(x.repairable for x in report.problems):
+            checked.rewrite_files(*rebuilt_files(main, *documents))
+            report.repaired = True
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def _checked_documents(main: Tables, shards: dict[int, Tables], report: CheckReport):
+    """Documents with the problems found fixed, by table and id, followed by the last ids of the sequences"""
+    players: dict[int, dict] = {int(x): y for x, y in main.get("players", {}).items()}
+    report.documents += len(players)
+
+    tournaments: dict[int, dict] = {}
+    for doc_id, document in main.get("tournaments", {}).items():
+        doc_id = int(doc_id)
+        report.documents += 1
+        for field in ('seeds', 'withdrawn'):
+            ids = document.get(field, [])
+            kept = list(dict.fromkeys(x for x in ids if reference(x) in players)) if isinstance(ids, list) else []
+            if not isinstance(ids, list) or len(kept) != len(ids):
+                report.add("tournaments", doc_id, f"{field} : joueurs absents ou en double retirés")
+                document = dict(document, **{field: kept})
+        tournaments[doc_id] = document
+
+    rounds: dict[int, tuple[int, dict]] = {}
+    for shard_id, doc_id, document in sharded_documents(main, shards, "rounds"):
+        report.documents += 1
+        tid = reference(document.get('tid'))
+        if doc_id in rounds:
+            report.add("rounds", doc_id, "identifiant en double, seul le premier document est gardé")
+        elif tid not in tournaments:
+            report.add("rounds", doc_id, f"tournoi {tid} absent, ronde supprimée")
+        else:
+            if shard_id is not None and shard_id != tid:
+                report.add("rounds", doc_id, f"dans le fichier du tournoi {shard_id} au lieu de {tid}, déplacée")
+            rounds[doc_id] = (tid, document)
+    _check_numbering(tournaments, rounds, report)
+
+    matchs: dict[int, tuple[int, dict]] = {}
+    # First round where each pair of players met in each tournament, and players already paired in each round
+    pairings: dict[tuple[int, int, int], int] = {}
+    busy: set[tuple[int, int]] = set()
+    for shard_id, doc_id, document in sharded_documents(main, shards, "matchs"):
+        report.documents += 1
+        if doc_id in matchs:
+            report.add("matchs", doc_id, "identifiant en double, seul le premier document est gardé")
+            continue
+        round_id = reference(document.get('round'))
+        if round_id not in rounds:
+            report.add("matchs", doc_id, f"ronde {round_id} absente, match supprimé")
+            continue
+        tid = rounds[round_id][0]
+        player1, player2 = reference(document.get('player1')), reference(document.get('player2', -1))
+        if player1 not in players or player2 != -1 and player2 not in players:
+            report.add("matchs", doc_id, f"joueur {player1 if player1 not in players else player2!r} absent, match supprimé")
+            continue
+        if player1 == player2:
+            report.add("matchs", doc_id, f"joueur {player1} apparié contre lui-même, match supprimé")
+            continue
+        pair = (tid, min(player1, player2), max(player1, player2))
+        if player2 != -1 and pair in pairings:
+            if pairings[pair] == round_id:
+                report.add("matchs", doc_id, f"appariement en double dans la ronde {round_id}, match supprimé")
+                continue
+            report.add("matchs", doc_id, f"{player1} et {player2} déjà appariés dans la ronde {pairings[pair]}", False)
+        for player in (player1, player2):
+            if player == -1:
+                continue
+            if (round_id, player) in busy:
+                report.add("matchs", doc_id, f"joueur {player} dans deux matchs de la ronde {round_id}", False)
+            busy.add((round_id, player))
+        pairings.setdefault(pair, round_id)
+        if shard_id is not None and shard_id != tid:
+            report.add("matchs", doc_id, f"dans le fichier du tournoi {shard_id} au lieu de {tid}, déplacé")
+        matchs[doc_id] = (tid, _checked_match(doc_id, document, report))
+
+    last_ids = main.get(SEQUENCES_TABLE, {}).get("1", {})
+    for name, documents in (("rounds", rounds), ("matchs", matchs)):
+        # The ids of the tables still in the main file are given by TinyDB, the sequences start with the shards
+        if documents and name not in main and last_ids.get(name, 0) < max(documents):
+            report.add(SEQUENCES_TABLE, 1, f"dernier identifiant de {name} {last_ids.get(name, 0)} inférieur à {max(documents)}")
+    return players, tournaments, rounds, matchs, last_ids
+
+
+def _check_numbering(tournaments: dict[int, dict], rounds: dict[int, tuple[int, dict]], report: CheckReport):
+    """Rounds of each tournament numbered from 1 without gap, in the order of their numbers then of their ids"""
+    by_tournament: dict[int, list[int]] = {}
+    for doc_id, (tid, _) in rounds.items():
+        by_tournament.setdefault(tid, []).append(doc_id)
+    for tid, ids in by_tournament.items():
+        ids.sort(key=lambda x: (_number(rounds[x][1]), x))
+        for expected, doc_id in enumerate(ids, 1):
+            number = rounds[doc_id][1].get('number')
+            if number != expected:
+                report.add("rounds", doc_id, f"numéro {number!r} au lieu de {expected} dans le tournoi {tid}")
+                rounds[doc_id] = (tid, dict(rounds[doc_id][1], number=expected))
+        round_count = tournaments[tid].get('round_count')
+        if isinstance(round_count, int) and len(ids) > round_count:
+            report.add("tournaments", tid, f"{len(ids)} rondes pour {round_count} prévues", False)
+
+
+def reference(value):
+    """Document id stored in a field, None when it is not an integer"""
+    return value if type(value) is int else None
+
+
+def _number(document: dict):
+    number = reference(document.get('number'))
+    return sys.maxsize if number is None else number
+
+
+def _checked_match(doc_id: int, document: dict, report: CheckReport):
+    """Match document with a valid result code and ratings"""
+    bye = document.get('player2', -1) == -1
+    result = document.get('result')
+    if result is None:
+        try:
+            scores = tuple(float(x) for x in document['scores'].split('/'))
+            result = result_of(scores, document.get('forfeit', False), bye)  # type: ignore
+        except (KeyError, AttributeError, TypeError, ValueError):
+            report.add("matchs", doc_id, f"scores {document.get('scores')!r} invalides, remis à non joué")
+            document = {x: y for x, y in document.items() if x not in ("scores", "forfeit")}
+            document['result'] = Result.NOT_PLAYED.value
+            result = Result.NOT_PLAYED
+    elif isinstance(result, bool) or not isinstance(result, int) or not 0 <= result < len(RESULTS):
+        report.add("matchs", doc_id, f"résultat {result!r} invalide, remis à non joué")
+        document = dict(document, result=Result.NOT_PLAYED.value)
+        result = Result.NOT_PLAYED
+    if bye and result not in (Result.NOT_PLAYED, Result.BYE):
+        report.add("matchs", doc_id, f"exempt avec le résultat {RESULTS[result].name}, remis à exempt")
+        document = dict(document, result=Result.BYE.value)
+        document.pop("scores", None)
+        document.pop("forfeit", None)
+    elif not bye and result == Result.BYE:
+        report.add("matchs", doc_id, "résultat exempt avec deux joueurs, remis à non joué")
+        document = dict(document, result=Result.NOT_PLAYED.value)
+    ratings = document.get('ratings')
+    if ratings is not None and not (isinstance(ratings, list) and len(ratings) == 2 and
+                                    all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in ratings)):
+        report.add("matchs", doc_id, f"classements {ratings!r} invalides, retirés")
+        document = dict(document, ratings=None)
+    return document
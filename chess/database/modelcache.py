@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import collections
+from typing import Type, TypeVar
+
+from chess.models.model import Model
+
+TModel = TypeVar('TModel', bound=Model)
+
+
+class ModelCache:
+    """LRU of strong references to the models recently read, keeps them alive in the weak identity map of DBAdapter"""
+
+    def __init__(self, maxsize=256) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        """Models found in the cache"""
+        self.identity_hits = 0
+        """Models found alive in the identity map of DBAdapter after a cache miss"""
+        self.misses = 0
+        """Models found in neither and built again from their document"""
+        self.evictions = 0
+        self._entries: collections.OrderedDict[tuple[type, int], Model] = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, vtype: Type[TModel], model_id: int) -> TModel | None:
+        value = self._entries.get((vtype, model_id))
+        if value is None or value.model_id != model_id:
+            return None
+        self._entries.move_to_end((vtype, model_id))
+        self.hits += 1
+        return value  # type: ignore
+
+    def put(self, value: Model):
+        if self.maxsize <= 0 or value.model_id < 0:
+            return
+        key = (type(value), value.model_id)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, value: Model):
+        self._entries.pop((type(value), value.model_id), None)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.identity_hits = 0
+        self.misses = 0
+        self.evictions = 0
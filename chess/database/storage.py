@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import gzip
+import importlib
+import io
+import json
+import lzma
+import os
+import pathlib
+import time
+import zlib
+
+from tinydb.middlewares import Middleware
+from tinydb.storages import JSONStorage, Storage
+
+
+class JSONCodec:
+    """Standard library JSON codec, its output is the reference format of the database files"""
+
+    name = "json"
+
+    def loads(self, data: bytes):
+        return json.loads(data)
+
+    def dumps(self, data, **options) -> bytes:
+        return json.dumps(data, **options).encode("utf-8")
+
+    def iterencode(self, data, **options):
+        return json.JSONEncoder(**options).iterencode(data)
+
+
+class FastJSONCodec(JSONCodec):
+    """Decodes with orjson or ujson, encodes with the json module: both write another layout (separators, escapes)
+    and the files must stay byte for byte those of the json module"""
+
+    def __init__(self, module: str) -> None:
+        self.name = module
+        self._loads = importlib.import_module(module).loads
+
+    def loads(self, data: bytes):
+        try:
+            return self._loads(data)
+        except ValueError:
+            # NaN, Infinity or integers of more than 64 bits, written by the json module but rejected by orjson
+            return json.loads(data)
+
+
+def default_codec() -> JSONCodec:
+    """Fastest codec installed"""
+    for module in ("orjson", "ujson"):
+        try:
+            return FastJSONCodec(module)
+        except ImportError:
+            continue
+    return JSONCodec()
+
+
+CODEC = default_codec()
+
+COMPRESSIONS = {".gz": "gzip", ".xz": "lzma", ".lzma": "lzma", ".zz": "zlib"}
+"""Compression of a database file, chosen from the last extension of its name"""
+CHUNK_SIZE = 1 << 16
+
+
+def compression_of(path: pathlib.Path | str):
+    return COMPRESSIONS.get(pathlib.Path(path).suffix)
+
+
+def storage_class(path: pathlib.Path | str):
+    return CodecJSONStorage if compression_of(path) is None else CompressedJSONStorage
+
+
+class CodecJSONStorage(JSONStorage):
+    """JSONStorage reading and writing the file as UTF-8 bytes through a JSON codec"""
+
+    def __init__(self, path: pathlib.Path | str, create_dirs=False, encoding=None, access_mode="r+",
+                 codec: JSONCodec | None = None, **kwargs) -> None:
+        super().__init__(str(path), create_dirs, None, "rb+" if "+" in access_mode else "rb", **kwargs)
+        self.codec = CODEC if codec is None else codec
+
+    def read(self):
+        self._handle.seek(0)
+        data = self._handle.read()
+        if not data:
+            return None
+        return self.codec.loads(data)
+
+    def write(self, data):
+        self._handle.seek(0)
+        try:
+            self._handle.write(self.codec.dumps(data, **self.kwargs))
+        except io.UnsupportedOperation:
+            raise IOError('Cannot write to the database. Access mode is "{0}"'.format(self._mode))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.truncate()
+
+
+class ZlibFile:
+    """Binary file compressed with zlib, the counterpart of gzip.open and lzma.open"""
+
+    def __init__(self, path: pathlib.Path | str, mode="rb", level=6) -> None:
+        self._writing = "w" in mode
+        self._file = open(path, "wb" if self._writing else "rb")
+        self._codec = zlib.compressobj(level) if self._writing else zlib.decompressobj()
+
+    def read(self):
+        chunks = []
+        while True:
+            block = self._file.read(CHUNK_SIZE)
+            if not block:
+                break
+            chunks.append(self._codec.decompress(block))  # type: ignore
+        chunks.append(self._codec.flush())
+        return b"".join(chunks)
+
+    def write(self, data: bytes):
+        self._file.write(self._codec.compress(data))  # type: ignore
+        return len(data)
+
+    def close(self):
+        if self._writing:
+            self._file.write(self._codec.flush())
+            self._file.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def open_compressed(path: pathlib.Path | str, mode: str, compression: str):
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "lzma":
+        return lzma.open(path, mode)
+    return ZlibFile(path, mode)
+
+
+class CompressedJSONStorage(Storage):
+    """JSON storage compressed with gzip, lzma or zlib depending on the extension of the file.
+
+    The JSON text is compressed chunk by chunk while encoded, the file is replaced once completely written"""
+
+    def __init__(self, path: pathlib.Path | str, create_dirs=False, encoding=None, access_mode="r+",
+                 codec: JSONCodec | None = None, **kwargs) -> None:
+        super().__init__()
+        self.path = pathlib.Path(path)
+        self.compression: str = compression_of(path)  # type: ignore
+        self.codec = CODEC if codec is None else codec
+        self.kwargs = kwargs
+        if create_dirs:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def read(self):
+        if not self.path.exists() or not self.path.stat().st_size:
+            return None
+        with open_compressed(self.path, "rb", self.compression) as stream:
+            return self.codec.loads(stream.read())
+
+    def write(self, data):
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with open_compressed(temporary, "wb", self.compression) as stream:
+            chunks: list[str] = []
+            size = 0
+            for chunk in self.codec.iterencode(data, **self.kwargs):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= CHUNK_SIZE:
+                    stream.write("".join(chunks).encode("utf-8"))
+                    chunks.clear()
+                    size = 0
+            stream.write("".join(chunks).encode("utf-8"))
+        with open(temporary, "rb") as written:
+            os.fsync(written.fileno())
+        os.replace(temporary, self.path)
+
+    def close(self):
+        pass
+
+
+class BufferedStorage(Middleware):
+    """TinyDB middleware keeping the database in memory once read, the writes are flushed to the file after
+    `flush_writes` writes, on `flush` or on close.
+
+    `flush_interval` is checked on each write, there is no timer: a write made `flush_interval` seconds or more
+    after the last flush is flushed with the pending ones, the last writes of a session wait for its close"""
+
+    def __init__(self, storage_cls, flush_writes=1000, flush_interval: float | None = 5.0) -> None:
+        super().__init__(storage_cls)
+        self.flush_writes = flush_writes
+        self.flush_interval = flush_interval
+        self.cache: dict | None = None
+        self.pending = 0
+        self.reads = 0
+        self.writes = 0
+        """Reads and writes that reached the underlying storage"""
+        self._flushed = time.monotonic()
+
+    def read(self):
+        if self.cache is None:
+            self.reads += 1
+            self.cache = self.storage.read()
+        return self.cache
+
+    def write(self, data):
+        self.cache = data
+        self.pending += 1
+        if self.pending >= self.flush_writes or \
+                (self.flush_interval is not None and time.monotonic() - self._flushed >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self.pending > 0:
+            self.writes += 1
+            self.storage.write(self.cache)
+            self.pending = 0
+        self._flushed = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.storage.close()
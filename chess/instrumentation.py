@@ -0,0 +1,148 @@
+import functools
+import inspect
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, TextIO
+
+
+class CallStats:
+    """Accumulated measures of a single instrumented callable"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.wall = 0.0
+        self.max_wall = 0.0
+        self.alloc = 0
+
+    def add(self, wall: float, alloc: int):
+        self.count += 1
+        self.wall += wall
+        self.max_wall = max(self.max_wall, wall)
+        self.alloc += alloc
+
+
+class Instrumentation:
+    """Opt-in call counters, wall time and allocation deltas of the state handlers, DBAdapter and SwissSystem"""
+
+    def __init__(self, trace_path: str | None = None, summary=True, track_allocations=False) -> None:
+        self.stats: dict[tuple[str, str], CallStats] = {}
+        self.summary = summary
+        self.track_allocations = track_allocations
+        self.trace_file: TextIO | None = None
+        if trace_path is not None:
+            self.trace_file = open(trace_path, "w", encoding="utf-8")
+        self._restore: list[Callable[[], None]] = []
+        self._tracing = False
+        self._started = time.perf_counter()
+
+    def _memory(self):
+        if self.track_allocations:
+            return tracemalloc.get_traced_memory()[0]
+        return 0
+
+    def record(self, category: str, name: str, wall: float, alloc: int):
+        stats = self.stats.get((category, name))
+        if stats is None:
+            stats = CallStats()
+            self.stats[(category, name)] = stats
+        stats.add(wall, alloc)
+        if self.trace_file is not None:
+            self.trace_file.write(json.dumps({
+                "ts": round(time.perf_counter() - self._started, 6),
+                "category": category,
+                "name": name,
+                "wall_ms": round(wall * 1000, 3),
+                "alloc": alloc,
+            }) + "\n")
+
+    def measure(self, category: str, name: str, func: Callable[..., Any]):
+        """Wrap `func` so each call is recorded, generators are measured over their whole iteration"""
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                generator = func(*args, **kwargs)
+                wall = 0.0
+                alloc = 0
+                try:
+                    while True:
+                        start, memory = time.perf_counter(), self._memory()
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            break
+                        finally:
+                            wall += time.perf_counter() - start
+                            alloc += self._memory() - memory
+                        yield item
+                finally:
+                    generator.close()
+                    self.record(category, name, wall, alloc)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start, memory = time.perf_counter(), self._memory()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(category, name, time.perf_counter() - start, self._memory() - memory)
+        return wrapper
+
+    def patch_class(self, cls: type, category: str):
+        for attr, value in list(vars(cls).items()):
+            if inspect.isfunction(value) and not attr.startswith("__"):
+                setattr(cls, attr, self.measure(category, f"{cls.__name__}.{attr}", value))
+                self._restore.append(functools.partial(setattr, cls, attr, value))
+
+    def patch_states(self, mapping: dict[Any, Callable[..., Any]]):
+        for state, handler in list(mapping.items()):
+            mapping[state] = self.measure("state", state.name, handler)
+            self._restore.append(functools.partial(mapping.__setitem__, state, handler))
+
+    def install(self):
+        from chess.algorithm import RoundRobinSystem, SwissSystem
+        from chess.controllers.maincontroller import MAPPED_STATE_METHODS
+        from chess.database.dbadapter import DBAdapter
+
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self.patch_states(MAPPED_STATE_METHODS)
+        self.patch_class(DBAdapter, "db")
+        self.patch_class(SwissSystem, "pairing")
+        self.patch_class(RoundRobinSystem, "pairing")
+
+    def uninstall(self):
+        while self._restore:
+            self._restore.pop()()
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def render_summary(self, stream: TextIO):
+        stream.write("%-8s %-40s %8s %12s %10s %10s %12s\n" % (
+            "category", "name", "calls", "total ms", "mean ms", "max ms", "alloc KiB"))
+        for (category, name), stats in sorted(self.stats.items(), key=lambda x: -x[1].wall):
+            stream.write("%-8s %-40s %8d %12.3f %10.3f %10.3f %12.1f\n" % (
+                category,
+                name,
+                stats.count,
+                stats.wall * 1000,
+                stats.wall * 1000 / stats.count,
+                stats.max_wall * 1000,
+                stats.alloc / 1024,
+            ))
+        from chess.algorithm import PAIRING_CACHE
+        if PAIRING_CACHE.hits or PAIRING_CACHE.misses:
+            stream.write("pairing cache: %d hits, %d misses, %d entries\n" % (
+                PAIRING_CACHE.hits, PAIRING_CACHE.misses, len(PAIRING_CACHE)))
+
+    def close(self):
+        self.uninstall()
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+        if self.summary:
+            self.render_summary(sys.stderr)
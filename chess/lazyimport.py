@@ -0,0 +1,19 @@
+import importlib
+from types import ModuleType
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported on the first attribute access"""
+
+    def __init__(self, name: str) -> None:
+        self.__name = name
+        self.__module: ModuleType | None = None
+
+    @property
+    def loaded(self):
+        return self.__module is not None
+
+    def __getattr__(self, attr: str):
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        return getattr(self.__module, attr)
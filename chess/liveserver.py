@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import asyncio
+import html
+import io
+import json
+import re
+import threading
+import zlib
+from typing import TYPE_CHECKING, Any
+
+from chess.view.exportviews import HtmlExportView
+
+if TYPE_CHECKING:
+    from chess.controllers.maincontroller import MainController
+    from chess.models.match import Match
+    from chess.models.player import Player
+    from chess.models.tournament import Tournament
+
+ROUTE = re.compile(r"^/tournaments/(\d+)/(pairings|standings|crosstable)\.(json|html)$")
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+CONTENT_TYPES = {"json": "application/json; charset=utf-8", "html": "text/html; charset=utf-8"}
+
+
+def _player_name(player: Player | None):
+    if player is None:
+        return "Exempt"
+    return f"{player.first_name} {player.last_name}"
+
+
+def _result(match: Match):
+    if match.player2 is None:
+        return "Exempt"
+    if not match.played:
+        return ""
+    if match.forfeit:
+        return "%s-%s" % tuple("+" if x else "-" for x in match.scores)
+    return "%g-%g" % match.scores
+
+
+class LiveServer:
+    """HTTP server publishing the tournaments in memory from its own thread, responses are cached per controller revision"""
+
+    def __init__(self, controller: MainController, host="127.0.0.1", port=8000) -> None:
+        self.controller = controller
+        self.host = host
+        self.port = port
+        self._cache: dict[str, tuple[int, str, bytes, str]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._error: BaseException | None = None
+
+    def start(self):
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="live-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def stop(self):
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._loop = None
+        self._thread = None
+
+    def _run(self, ready: threading.Event):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port, backlog=1024))
+        except OSError as error:
+            self._error = error
+            ready.set()
+            loop.close()
+            return
+        self._loop = loop
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            loop.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = (await asyncio.wait_for(reader.readline(), 10)).decode("latin-1").split()
+            headers: dict[str, str] = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 10)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request) < 2:
+                self._write(writer, 400)
+            elif request[0] not in ("GET", "HEAD"):
+                self._write(writer, 405)
+            else:
+                try:
+                    response = self.response(request[1].split("?")[0])
+                except Exception:
+                    # The operator may be changing the data being rendered, the next refresh will succeed
+                    self._write(writer, 500)
+                else:
+                    if response is None:
+                        self._write(writer, 404)
+                    elif headers.get("if-none-match") == response[0]:
+                        self._write(writer, 304, etag=response[0])
+                    else:
+                        etag, body, content_type = response
+                        self._write(writer, 200, body, content_type, etag, head=request[0] == "HEAD")
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError, UnicodeError):
+            pass
+        finally:
+            writer.close()
+
+    def _write(self, writer: asyncio.StreamWriter, status: int, body=b"", content_type="text/plain; charset=utf-8",
+               etag: str | None = None, head=False):
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            "Cache-Control: no-cache",
+            "Connection: close",
+        ]
+        if etag is not None:
+            lines.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if status == 200 and not head:
+            writer.write(body)
+
+    def response(self, path: str):
+        """ETag, body and content type of a path, rendered again only when the controller revision changed"""
+        revision = self.controller.revision
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == revision:
+            return cached[1:]
+        rendered = self.render(path)
+        if rendered is None:
+            return None
+        body = rendered[0].encode("utf-8")
+        etag = '"%d-%08x"' % (revision, zlib.crc32(body))
+        self._cache[path] = (revision, etag, body, rendered[1])
+        return etag, body, rendered[1]
+
+    def render(self, path: str) -> tuple[str, str] | None:
+        tournaments = list(self.controller.tournaments)
+        if path in ("/", "/index.html"):
+            return self._render_index(tournaments), CONTENT_TYPES["html"]
+        if path == "/tournaments.json":
+            return json.dumps([self._tournament_summary(x, i) for i, x in enumerate(tournaments)]), CONTENT_TYPES["json"]
+        found = ROUTE.match(path)
+        if found is None or int(found.group(1)) >= len(tournaments):
+            return None
+        tournament = tournaments[int(found.group(1))]
+        if found.group(2) == "pairings":
+            title = f"Appariements - {tournament.name}"
+            columns, rows = self.pairings(tournament)
+        elif found.group(2) == "standings":
+            title = f"Classement - {tournament.name}"
+            columns, rows = self.standings(tournament)
+        else:
+            title = f"Grille americaine - {tournament.name}"
+            columns, rows = self.crosstable(tournament)
+        if found.group(3) == "json":
+            return json.dumps({"title": title, "columns": columns, "rows": rows}), CONTENT_TYPES["json"]
+        stream = io.StringIO()
+        with HtmlExportView(stream, title, columns) as view:
+            for row in rows:
+                view.render_row(*row)
+        return stream.getvalue(), CONTENT_TYPES["html"]
+
+    def _tournament_summary(self, tournament: Tournament, idx: int):
+        return {
+            "id": idx,
+            "name": tournament.name,
+            "where": tournament.where,
+            "round": len(tournament.rounds),
+            "round_count": tournament.round_count,
+            "finished": tournament.finished,
+        }
+
+    def _render_index(self, tournaments: list[Tournament]):
+        lines = ["<!DOCTYPE html>", "<html>", "<head>", "<meta charset=\"utf-8\">", "<title>Tournois</title>", "</head>",
+                 "<body>", "<h1>Tournois</h1>", "<ul>"]
+        for idx, tournament in enumerate(tournaments):
+            links = " ".join(
+                f"<a href=\"/tournaments/{idx}/{page}.html\">{label}</a>"
+                for page, label in (("pairings", "Appariements"), ("standings", "Classement"), ("crosstable", "Grille"))
+            )
+            lines.append(f"<li>{html.escape(tournament.name)} ({len(tournament.rounds)}/{tournament.round_count}) {links}</li>")
+        lines += ["</ul>", "</body>", "</html>", ""]
+        return "\n".join(lines)
+
+    def pairings(self, tournament: Tournament):
+        columns = ["Table", "Blancs", "Noirs", "Resultat"]
+        rows: list[list[Any]] = []
+        if tournament.rounds:
+            for board, match in enumerate(tournament.rounds[-1].matchs, 1):
+                rows.append([board, _player_name(match.player1), _player_name(match.player2), _result(match)])
+        return columns, rows
+
+    def _ordered_scores(self, tournament: Tournament):
+        return sorted(tournament.scores.items(), key=lambda x: (-x[1], x[0].rank, x[0].last_name, x[0].first_name))
+
+    def standings(self, tournament: Tournament):
+        columns = ["Place", "Joueur", "Classement", "Elo", "Points"]
+        rows = [
+            [place, _player_name(player), player.rank, round(player.rating), score]
+            for place, (player, score) in enumerate(self._ordered_scores(tournament), 1)
+        ]
+        return columns, rows
+
+    def crosstable(self, tournament: Tournament):
+        ordered = self._ordered_scores(tournament)
+        places = {player: place for place, (player, _) in enumerate(ordered, 1)}
+        columns = ["Place", "Joueur"] + [f"R{x.number}" for x in tournament.rounds] + ["Points"]
+        cells: dict[Player, list[str]] = {player: [""] * len(tournament.rounds) for player in places}
+        for idx, round_ in enumerate(tournament.rounds):
+            for match in round_.matchs:
+                for player, opponent, score in ((match.player1, match.player2, match.scores[0]),
+                                                (match.player2, match.player1, match.scores[1])):
+                    if player is None or player not in cells:
+                        continue
+                    if opponent is None:
+                        cells[player][idx] = "+E"
+                    elif not match.played:
+                        cells[player][idx] = "%d" % places.get(opponent, 0)
+                    else:
+                        sign = "+" if score == 1.0 else ("=" if score == 0.5 else "-")
+                        cells[player][idx] = "%s%d" % (sign, places.get(opponent, 0))
+        rows = [[place, _player_name(player)] + cells[player] + [score] for place, (player, score) in enumerate(ordered, 1)]
+        return columns, rows
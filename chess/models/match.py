@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from enum import Enum
 from typing import TYPE_CHECKING, Self
 
 from chess.models.model import Model
@@ -9,39 +10,111 @@ if TYPE_CHECKING:
     from chess.models.round import Round
 
 
+class Result(int, Enum):
+    """Outcome of a match, `player1` has the white pieces"""
+    NOT_PLAYED = 0
+    WHITE_WIN = 1
+    DRAW = 2
+    BLACK_WIN = 3
+    WHITE_WIN_FORFEIT = 4
+    BLACK_WIN_FORFEIT = 5
+    BYE = 6
+
+
+RESULTS = tuple(Result)
+"""Results indexed by their code"""
+RESULT_SCORES: tuple[tuple[float, float], ...] = (
+    (0.0, 0.0),
+    (1.0, 0.0),
+    (0.5, 0.5),
+    (0.0, 1.0),
+    (1.0, 0.0),
+    (0.0, 1.0),
+    (1.0, 0.0),
+)
+"""Scores of both players indexed by result code"""
+RATED_RESULTS = frozenset((Result.WHITE_WIN, Result.DRAW, Result.BLACK_WIN))
+
+
+def result_of(scores: tuple[float, float], forfeit=False, bye=False):
+    """Result matching legacy scores, raises ValueError for scores no result has"""
+    if scores == (0.0, 0.0):
+        return Result.NOT_PLAYED
+    if bye:
+        return Result.BYE
+    if scores == (0.5, 0.5):
+        return Result.DRAW
+    if scores == (1.0, 0.0):
+        return Result.WHITE_WIN_FORFEIT if forfeit else Result.WHITE_WIN
+    if scores == (0.0, 1.0):
+        return Result.BLACK_WIN_FORFEIT if forfeit else Result.BLACK_WIN
+    raise ValueError("Scores invalides: %s" % (scores,))
+
+
 class Match(Model):
 
+    @property
+    def scores(self):
+        return RESULT_SCORES[self.result]
+
+    @scores.setter
+    def scores(self, value: tuple[float, float]):
+        self.result = result_of(value, bye=self.player2 is None)
+
+    @property
+    def forfeit(self):
+        """The game was not played, the absent player scored 0"""
+        return self.result in (Result.WHITE_WIN_FORFEIT, Result.BLACK_WIN_FORFEIT)
+
+    @forfeit.setter
+    def forfeit(self, value: bool):
+        if self.result in (Result.WHITE_WIN, Result.WHITE_WIN_FORFEIT):
+            self.result = Result.WHITE_WIN_FORFEIT if value else Result.WHITE_WIN
+        elif self.result in (Result.BLACK_WIN, Result.BLACK_WIN_FORFEIT):
+            self.result = Result.BLACK_WIN_FORFEIT if value else Result.BLACK_WIN
+
+    @property
+    def played(self):
+        """A result was entered (byes and forfeits included)"""
+        return self.result != Result.NOT_PLAYED
+
     def __init__(self, /, *,
                  match_id=-1,
                  mapped_round: Round | None = None,
                  scores: tuple[float, float] = (0.0, 0.0),
                  player1: Player | None = None,
-                 player2: Player | None = None):
+                 player2: Player | None = None,
+                 rating_snapshot: tuple[float, float, float, float] | None = None,
+                 forfeit=False,
+                 result: Result | None = None):
         super().__init__(match_id)
         self.round = mapped_round
-        self.scores = scores
         self.player1 = player1
         self.player2 = player2
+        self.result = result_of(scores, forfeit, player2 is None) if result is None else result
+        self.rating_snapshot = rating_snapshot
 
     def player_score(self, player: Player):
         if player is self.player1:
-            return self.scores[0]
+            return RESULT_SCORES[self.result][0]
         elif player is self.player2:
-            return self.scores[1]
+            return RESULT_SCORES[self.result][1]
         return 0.0
 
     def __copy__(self):
         return Match(
             match_id=self.model_id,
             mapped_round=self.round,
-            scores=self.scores,
             player1=self.player1,
             player2=self.player2,
+            rating_snapshot=self.rating_snapshot,
+            result=self.result,
         )
 
     def update(self, src: Self):
         self.match_id = src.model_id
         self.mapped_round = src.round
-        self.scores = src.scores
         self.player1 = src.player1
         self.player2 = src.player2
+        self.result = src.result
+        self.rating_snapshot = src.rating_snapshot
@@ -6,6 +6,9 @@ from typing import Self
 from chess.models.model import Model
 
 
+DEFAULT_RATING = 1500.0
+
+
 class Player(Model):
 
     def __init__(self,
@@ -14,13 +17,15 @@ class Player(Model):
                  last_name="",
                  birthdate: date | None = None,
                  gender="",
-                 rank=-1) -> None:
+                 rank=-1,
+                 rating=DEFAULT_RATING) -> None:
         super().__init__(model_id)
         self.first_name = first_name
         self.last_name = last_name
         self.birthdate = birthdate
         self.gender = gender
         self.rank = rank
+        self.rating = rating
 
     def __copy__(self):
         return Player(
@@ -30,6 +35,7 @@ class Player(Model):
             birthdate=self.birthdate,
             gender=self.gender,
             rank=self.rank,
+            rating=self.rating,
         )
 
     def update(self, src: Self):
@@ -39,3 +45,4 @@ class Player(Model):
         self.birthdate = src.birthdate
         self.gender = src.gender
         self.rank = src.rank
+        self.rating = src.rating
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Self
 
+from chess.models.match import RESULT_SCORES
 from chess.models.model import Model
 from datetime import datetime
 
@@ -17,10 +18,11 @@ class Round(Model):
     def scores(self):
         players: dict[Player, float] = {}
         for match in self.matchs:
+            white, black = RESULT_SCORES[match.result]
             if match.player1 is not None:
-                players[match.player1] = match.player_score(match.player1)
+                players[match.player1] = white
             if match.player2 is not None:
-                players[match.player2] = match.player_score(match.player2)
+                players[match.player2] = black
         return players
 
     @property
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from itertools import count
+from typing import TYPE_CHECKING, Any, Callable, Generic, Iterable, TypeVar
+
+from chess.models.match import RESULT_SCORES, Result
+
+if TYPE_CHECKING:
+    from chess.models.match import Match
+    from chess.models.player import Player
+    from chess.models.round import Round
+    from chess.models.tournament import Tournament
+
+T = TypeVar('T')
+
+
+def name_key(player: Player):
+    return (player.first_name, player.last_name, player.rank)
+
+
+def rank_key(player: Player):
+    return (player.rank, player.last_name, player.first_name)
+
+
+class SortedIndex(Generic[T]):
+    """List of items kept sorted by `key`, maintained with bisect on insertion and removal"""
+
+    def __init__(self, key: Callable[[T], Any], items: Iterable[T] = ()):
+        self._key = key
+        self._counter = count()
+        self._keys: list[tuple[Any, int]] = []
+        self._items: list[T] = []
+        self._item_keys: dict[T, tuple[Any, int]] = {}
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item: T):
+        return item in self._item_keys
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, idx):
+        return self._items[idx]
+
+    def page(self, start: int = 0, stop: int | None = None):
+        return self._items[start:stop]
+
+    def add(self, item: T):
+        if item in self._item_keys:
+            self.update(item)
+            return
+        self._insert(item, (self._key(item), next(self._counter)))
+
+    def _insert(self, item: T, entry: tuple[Any, int]):
+        idx = bisect_left(self._keys, entry)
+        self._keys.insert(idx, entry)
+        self._items.insert(idx, item)
+        self._item_keys[item] = entry
+
+    def remove(self, item: T):
+        entry = self._item_keys.pop(item, None)
+        if entry is None:
+            return
+        idx = bisect_left(self._keys, entry)
+        del self._keys[idx]
+        del self._items[idx]
+
+    def update(self, item: T):
+        entry = self._item_keys.get(item)
+        if entry is None:
+            self.add(item)
+            return
+        new_key = self._key(item)
+        if new_key == entry[0]:
+            return
+        self.remove(item)
+        self._insert(item, (new_key, entry[1]))
+
+    def clear(self):
+        self._keys.clear()
+        self._items.clear()
+        self._item_keys.clear()
+
+
+class PlayerIndex:
+    """Players sorted by name and by rank"""
+
+    def __init__(self, players: Iterable[Player] = ()):
+        self.by_name: SortedIndex[Player] = SortedIndex(name_key)
+        self.by_rank: SortedIndex[Player] = SortedIndex(rank_key)
+        for player in players:
+            self.add(player)
+
+    def __contains__(self, player: Player):
+        return player in self.by_name
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def add(self, player: Player):
+        self.by_name.add(player)
+        self.by_rank.add(player)
+
+    def remove(self, player: Player):
+        self.by_name.remove(player)
+        self.by_rank.remove(player)
+
+    def update(self, player: Player):
+        if player in self:
+            self.by_name.update(player)
+            self.by_rank.update(player)
+
+
+class Standings(PlayerIndex):
+    """Players of a tournament sorted by name, rank and score, updated match by match"""
+
+    def __init__(self, tournament: Tournament):
+        self.tournament = tournament
+        self.scores: dict[Player, float] = {}
+        self.by_score: SortedIndex[Player] = SortedIndex(self._score_key)
+        super().__init__()
+        for round_ in tournament.rounds:
+            self.add_round(round_)
+
+    def _score_key(self, player: Player):
+        return (self.scores.get(player, 0.0), player.rank, player.last_name, player.first_name)
+
+    def add(self, player: Player):
+        self.scores.setdefault(player, 0.0)
+        super().add(player)
+        self.by_score.add(player)
+
+    def remove(self, player: Player):
+        super().remove(player)
+        self.by_score.remove(player)
+        self.scores.pop(player, None)
+
+    def update(self, player: Player):
+        if player in self:
+            super().update(player)
+            self.by_score.update(player)
+
+    def add_round(self, round_: Round):
+        for match in round_.matchs:
+            self.record_result(match, Result.NOT_PLAYED)
+
+    def record_result(self, match: Match, old_result: Result):
+        old_scores = RESULT_SCORES[old_result]
+        for player, old, new in ((match.player1, old_scores[0], match.scores[0]),
+                                 (match.player2, old_scores[1], match.scores[1])):
+            if player is None:
+                continue
+            if old != new or player not in self:
+                self.add_points(player, new - old)
+
+    def add_points(self, player: Player, points: float):
+        if player not in self:
+            self.add(player)
+        if points:
+            self.scores[player] += points
+            self.by_score.update(player)
@@ -17,6 +17,12 @@ class StyleTournament(int, Enum):
     FAST_STRIKE = 2
 
 
+class PairingSystem(int, Enum):
+    SWISS = 0
+    ROUND_ROBIN = 1
+    DOUBLE_ROUND_ROBIN = 2
+
+
 class Tournament(Model):
 
     @property
@@ -30,6 +36,15 @@ class Tournament(Model):
                     score_player[player] += score
         return score_player
 
+    @property
+    def participants(self):
+        """Scores of the players paired in the next rounds, late entries included and withdrawn players excluded"""
+        scores = dict.fromkeys(self.seeds, 0.0)
+        scores.update(self.scores)
+        for player in self.withdrawn:
+            scores.pop(player, None)
+        return scores
+
     @property
     def finished(self):
         if len(self.rounds) == self.round_count:
@@ -49,7 +64,11 @@ class Tournament(Model):
                  when: date | None = None,
                  style=StyleTournament.BULLET,
                  round_count=4,
-                 rounds: list[Round] = []) -> None:
+                 rounds: list[Round] = [],
+                 accelerated_rounds=0,
+                 seeds: list[Player] = [],
+                 withdrawn: list[Player] = [],
+                 system=PairingSystem.SWISS) -> None:
         super().__init__(model_id)
         self.name = name
         self.where = where
@@ -57,6 +76,11 @@ class Tournament(Model):
         self.style = style
         self.round_count = round_count
         self.rounds: list[Round] = list(rounds)
+        self.accelerated_rounds = accelerated_rounds
+        self.seeds: list[Player] = list(seeds)
+        """Starting order of the players, set when the first round is paired, late entries are appended"""
+        self.withdrawn: list[Player] = list(withdrawn)
+        self.system = system
 
     def __copy__(self):
         return Tournament(
@@ -67,6 +91,10 @@ class Tournament(Model):
             round_count=self.round_count,
             style=self.style,
             rounds=self.rounds,
+            accelerated_rounds=self.accelerated_rounds,
+            seeds=self.seeds,
+            withdrawn=self.withdrawn,
+            system=self.system,
         )
 
     def update(self, src: Self):
@@ -77,3 +105,7 @@ class Tournament(Model):
         self.round_count = src.round_count
         self.style = src.style
         self.rounds = src.rounds
+        self.accelerated_rounds = src.accelerated_rounds
+        self.seeds = src.seeds
+        self.withdrawn = src.withdrawn
+        self.system = src.system
@@ -0,0 +1,99 @@
+import builtins
+import cProfile
+import collections
+import functools
+import pathlib
+import sys
+import threading
+from typing import Any, Callable
+
+
+class Profiler:
+    """Profile an interactive session with cProfile and a sampling thread, time spent in `input` is not sampled"""
+
+    def __init__(self, output="profile", per_state=False, interval=0.005) -> None:
+        self.output = pathlib.Path(output)
+        self.per_state = per_state
+        self.interval = interval
+        self.samples: collections.Counter[str] = collections.Counter()
+        self.state_profiles: dict[str, cProfile.Profile] = {}
+        self._idle = False
+        self._stop = threading.Event()
+
+    def _frame_name(self, frame):
+        code = frame.f_code
+        return f"{code.co_name} ({pathlib.Path(code.co_filename).name}:{code.co_firstlineno})"
+
+    def _sample(self, thread_id: int):
+        while not self._stop.wait(self.interval):
+            if self._idle:
+                continue
+            frame = sys._current_frames().get(thread_id)
+            stack: list[str] = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def _input(self, original: Callable[..., str], *args):
+        self._idle = True
+        try:
+            return original(*args)
+        finally:
+            self._idle = False
+
+    def _profile_state(self, name: str, handler: Callable[..., Any]):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            profile = self.state_profiles.get(name)
+            if profile is None:
+                profile = cProfile.Profile()
+                self.state_profiles[name] = profile
+            profile.enable()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                profile.disable()
+        return wrapper
+
+    def run(self, func: Callable[[], Any]):
+        """Run `func` under the profilers then write the .pstats and .collapsed files"""
+        from chess.controllers.maincontroller import MAPPED_STATE_METHODS
+
+        original_input = builtins.input
+        builtins.input = functools.partial(self._input, original_input)
+        original_states = dict(MAPPED_STATE_METHODS)
+        if self.per_state:
+            for state, handler in original_states.items():
+                MAPPED_STATE_METHODS[state] = self._profile_state(state.name, handler)
+        sampler = threading.Thread(target=self._sample, args=(threading.get_ident(),), daemon=True)
+        sampler.start()
+        profile = None if self.per_state else cProfile.Profile()
+        try:
+            if profile is None:
+                return func()
+            return profile.runcall(func)
+        finally:
+            self._stop.set()
+            sampler.join()
+            builtins.input = original_input
+            MAPPED_STATE_METHODS.update(original_states)
+            self.write(profile)
+
+    def write(self, profile: cProfile.Profile | None):
+        written = []
+        if profile is not None:
+            path = self.output.with_suffix(".pstats")
+            profile.dump_stats(path)
+            written.append(path)
+        for name, state_profile in self.state_profiles.items():
+            path = self.output.with_name(f"{self.output.name}-{name}.pstats")
+            state_profile.dump_stats(path)
+            written.append(path)
+        path = self.output.with_suffix(".collapsed")
+        with open(path, "w", encoding="utf-8") as stream:
+            for stack, count in self.samples.most_common():
+                stream.write(f"{stack} {count}\n")
+        written.append(path)
+        print("Profil ecrit dans:", *written, file=sys.stderr)
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import datetime
+from typing import TYPE_CHECKING, Iterable
+
+from chess.models.match import RATED_RESULTS, RESULT_SCORES, Result
+from chess.models.player import DEFAULT_RATING
+
+if TYPE_CHECKING:
+    from chess.models.match import Match
+    from chess.models.player import Player
+    from chess.models.round import Round
+
+
+def is_rated(match: Match, result: Result | None = None):
+    """A match counts for the ratings once played between two players (byes and forfeits are not rated)
+
+    `result` replaces the result of the match"""
+    result = match.result if result is None else result
+    return match.player1 is not None and match.player2 is not None and result in RATED_RESULTS
+
+
+def _round_order(round_: Round):
+    return (round_.start_time, round_.number, round_.model_id)
+
+
+def chronological(rounds: Iterable[Round]):
+    return sorted(rounds, key=_round_order)
+
+
+def expected_score(rating: float, opponent: float):
+    return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / 400.0))
+
+
+def deltas_of(snapshot: tuple[float, float, float, float], scores: tuple[float, float]):
+    """Rating changes of both players of a match from their ratings and K-factors before it"""
+    rating1, rating2, k_factor1, k_factor2 = snapshot
+    expected = expected_score(rating1, rating2)
+    return k_factor1 * (scores[0] - expected), k_factor2 * (scores[1] - 1.0 + expected)
+
+
+def snapshot_deltas(match: Match, result: Result):
+    """Rating changes the match gave with `result`, from its rating snapshot"""
+    return deltas_of(match.rating_snapshot, RESULT_SCORES[result])  # type: ignore
+
+
+class EloRating:
+    """Elo rating engine using the FIDE K-factor rules, a round is rated in a single batch"""
+
+    convergence = 1e-3
+    """Rating difference under which a corrected timeline is considered back to its previous values"""
+
+    def __init__(self, default_rating=DEFAULT_RATING) -> None:
+        self.default_rating = default_rating
+        self.games: dict[Player, int] = {}
+
+    def count_games(self, rounds: Iterable[Round]):
+        """Count the rated games of each player from the finished rounds, needed by the K-factor rules"""
+        self.games.clear()
+        for round_ in rounds:
+            if not round_.finished:
+                continue
+            for match in round_.matchs:
+                if is_rated(match):
+                    self.games[match.player1] = self.games.get(match.player1, 0) + 1  # type: ignore
+                    self.games[match.player2] = self.games.get(match.player2, 0) + 1  # type: ignore
+
+    def k_factor(self, player: Player, rating: float, games: int, when: datetime.date):
+        if games < 30:
+            return 40.0
+        if player.birthdate is not None and rating < 2300 and when.year - player.birthdate.year < 18:
+            return 40.0
+        if rating >= 2400:
+            return 10.0
+        return 20.0
+
+    def round_deltas(self, round_: Round, ratings: dict[Player, float],
+                     results: dict[Match, Result] | None = None, record=True):
+        """Rating changes of the players of a round, every match uses the ratings from before the round.
+
+        `results` replaces the results of some matchs, `record` stores the rating snapshot of each match."""
+        when = round_.start_time.date()
+        deltas: dict[Player, float] = {}
+        played: dict[Player, int] = {}
+        for match in round_.matchs:
+            result = match.result if results is None else results.get(match, match.result)
+            if not is_rated(match, result):
+                continue
+            match_scores = RESULT_SCORES[result]
+            player1: Player = match.player1  # type: ignore
+            player2: Player = match.player2  # type: ignore
+            rating1 = ratings.get(player1, player1.rating)
+            rating2 = ratings.get(player2, player2.rating)
+            k_factor1 = self.k_factor(player1, rating1, self.games.get(player1, 0) + played.get(player1, 0), when)
+            k_factor2 = self.k_factor(player2, rating2, self.games.get(player2, 0) + played.get(player2, 0), when)
+            snapshot = (rating1, rating2, k_factor1, k_factor2)
+            delta1, delta2 = deltas_of(snapshot, match_scores)
+            deltas[player1] = deltas.get(player1, 0.0) + delta1
+            deltas[player2] = deltas.get(player2, 0.0) + delta2
+            if record and match.rating_snapshot != snapshot:
+                match.rating_snapshot = snapshot
+                match.updated = True
+            played[player1] = played.get(player1, 0) + 1
+            played[player2] = played.get(player2, 0) + 1
+        return deltas, played
+
+    def rate_round(self, round_: Round):
+        """Apply the results of a finished round to the ratings of its players"""
+        deltas, played = self.round_deltas(round_, {})
+        for player, delta in deltas.items():
+            player.rating += delta
+            player.updated = True
+        for player, count in played.items():
+            self.games[player] = self.games.get(player, 0) + count
+        return deltas
+
+    def preview_round(self, round_: Round, results: dict[Match, Result]):
+        """Ratings the players of a round would have with the given results, nothing is modified"""
+        deltas, _ = self.round_deltas(round_, {}, results, record=False)
+        return {player: player.rating + delta for player, delta in deltas.items()}
+
+    def recompute(self, players: Iterable[Player], rounds: Iterable[Round]):
+        """Replay every finished round in chronological order, starting from the default rating every player having
+        played a rated game: their ratings entered by hand are overwritten, the others are left alone"""
+        rounds = list(rounds)
+        self.count_games(rounds)
+        ratings = {x: self.default_rating for x in players if x in self.games}
+        self.games.clear()
+        for round_ in chronological(rounds):
+            if not round_.finished:
+                continue
+            deltas, played = self.round_deltas(round_, ratings)
+            for player, delta in deltas.items():
+                ratings[player] = ratings.get(player, self.default_rating) + delta
+            for player, count in played.items():
+                self.games[player] = self.games.get(player, 0) + count
+        for player, rating in ratings.items():
+            if player.rating != rating:
+                player.rating = rating
+                player.updated = True
+        return ratings
+
+    def correct_match(self, match: Match, old_result: Result, rounds: Iterable[Round]):
+        """Propagate the correction of a match of a finished round to the later rounds of every tournament, returns the
+        players whose rating changed.
+
+        Only the matchs involving a player whose rating drifted from the previous timeline are replayed, their K-factors
+        recomputed from the corrected ratings and game counts. A player leaves the drift once back within `convergence`.
+        A match rated before the snapshots existed, or in a tournament never rated, is left alone"""
+        round_ = match.round
+        if round_ is None or not round_.finished or match.result == old_result:
+            return set()
+        was_rated = is_rated(match, old_result)
+        rated = is_rated(match)
+        if not was_rated and not rated:
+            return set()
+        timeline = [x for x in chronological(rounds) if x.finished]
+        start = next(idx for idx, x in enumerate(timeline) if x is round_)
+        if was_rated and match.rating_snapshot is None:
+            return set()
+        if not was_rated and any(is_rated(x) and x.rating_snapshot is None
+                                 for y in timeline if y.tournament is round_.tournament for x in y.matchs if x is not match):
+            return set()
+        player1: Player = match.player1  # type: ignore
+        player2: Player = match.player2  # type: ignore
+        games: dict[Player, int] = {}
+        for current in timeline[:start]:
+            for other in current.matchs:
+                if is_rated(other):
+                    games[other.player1] = games.get(other.player1, 0) + 1  # type: ignore
+                    games[other.player2] = games.get(other.player2, 0) + 1  # type: ignore
+        # Players of the corrected match whose game count, thus K-factor, changed
+        shift = 0 if was_rated == rated else (1 if rated else -1)
+        shifted = set() if shift == 0 else {player1, player2}
+        before = {} if was_rated else self._rating_before(round_, timeline[start + 1:], player1, player2)
+        # Difference between the corrected and the previous rating of each player still affected
+        drift: dict[Player, float] = {}
+        changed: set[Player] = set()
+        for current in timeline[start:]:
+            if current is not round_ and not drift and not shifted:
+                break
+            when = current.start_time.date()
+            played: dict[Player, int] = {}
+            round_drift: dict[Player, float] = {}
+            for other in current.matchs:
+                if other is match:
+                    previous = snapshot_deltas(other, old_result) if was_rated else (0.0, 0.0)
+                elif not is_rated(other):
+                    continue
+                elif other.rating_snapshot is None or not ({other.player1, other.player2} & (drift.keys() | shifted)):
+                    previous = None
+                else:
+                    previous = snapshot_deltas(other, other.result)
+                other1: Player = other.player1  # type: ignore
+                other2: Player = other.player2  # type: ignore
+                games1 = games.get(other1, 0) + played.get(other1, 0)
+                games2 = games.get(other2, 0) + played.get(other2, 0)
+                if is_rated(other):
+                    played[other1] = played.get(other1, 0) + 1
+                    played[other2] = played.get(other2, 0) + 1
+                if previous is None:
+                    continue
+                snapshot = None
+                corrected = (0.0, 0.0)
+                if is_rated(other):
+                    if other.rating_snapshot is None:
+                        rating1, rating2 = before[other1], before[other2]
+                    else:
+                        rating1, rating2 = other.rating_snapshot[:2]
+                    rating1 += drift.get(other1, 0.0)
+                    rating2 += drift.get(other2, 0.0)
+                    snapshot = (rating1, rating2,
+                                self.k_factor(other1, rating1, games1, when), self.k_factor(other2, rating2, games2, when))
+                    corrected = deltas_of(snapshot, other.scores)
+                round_drift[other1] = round_drift.get(other1, 0.0) + corrected[0] - previous[0]
+                round_drift[other2] = round_drift.get(other2, 0.0) + corrected[1] - previous[1]
+                if other.rating_snapshot != snapshot:
+                    other.rating_snapshot = snapshot
+                    other.updated = True
+            for player, delta in round_drift.items():
+                drift[player] = drift.get(player, 0.0) + delta
+            drift = {x: y for x, y in drift.items() if abs(y) >= self.convergence}
+            changed.update(drift)
+            for player, count in played.items():
+                games[player] = games.get(player, 0) + count
+            # Past 30 games in both timelines the game count no longer changes the K-factor
+            shifted = {x for x in shifted if min(games.get(x, 0), games.get(x, 0) - shift) < 30}
+        for player, delta in drift.items():
+            player.rating += delta
+            player.updated = True
+        if shift:
+            for player in (player1, player2):
+                self.games[player] = max(0, self.games.get(player, 0) + shift)
+        return changed
+
+    def _rating_before(self, round_: Round, later: list[Round], *players: Player):
+        """Ratings of `players` before `round_`, from the snapshot of their next rated game or their current rating,
+        less the changes of their other games of the round"""
+        ratings: dict[Player, float] = {}
+        for player in players:
+            ratings[player] = next((x.rating_snapshot[0 if x.player1 is player else 1] for y in later for x in y.matchs
+                                    if x.rating_snapshot is not None and player in (x.player1, x.player2)), player.rating)
+        for other in round_.matchs:
+            if other.rating_snapshot is None or not is_rated(other):
+                continue
+            for player, delta in zip((other.player1, other.player2), snapshot_deltas(other, other.result)):
+                if player in ratings:
+                    ratings[player] -= delta  # type: ignore
+        return ratings
+
+    def rerank(self, players: Iterable[Player]):
+        """Set `rank` from the ratings (1 is the highest rating), returns the players whose rank changed"""
+        changed: list[Player] = []
+        ordered = sorted(players, key=lambda x: (-x.rating, x.rank))
+        for rank, player in enumerate(ordered, 1):
+            if player.rank != rank:
+                player.rank = rank
+                player.updated = True
+                changed.append(player)
+        return changed
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from chess.models.player import Player
+    from chess.models.tournament import Tournament
+
+
+def seed_key(player: Player):
+    return (-player.rating, player.rank, player.last_name, player.first_name)
+
+
+def seed_players(players: Iterable[Player]):
+    """Starting order of the field, highest rating first"""
+    return sorted(players, key=seed_key)
+
+
+def fold_pairs(seeds: list[Player]):
+    """Top half against bottom half (seed i plays seed i + half), the lowest seed of an odd field gets the bye"""
+    half = len(seeds) // 2
+    pairs: list[tuple[Player, Player | None]] = [(seeds[i], seeds[i + half]) for i in range(half)]
+    if len(seeds) % 2 == 1:
+        pairs.append((seeds[-1], None))
+    return pairs
+
+
+def accelerated_group_size(count: int):
+    """Size of the top group of an accelerated tournament, half of the field rounded up to an even number"""
+    return min(count, (count + 3) // 4 * 2)
+
+
+def first_round_pairs(seeds: list[Player], accelerated_rounds=0):
+    """Pairs of the first round, each group is folded on its own when accelerated"""
+    if accelerated_rounds <= 0:
+        return fold_pairs(seeds)
+    size = accelerated_group_size(len(seeds))
+    return fold_pairs(seeds[:size]) + fold_pairs(seeds[size:])
+
+
+def virtual_points(tournament: Tournament, round_number: int):
+    """Points added to the top group when pairing a round (Baku acceleration), nothing once the accelerated rounds are over.
+
+    The top group gets 1 point for the first half of the accelerated rounds and 0.5 for the second half."""
+    if round_number > tournament.accelerated_rounds or not tournament.seeds:
+        return {}
+    points = 1.0 if round_number <= (tournament.accelerated_rounds + 1) // 2 else 0.5
+    return {x: points for x in tournament.seeds[:accelerated_group_size(len(tournament.seeds))]}
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import itertools
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from chess.models.match import RESULT_SCORES, Result
+
+if TYPE_CHECKING:
+    from chess.algorithm import SwissSystem
+    from chess.models.match import Match
+    from chess.models.player import Player
+    from chess.rating import EloRating
+
+OUTCOMES = (Result.WHITE_WIN, Result.DRAW, Result.BLACK_WIN)
+
+
+class SpeculativePairing:
+    """Pairings of the next round computed in a worker thread while the last results of a round are entered.
+
+    Once at most `max_pending` matchs remain, the pairings of every possible outcome are computed; they are
+    keyed by the predicted standings order, so `take` only returns pairings computed from the real order."""
+
+    max_pending = 2
+
+    def __init__(self, system: SwissSystem, rating: EloRating | None = None) -> None:
+        self.system = system
+        self.rating = rating
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation")
+        self._results: dict[tuple[Player, ...], Future] = {}
+        self._round_count = -1
+
+    def _predicted_order(self, scores: dict[Player, float], outcomes: dict[Match, Result]):
+        if self.rating is None:
+            return self.system.standings_order(scores)
+        # The ranks are derived from the ratings once the round ends, ties on rating keep the previous ranks
+        ratings = self.rating.preview_round(self.system.tournament.rounds[-1], outcomes)
+        return self.system.standings_order(scores, lambda x: (-ratings.get(x, x.rating), x.rank))
+
+    def update(self):
+        """Schedule the pairings for every outcome of the matchs still to be played in the current round"""
+        tournament = self.system.tournament
+        if not tournament.rounds or len(tournament.rounds) >= tournament.round_count:
+            return
+        if len(tournament.rounds) != self._round_count:
+            self.clear()
+            self._round_count = len(tournament.rounds)
+        pending = [x for x in tournament.rounds[-1].matchs if x.player2 is not None and not x.played]
+        if len(pending) > self.max_pending:
+            return
+        base = self.system.tournament.participants
+        for outcome in itertools.product(OUTCOMES, repeat=len(pending)):
+            scores = dict(base)
+            outcomes: dict[Match, Result] = {}
+            for match, result in zip(pending, outcome):
+                for player, points in zip((match.player1, match.player2), RESULT_SCORES[result]):
+                    if player in scores:
+                        scores[player] += points  # type: ignore
+                outcomes[match] = result
+            order = tuple(self._predicted_order(scores, outcomes))
+            if order not in self._results:
+                self._results[order] = self._executor.submit(self.system.pair_players, list(order))
+
+    def take(self):
+        """Pairings computed for the actual standings of the tournament, None when not speculated"""
+        order = tuple(self.system.standings_order(self.system.tournament.participants))
+        future = self._results.pop(order, None)
+        self.clear()
+        if future is None:
+            return None
+        return future.result()
+
+    def clear(self):
+        for future in self._results.values():
+            future.cancel()
+        self._results.clear()
+        self._round_count = -1
+
+    def close(self):
+        self.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
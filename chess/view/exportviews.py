@@ -0,0 +1,111 @@
+import csv
+import datetime
+import html
+from typing import Any, TextIO
+
+from chess.models.tournament import StyleTournament
+
+
+def format_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        if value == datetime.datetime.min:
+            return ""
+        return value.strftime("%d/%m/%Y %H:%M")
+    if isinstance(value, datetime.date):
+        if value == datetime.date(1, 1, 1):
+            return ""
+        return value.strftime("%d/%m/%Y")
+    if isinstance(value, StyleTournament):
+        if value == StyleTournament.BLITZ:
+            return "Blitz"
+        elif value == StyleTournament.FAST_STRIKE:
+            return "Coup rapide"
+        return "Bullet"
+    if isinstance(value, bool):
+        return "Oui" if value else "Non"
+    if isinstance(value, float):
+        return "%.1f" % value
+    return str(value)
+
+
+class ExportView:
+    """Write a single table to a text stream, one row at a time"""
+
+    extension = ""
+
+    def __init__(self, stream: TextIO, title: str, columns: list[str]) -> None:
+        self.stream = stream
+        self.title = title
+        self.columns = columns
+
+    def __enter__(self):
+        self.render_header()
+        return self
+
+    def __exit__(self, *_):
+        self.render_footer()
+
+    def render_header(self):
+        pass
+
+    def render_row(self, *values: Any):
+        raise NotImplementedError()
+
+    def render_footer(self):
+        pass
+
+
+class TextExportView(ExportView):
+    extension = "txt"
+
+    def render_header(self):
+        self.stream.write("+-%s-+\n" % ("-" * len(self.title)))
+        self.stream.write("+ %s +\n" % self.title)
+        self.stream.write("+-%s-+\n" % ("-" * len(self.title)))
+        self.stream.write(" | ".join(self.columns) + "\n")
+
+    def render_row(self, *values: Any):
+        self.stream.write(" | ".join(map(format_value, values)) + "\n")
+
+
+class CsvExportView(ExportView):
+    extension = "csv"
+
+    def __init__(self, stream: TextIO, title: str, columns: list[str]) -> None:
+        super().__init__(stream, title, columns)
+        self.writer = csv.writer(stream)
+
+    def render_header(self):
+        self.writer.writerow(self.columns)
+
+    def render_row(self, *values: Any):
+        self.writer.writerow(list(map(format_value, values)))
+
+
+class HtmlExportView(ExportView):
+    extension = "html"
+
+    def render_header(self):
+        self.stream.write("<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n")
+        self.stream.write("<title>%s</title>\n</head>\n<body>\n" % html.escape(self.title))
+        self.stream.write("<h1>%s</h1>\n<table>\n<tr>" % html.escape(self.title))
+        self.stream.write("".join("<th>%s</th>" % html.escape(x) for x in self.columns))
+        self.stream.write("</tr>\n")
+
+    def render_row(self, *values: Any):
+        self.stream.write("<tr>")
+        self.stream.write("".join("<td>%s</td>" % html.escape(format_value(x)) for x in values))
+        self.stream.write("</tr>\n")
+
+    def render_footer(self):
+        self.stream.write("</table>\n</body>\n</html>\n")
+
+
+EXPORT_VIEWS: dict[str, type[ExportView]] = {
+    "text": TextExportView,
+    "csv": CsvExportView,
+    "html": HtmlExportView,
+}
+"""Map the available export formats to their view"""
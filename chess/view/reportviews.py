@@ -1,4 +1,5 @@
 import datetime
+from chess.models.match import RESULT_SCORES, Result
 from chess.models.tournament import StyleTournament
 from chess.view.view import View
 
@@ -15,7 +16,8 @@ class PlayerReportView(View):
                  first_name="",
                  birthdate: datetime.date | None = None,
                  gender="",
-                 rank=-1) -> None:
+                 rank=-1,
+                 rating: float | None = None) -> None:
         super().__init__()
         self.index = index
         self.last_name = last_name
@@ -23,10 +25,13 @@ class PlayerReportView(View):
         self.birthdate = birthdate or datetime.date.today()
         self.gender = gender
         self.rank = rank
+        self.rating = rating
 
     def render(self):
         if self.index is not None:
             print("%d) " % self.index, end='')
+        if self.rating is not None:
+            print("Elo(%d)" % round(self.rating), end=' ')
         print("Classement(%d)" % self.rank, self.first_name, self.last_name, "%d ans" % self.age, self.gender)
 
 
@@ -104,10 +109,10 @@ class RoundReportView(View):
 class MatchReportView(View):
     def __init__(self, /,
                  index: int | None = None,
-                 scores: tuple[float, float] = (0.0, 0.0)) -> None:
+                 result: Result = Result.NOT_PLAYED) -> None:
         super().__init__()
         self.index = index
-        self.scores = scores
+        self.result = result
 
     def render(self):
         if self.index is not None:
@@ -115,8 +120,8 @@ class MatchReportView(View):
             print("Match %d:" % (self.index), end=' ')
         else:
             print("Match:", end=' ')
-        print("(%.1f, %.1f), " % self.scores, end='')
-        if self.scores == (0.0, 0.0):
+        print("(%.1f, %.1f), " % RESULT_SCORES[self.result], end='')
+        if self.result == Result.NOT_PLAYED:
             print("[En cours]", end='')
         else:
             print("[Terminé]", end='')
@@ -189,23 +194,24 @@ class MatchLongReportView(View):
     def __init__(self, /,
                  player1: str,
                  player2: str,
-                 scores: tuple[float, float] = (0.0, 0.0),
+                 result: Result = Result.NOT_PLAYED,
                  ) -> None:
         super().__init__()
-        self.scores = scores
+        self.result = result
         self.player1 = player1
         self.player2 = player2
 
     def render(self):
         print("Match:")
-        print("\tScores", *self.scores)
+        scores = RESULT_SCORES[self.result]
+        print("\tScores", *scores)
         print("\tJoueur 1:", self.player1)
         print("\tJoueur 2:", self.player2)
-        if self.scores != (0.0, 0.0):
+        if self.result != Result.NOT_PLAYED:
             print("\tVainqueur:", end='')
-            if self.scores[0] > self.scores[1]:
+            if scores[0] > scores[1]:
                 print(self.player1)
-            elif self.scores[0] < self.scores[1]:
+            elif scores[0] < scores[1]:
                 print(self.player2)
             else:
                 print("Egalité")
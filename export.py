@@ -0,0 +1,18 @@
+import argparse
+
+from chess.controllers.exportcontroller import ExportController
+from chess.database.dbadapter import DBAdapter
+from chess.view.exportviews import EXPORT_VIEWS
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generation des raports sous forme de fichiers")
+    parser.add_argument("tournaments", nargs="*", type=int, help="identifiants des tournois (tous par defaut)")
+    parser.add_argument("-f", "--format", choices=list(EXPORT_VIEWS), default="text", help="format des fichiers")
+    parser.add_argument("-o", "--output", default="reports", help="dossier de destination")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="nombre de processus (1 pour desactiver)")
+    parser.add_argument("--db", default="db.json", help="fichier de la base de donnees")
+    args = parser.parse_args()
+    ctrl = ExportController(DBAdapter(args.db), args.output, args.format, args.jobs)
+    for path in ctrl.run(*args.tournaments):
+        print(path)
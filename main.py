@@ -1,9 +1,72 @@
+import argparse
+
 from chess.controllers.maincontroller import MainController
 
 from chess.database.dbadapter import DBAdapter
 
 
 if __name__ == "__main__":
-    db = DBAdapter()
-    ctrl = MainController(db)
-    ctrl.run()
+    parser = argparse.ArgumentParser(description="Application de gestion de tournois d'échecs")
+    parser.add_argument("--stats", action="store_true", help="affiche les compteurs et temps d'execution en quittant")
+    parser.add_argument("--trace", metavar="FICHIER", help="ecrit chaque appel mesuré dans un fichier JSON lines")
+    parser.add_argument("--trace-memory", action="store_true", help="mesure aussi les allocations (plus lent)")
+    parser.add_argument("--profile", nargs="?", const="profile", metavar="PREFIXE",
+                        help="profile la session (PREFIXE.pstats et PREFIXE.collapsed pour un flamegraph)")
+    parser.add_argument("--profile-states", action="store_true", help="profile chaque etat dans un fichier .pstats séparé")
+    parser.add_argument("--serve", nargs="?", const="127.0.0.1:8000", metavar="ADRESSE:PORT",
+                        help="publie appariements et classements en HTTP (0.0.0.0:8000 pour le reseau local)")
+    parser.add_argument("--db", default="db.json",
+                        help="fichier de la base, compressé selon son extension (.json.gz, .json.xz ou .json.zz)")
+    parser.add_argument("--copy", metavar="FICHIER", help="copie la base dans FICHIER, compressé selon son extension, puis quitte")
+    parser.add_argument("--compact", action="store_true",
+                        help="supprime les rondes et matchs orphelins et réécrit la base, puis quitte")
+    parser.add_argument("--renumber", action="store_true", help="avec --compact, renumérote les documents à partir de 1")
+    parser.add_argument("--check", action="store_true",
+                        help="vérifie les références, résultats, numéros de ronde et appariements de la base, puis quitte")
+    parser.add_argument("--repair", action="store_true", help="avec --check, corrige les problèmes réparables")
+    args = parser.parse_args()
+    if args.renumber and not args.compact:
+        parser.error("--renumber s'utilise avec --compact")
+    if args.repair and not args.check:
+        parser.error("--repair s'utilise avec --check")
+
+    instrumentation = None
+    if args.stats or args.trace is not None or args.trace_memory:
+        from chess.instrumentation import Instrumentation
+        instrumentation = Instrumentation(args.trace, args.stats or args.trace is None, args.trace_memory)
+        instrumentation.install()
+
+    server = None
+    try:
+        db = DBAdapter(args.db)
+        if args.copy is not None:
+            db.copy(args.copy)
+            raise SystemExit(0)
+        if args.compact:
+            from chess.database.maintenance import compact
+            try:
+                print(compact(db, args.renumber))
+            except ValueError as error:
+                raise SystemExit(str(error))
+            raise SystemExit(0)
+        if args.check:
+            from chess.database.maintenance import check
+            report = check(db, args.repair)
+            print(report)
+            raise SystemExit(1 if report.remaining else 0)
+        ctrl = MainController(db)
+        if args.serve is not None:
+            from chess.liveserver import LiveServer
+            host, _, port = args.serve.rpartition(":")
+            server = LiveServer(ctrl, host or "127.0.0.1", int(port))
+            server.start()
+        if args.profile is not None or args.profile_states:
+            from chess.profiling import Profiler
+            Profiler(args.profile or "profile", args.profile_states).run(ctrl.run)
+        else:
+            ctrl.run()
+    finally:
+        if server is not None:
+            server.stop()
+        if instrumentation is not None:
+            instrumentation.close()
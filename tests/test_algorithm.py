@@ -0,0 +1,155 @@
+import unittest
+from datetime import datetime
+
+from chess.algorithm import RoundRobinSystem, SwissSystem
+from chess.models.match import Match, Result
+from chess.models.player import Player
+from chess.models.round import Round
+from chess.models.tournament import PairingSystem, Tournament
+
+
+class SwissRepairTest(unittest.TestCase):
+    """A withdrawal or a late entry only pairs again the score bracket of the player"""
+
+    def setUp(self):
+        self.players = [Player(model_id=x + 1, first_name=f"P{x}", rank=10 - x) for x in range(10)]
+        p = self.players
+        self.tournament = Tournament(seeds=list(reversed(p)), round_count=4)
+        self.system = SwissSystem(self.tournament, cache=None)
+        # P5 to P9 won the first round
+        self.round((p[9], p[0], Result.WHITE_WIN), (p[8], p[1], Result.WHITE_WIN), (p[7], p[2], Result.WHITE_WIN),
+                   (p[6], p[3], Result.WHITE_WIN), (p[5], p[4], Result.WHITE_WIN), end_time=datetime(2023, 1, 1, 11))
+        self.current = self.round((p[9], p[8], Result.NOT_PLAYED), (p[7], p[6], Result.NOT_PLAYED),
+                                  (p[5], p[3], Result.NOT_PLAYED), (p[4], p[2], Result.NOT_PLAYED),
+                                  (p[1], p[0], Result.NOT_PLAYED))
+
+    def round(self, *pairs, end_time=None):
+        round_ = Round(number=len(self.tournament.rounds) + 1, tournament=self.tournament,
+                       start_time=datetime(2023, 1, 1, 9 + 3 * len(self.tournament.rounds)), end_time=end_time)
+        for player1, player2, result in pairs:
+            round_.matchs.append(Match(mapped_round=round_, player1=player1, player2=player2, result=result))
+        self.tournament.rounds.append(round_)
+        return round_
+
+    def assertComplete(self, field):
+        seen = [y for x in self.current.matchs for y in (x.player1, x.player2) if y is not None]
+        self.assertCountEqual(seen, field)
+        history = {frozenset((x.player1, x.player2)) for y in self.tournament.rounds[:-1] for x in y.matchs}
+        self.assertFalse([x for x in self.current.matchs if frozenset((x.player1, x.player2)) in history])
+
+    def test_withdraw_top_bracket(self):
+        p = self.players
+        untouched = self.current.matchs[3:]
+        paired, dropped = self.system.withdraw(p[9])
+        self.assertEqual([(x.player1, x.player2) for x in untouched], [(p[4], p[2]), (p[1], p[0])])
+        for match in untouched:
+            self.assertIn(match, self.current.matchs)
+            self.assertNotIn(match, paired + dropped)
+        self.assertEqual(len(paired), 3)
+        self.assertEqual(sum(x.player2 is None for x in paired), 1)
+        self.assertComplete(p[:9])
+
+    def test_withdraw_absorbs_the_bye(self):
+        p = self.players
+        paired, _ = self.system.withdraw(p[0])
+        bye = next(x.player1 for x in paired if x.player2 is None)
+        untouched = [x for x in self.current.matchs[3:] if x.player2 is not None]
+        paired, dropped = self.system.withdraw(p[9])
+        self.assertEqual(sum(x.player2 is None for x in self.current.matchs), 0)
+        for match in untouched:
+            self.assertIn(match, self.current.matchs)
+            self.assertNotIn(match, paired + dropped)
+        self.assertIn(bye, [y for x in paired for y in (x.player1, x.player2)])
+        self.assertEqual(len(paired), 3)
+        self.assertComplete(p[1:9])
+
+    def test_late_entry(self):
+        p = self.players
+        late = Player(model_id=11, first_name="P10", rank=11)
+        top = self.current.matchs[:3]
+        self.system.enter(late)
+        for match in top:
+            self.assertIn(match, self.current.matchs)
+        self.assertEqual(sum(x.player2 is None for x in self.current.matchs), 1)
+        self.assertComplete(p + [late])
+
+    def test_next_bracket_when_the_pool_already_met(self):
+        a, b, c, d, e = self.players[:5]
+        tournament = Tournament(seeds=[a, b, c, d, e], round_count=4)
+        self.tournament, self.system = tournament, SwissSystem(tournament, cache=None)
+        self.round((a, c, Result.WHITE_WIN), (b, d, Result.WHITE_WIN), (e, None, Result.BYE), end_time=datetime(2023, 1, 1, 11))
+        self.round((a, b, Result.WHITE_WIN), (e, d, Result.WHITE_WIN), (c, None, Result.BYE), end_time=datetime(2023, 1, 1, 14))
+        self.current = self.round((a, e, Result.NOT_PLAYED), (c, d, Result.NOT_PLAYED), (b, None, Result.BYE))
+        # A and B, the bye, already met: C and D are paired again with them
+        paired, _ = self.system.withdraw(e)
+        self.assertEqual(len(paired), 2)
+        self.assertComplete([a, b, c, d])
+        self.assertNotIn(frozenset((a, b)), [frozenset((x.player1, x.player2)) for x in paired])
+
+    def test_system_built_before_the_rounds(self):
+        tournament = Tournament(seeds=list(self.players), round_count=4)
+        system = SwissSystem(tournament, cache=None)
+        tournament.rounds = self.tournament.rounds
+        system.withdraw(self.players[9])
+        self.assertEqual(len(self.current.matchs), 5)
+
+
+class BergerTablesTest(unittest.TestCase):
+    """Every pair meets once per cycle, with alternating colours and the second cycle reversed"""
+
+    def schedule(self, size: int, system: PairingSystem):
+        tournament = Tournament(system=system)
+        round_robin = RoundRobinSystem(tournament)
+        round_robin.first_round([Player(model_id=x + 1, rank=x + 1) for x in range(size)])
+        rounds = [round_robin.pairs(x) for x in range(1, tournament.round_count + 1)]
+        return tournament.seeds, rounds
+
+    def check_cycle(self, seeds, rounds):
+        met = [frozenset(x) for pairs in rounds for x in pairs if x[1] is not None]
+        self.assertEqual(len(met), len(set(met)))
+        self.assertEqual(len(met), len(seeds) * (len(seeds) - 1) // 2)
+        for pairs in rounds:
+            players = [y for x in pairs for y in x if y is not None]
+            self.assertCountEqual(players, seeds)
+            self.assertLessEqual(sum(x[1] is None for x in pairs), 1)
+
+    def colours(self, seeds, rounds):
+        colours = {x: "" for x in seeds}
+        for pairs in rounds:
+            for white, black in pairs:
+                if black is not None:
+                    colours[white] += "W"
+                    colours[black] += "B"
+        return colours
+
+    def check_colours(self, seeds, rounds, cycle):
+        for player, colours in self.colours(seeds, rounds).items():
+            self.assertNotIn("WWW", colours)
+            self.assertNotIn("BBB", colours)
+            for start in range(0, len(colours), cycle):
+                part = colours[start:start + cycle]
+                self.assertLessEqual(abs(part.count("W") - part.count("B")), 1)
+
+    def test_single(self):
+        for size in range(2, 21):
+            with self.subTest(size=size):
+                seeds, rounds = self.schedule(size, PairingSystem.ROUND_ROBIN)
+                self.assertEqual(len(rounds), size - 1 + size % 2)
+                self.check_cycle(seeds, rounds)
+                self.check_colours(seeds, rounds, len(rounds))
+
+    def test_double(self):
+        for size in range(2, 21):
+            with self.subTest(size=size):
+                seeds, rounds = self.schedule(size, PairingSystem.DOUBLE_ROUND_ROBIN)
+                cycle = len(rounds) // 2
+                self.assertEqual(cycle, size - 1 + size % 2)
+                self.check_cycle(seeds, rounds[:cycle])
+                self.check_cycle(seeds, rounds[cycle:])
+                whites = {x for pairs in rounds for x in pairs if x[1] is not None}
+                self.assertEqual(whites, {(y, x) for x, y in whites})
+                self.check_colours(seeds, rounds, cycle)
+
+
+if __name__ == "__main__":
+    unittest.main()
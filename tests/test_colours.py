@@ -0,0 +1,107 @@
+import unittest
+
+from chess.colours import ABSOLUTE, BLACK, MILD, STRONG, WHITE, ColourHistory, alternate_boards
+from chess.models.match import Match
+from chess.models.player import Player
+from chess.models.round import Round
+
+
+class ColourHistoryTest(unittest.TestCase):
+    """No colour three times in a row and a white/black balance within 2"""
+
+    def setUp(self):
+        self.history = ColourHistory()
+        self.a, self.b, self.c, self.d = (Player(model_id=x + 1) for x in range(4))
+
+    def test_new_player(self):
+        self.assertEqual(self.history.preference(self.a), (None, MILD))
+        self.assertIsNone(self.history.last(self.a))
+        self.assertEqual(self.history.allocate(self.a, self.b), (self.a, self.b))
+
+    def test_alternation(self):
+        self.history.push(self.a, self.b)
+        self.assertEqual(self.history.last(self.a), WHITE)
+        self.assertEqual(self.history.preference(self.a), (BLACK, STRONG))
+        self.assertEqual(self.history.preference(self.b), (WHITE, STRONG))
+        self.history.push(self.b, self.a)
+        self.assertEqual(self.history.balance(self.a), 0)
+        self.assertEqual(self.history.preference(self.a), (WHITE, MILD))
+        self.assertEqual(self.history.preference(self.b), (BLACK, MILD))
+
+    def test_same_colour_twice(self):
+        self.history.push(self.b, self.a)
+        self.history.push(self.c, self.b)
+        self.history.push(self.a, self.c)
+        self.history.push(self.a, self.d)
+        self.assertEqual(self.history.balance(self.a), 1)
+        self.assertEqual(self.history.preference(self.a), (BLACK, ABSOLUTE))
+        self.assertEqual(self.history.preference(self.c), (WHITE, MILD))
+
+    def test_balance(self):
+        self.history.push(self.a, self.b)
+        self.history.push(self.c, self.a)
+        self.history.push(self.a, self.d)
+        self.history.push(self.a, self.b)
+        self.history.push(self.d, self.a)
+        self.history.push(self.a, self.c)
+        self.assertEqual(self.history.balance(self.a), 2)
+        self.assertEqual(self.history.preference(self.a), (BLACK, ABSOLUTE))
+        self.assertEqual(self.history.balance(self.b), -2)
+        self.assertEqual(self.history.preference(self.b), (WHITE, ABSOLUTE))
+
+    def test_compatible(self):
+        for _ in range(2):
+            self.history.push(self.a, self.c)
+            self.history.push(self.b, self.d)
+        self.assertFalse(self.history.compatible(self.a, self.b))
+        self.assertTrue(self.history.compatible(self.a, self.c))
+        self.history.push(self.c, self.d)
+        self.assertTrue(self.history.compatible(self.c, self.d))
+
+    def test_allocate(self):
+        self.history.push(self.a, self.b)
+        self.assertEqual(self.history.allocate(self.a, self.b), (self.b, self.a))
+        self.assertEqual(self.history.allocate(self.c, self.a), (self.c, self.a))
+        self.history.push(self.c, self.d)
+        self.history.push(self.a, self.d)
+        # Both prefer black, the absolute preference of `a` wins over the strong one of `c`
+        self.assertEqual(self.history.allocate(self.c, self.a), (self.c, self.a))
+        self.assertEqual(self.history.allocate(self.b, self.d), (self.d, self.b))
+        # Equal strength: the player paired first gets the colour
+        e, f = Player(model_id=5), Player(model_id=6)
+        self.history.push(e, f)
+        self.assertEqual(self.history.allocate(self.c, e), (e, self.c))
+        self.assertEqual(self.history.allocate(e, self.c), (self.c, e))
+
+    def test_pop(self):
+        self.history.push(self.a, self.b)
+        self.history.push(self.b, self.a)
+        self.history.pop(self.b, self.a)
+        self.assertEqual(self.history.last(self.a), WHITE)
+        self.assertEqual(self.history.balance(self.b), -1)
+        self.history.pop(self.a, self.b)
+        self.assertEqual(self.history.preference(self.a), (None, MILD))
+        self.assertEqual(self.history.balance(self.a), 0)
+
+    def test_pop_unknown_player(self):
+        self.history.push(self.a, self.b)
+        self.history.pop(self.c, self.b)
+        self.assertEqual(self.history.preference(self.b), (None, MILD))
+        self.assertEqual(self.history.last(self.a), WHITE)
+
+    def test_from_rounds(self):
+        rounds = [Round(number=x) for x in (2, 1)]
+        rounds[0].matchs.append(Match(player1=self.a, player2=self.b))
+        rounds[1].matchs += [Match(player1=self.b, player2=self.a), Match(player1=self.c)]
+        history = ColourHistory.from_rounds(rounds)
+        self.assertEqual(history.last(self.a), WHITE)
+        self.assertEqual(history.balance(self.a), 0)
+        self.assertIsNone(history.last(self.c))
+
+    def test_alternate_boards(self):
+        pairs = [(self.a, self.c), (self.b, self.d), (self.a, None), (self.c, None)]
+        self.assertEqual(alternate_boards(pairs), [(self.a, self.c), (self.d, self.b), (self.a, None), (self.c, None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,229 @@
+import json
+import pathlib
+import tempfile
+import unittest
+from datetime import datetime
+
+from chess.database.dbadapter import SEQUENCES_TABLE, DBAdapter, StaleDocumentError, merge_documents
+from chess.models.match import Match, Result
+from chess.models.player import Player
+from chess.models.round import Round
+from chess.models.tournament import Tournament
+
+
+def write_single_file(path: pathlib.Path):
+    """Database written before the tournament files: the rounds and matchs are still in the main file, with gaps in
+    their ids"""
+    players = {str(x): {"first_name": f"P{x}", "last_name": "", "birthdate": "", "gender": "", "rank": x, "rating": 1500}
+               for x in range(1, 5)}
+    tournaments = {str(x): {"name": f"T{x}", "where": "", "when": "2020-01-01", "style": "", "round_count": 2,
+                            "seeds": seeds, "withdrawn": []} for x, seeds in ((1, [1, 2]), (2, [3, 4]))}
+    rounds = {str(x): {"name": f"Round {x}", "number": number, "tid": tid, "start_time": "2020-01-01T10:00:00",
+                       "end_time": "2020-01-01T12:00:00"} for x, number, tid in ((1, 1, 1), (2, 1, 2), (5, 2, 1))}
+    matchs = {str(x): {"round": round_, "player1": p1, "player2": p2, "result": 1, "ratings": None}
+              for x, round_, p1, p2 in ((1, 1, 1, 2), (2, 2, 3, 4), (7, 5, 2, 1))}
+    with open(path, "w", encoding="utf-8") as stream:
+        json.dump({"players": players, "tournaments": tournaments, "rounds": rounds, "matchs": matchs}, stream)
+
+
+class MergeDocumentsTest(unittest.TestCase):
+    """Three way merge of the changes of two processes since the document was read"""
+
+    base = {"first_name": "Jean", "last_name": "Martin", "rank": 1}
+
+    def test_disjoint_fields(self):
+        merged = merge_documents(self.base, dict(self.base, rank=2), dict(self.base, first_name="Paul"))
+        self.assertEqual(merged, {"first_name": "Paul", "last_name": "Martin", "rank": 2})
+
+    def test_same_change(self):
+        merged = merge_documents(self.base, dict(self.base, rank=2), dict(self.base, rank=2))
+        self.assertEqual(merged, dict(self.base, rank=2))
+
+    def test_same_field(self):
+        self.assertIsNone(merge_documents(self.base, dict(self.base, rank=2), dict(self.base, rank=3)))
+
+    def test_field_deleted_by_them(self):
+        theirs = {"first_name": "Jean", "last_name": "Martin"}
+        self.assertEqual(merge_documents(self.base, theirs, dict(self.base, first_name="Paul")),
+                         {"first_name": "Paul", "last_name": "Martin"})
+        self.assertIsNone(merge_documents(self.base, theirs, dict(self.base, rank=3)))
+
+
+class ConcurrentSaveTest(unittest.TestCase):
+    """Two adapters on the same file: the second save merges the other changes or is rejected"""
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.path = self.workdir.name + "/db.json"
+        with DBAdapter(self.path) as db:
+            db.save(Player(first_name="Jean", last_name="Martin", rank=1))
+        self.ours = self.loaded()
+        self.theirs = self.loaded()
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def loaded(self):
+        db = DBAdapter(self.path)
+        with db:
+            players, *_ = db.load()
+        return db, players[0]
+
+    def save(self, side):
+        db, player = side
+        with db:
+            return db.save(player)
+
+    def stored(self):
+        with DBAdapter(self.path, read_only=True) as db:
+            return db.fromID(Player, 1)
+
+    def test_disjoint_changes_merged(self):
+        self.theirs[1].rank = 2
+        self.assertEqual(self.save(self.theirs), [])
+        self.ours[1].first_name = "Paul"
+        self.assertEqual(self.save(self.ours), [])
+        self.assertEqual(self.ours[1].rank, 2)
+        stored = self.stored()
+        self.assertEqual((stored.first_name, stored.rank), ("Paul", 2))
+
+    def test_same_field_rejected(self):
+        self.theirs[1].first_name = "Paul"
+        self.save(self.theirs)
+        self.ours[1].first_name = "Pierre"
+        errors = self.save(self.ours)
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], StaleDocumentError)
+        self.assertIs(errors[0].value, self.ours[1])
+        self.assertEqual(self.ours[1].first_name, "Paul")
+        self.assertEqual(self.stored().first_name, "Paul")
+        self.ours[1].first_name = "Pierre"
+        self.assertEqual(self.save(self.ours), [])
+        self.assertEqual(self.stored().first_name, "Pierre")
+
+    def test_deleted_document(self):
+        db, player = self.theirs
+        with db:
+            db.delete(player)
+        self.assertEqual(self.save(self.ours), [])
+        self.assertIsNone(self.stored())
+        self.ours[1].first_name = "Paul"
+        self.assertEqual(self.save(self.ours), [])
+        self.assertEqual(self.stored().first_name, "Paul")
+
+
+class ModelCacheCountersTest(unittest.TestCase):
+    """A model found in the identity map after a cache miss is not counted as a miss"""
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.path = self.workdir.name + "/db.json"
+        with DBAdapter(self.path) as db:
+            db.save(*(Player(first_name=f"P{x}") for x in range(3)))
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_counters(self):
+        db = DBAdapter(self.path, cache_size=1)
+        with db:
+            players = [db.fromID(Player, x) for x in (1, 2, 3)]
+            self.assertEqual((db.cache.hits, db.cache.identity_hits, db.cache.misses), (0, 0, 3))
+            self.assertIs(db.fromID(Player, 3), players[2])
+            self.assertEqual((db.cache.hits, db.cache.identity_hits, db.cache.misses), (1, 0, 3))
+            self.assertIs(db.fromID(Player, 1), players[0])
+            self.assertEqual((db.cache.hits, db.cache.identity_hits, db.cache.misses), (1, 1, 3))
+
+
+class ShardsTest(unittest.TestCase):
+    """Rounds and matchs of a database written before the tournament files are moved to them, ids kept"""
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.workdir.name) / "db.json"
+        write_single_file(self.path)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def split(self):
+        with DBAdapter(self.path):
+            pass
+
+    def files(self):
+        with DBAdapter(self.path, read_only=True) as db:
+            return db.read_files()
+
+    def assertSplit(self):
+        main, shards = self.files()
+        self.assertNotIn("rounds", main)
+        self.assertNotIn("matchs", main)
+        self.assertEqual(main[SEQUENCES_TABLE], {"1": {"rounds": 5, "matchs": 7}})
+        self.assertEqual(sorted(shards), [1, 2])
+        self.assertEqual(sorted(shards[1]["rounds"]), ["1", "5"])
+        self.assertEqual(sorted(shards[1]["matchs"]), ["1", "7"])
+        self.assertEqual(sorted(shards[2]["rounds"]), ["2"])
+        self.assertEqual(sorted(shards[2]["matchs"]), ["2"])
+        self.assertEqual(shards[1]["matchs"]["7"]["round"], 5)
+
+    def test_split(self):
+        self.split()
+        self.assertSplit()
+
+    def test_split_interrupted(self):
+        original = self.path.read_bytes()
+        self.split()
+        # Shards written but the main file still holds the rounds and matchs
+        self.path.write_bytes(original)
+        self.split()
+        self.assertSplit()
+
+    def test_single_file_read_only(self):
+        with DBAdapter(self.path, read_only=True) as db:
+            _, _, rounds, _ = db.load()
+            self.assertEqual(sorted(x.model_id for x in rounds), [1, 2, 5])
+            self.assertEqual([x.model_id for x in db.search(Match, round=5)], [7])
+        self.assertFalse(DBAdapter(self.path).shards_path.exists())
+        self.assertIn("rounds", self.files()[0])
+
+    def test_split_read_only(self):
+        self.split()
+        with DBAdapter(self.path, read_only=True) as db:
+            _, tournaments, _, matchs = db.load()
+        self.assertEqual(sorted(x.model_id for x in matchs), [1, 2, 7])
+        first = next(x for x in tournaments if x.model_id == 1)
+        self.assertEqual(sorted(x.model_id for x in first.rounds), [1, 5])
+        self.assertEqual([x.model_id for x in first.rounds[1].matchs], [7])
+
+    def test_search(self):
+        self.split()
+        with DBAdapter(self.path, read_only=True) as db:
+            self.assertEqual(sorted(x.model_id for x in db.search(Round, tid=1)), [1, 5])
+            self.assertEqual([x.model_id for x in db.search(Round, number=1)], [1, 2])
+            self.assertEqual([x.model_id for x in db.search(Match, round=2)], [2])
+            self.assertEqual([x.model_id for x in db.search(Match, player1=2)], [7])
+            self.assertEqual(db.fromID(Match, 7).round.tournament.model_id, 1)
+
+    def test_save_new_documents(self):
+        self.split()
+        db = DBAdapter(self.path)
+        with db:
+            tournament = db.fromID(Tournament, 2)
+            round_ = Round(name="Round 2", number=2, tournament=tournament, start_time=datetime(2020, 1, 2))
+            db.save(round_)
+            match = Match(mapped_round=round_, player1=tournament.seeds[0], player2=tournament.seeds[1], result=Result.DRAW)
+            db.save(match)
+            self.assertEqual((round_.model_id, match.model_id), (6, 8))
+            routes = db._DBAdapter__routes
+            self.assertEqual((routes[("rounds", 6)], routes[("matchs", 8)]), (2, 2))
+            self.assertEqual([x.model_id for x in db.search(Match, round=6)], [8])
+        main, shards = self.files()
+        self.assertEqual(main[SEQUENCES_TABLE]["1"], {"rounds": 6, "matchs": 8})
+        self.assertEqual(sorted(shards[2]["rounds"]), ["2", "6"])
+        self.assertEqual(shards[2]["matchs"]["8"]["round"], 6)
+        ids = [y for x in shards.values() for y in x["matchs"]]
+        self.assertEqual(len(ids), len(set(ids)))
+
+
+if __name__ == "__main__":
+    unittest.main()
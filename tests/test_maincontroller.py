@@ -0,0 +1,163 @@
+import copy
+import tempfile
+import unittest
+
+from chess.algorithm import RoundRobinSystem
+from chess.controllers.maincontroller import MainController, mc, mec
+from chess.controllers.mainstate import MainViewState
+from chess.database.dbadapter import DBAdapter
+from chess.models.match import Match, Result
+from chess.models.player import Player
+from chess.models.round import Round
+from chess.models.tournament import PairingSystem, Tournament
+
+
+def scripted(controller, state, selected_index=-1):
+    """Sub controller answering `state` without rendering its view"""
+    controller.selected_index = selected_index
+    controller.run = lambda: (state, [])
+    return controller
+
+
+class TournamentTestCase(unittest.TestCase):
+    """Controller holding a tournament of two players, whose single round has a match won by the first player"""
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.ctrl = MainController(DBAdapter(self.workdir.name + "/db.json"))
+        self.players = [Player(model_id=x + 1, first_name=f"P{x}", rank=x + 1) for x in range(2)]
+        self.tournament = Tournament(model_id=1, seeds=self.players)
+        round_ = Round(model_id=1, number=1, tournament=self.tournament)
+        self.tournament.rounds.append(round_)
+        self.match = Match(match_id=1, mapped_round=round_, player1=self.players[0], player2=self.players[1],
+                           result=Result.WHITE_WIN)
+        round_.matchs.append(self.match)
+        self.ctrl.players = list(self.players)
+        self.ctrl.tournaments = [self.tournament]
+        self.ctrl.rounds = [round_]
+        self.ctrl.matchs = [self.match]
+        self.ctrl.current_tournament = self.tournament
+        self.ctrl.current_round = round_
+        self.standings = self.ctrl.tournament_standings(self.tournament)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+
+class EditMatchTest(TournamentTestCase):
+    """Editing the result of a finished match applies the score change to the standings once, on save"""
+
+    def scores(self):
+        return [self.standings.scores[x] for x in self.players]
+
+    def choose_black_winner(self):
+        """EDIT_MATCH_MENU -> EDIT_MATCH -> CHOOSE_MATCH_WINNER, the second player wins"""
+        ctrl = self.ctrl
+        ctrl.states = [MainViewState.MAIN_MENU, MainViewState.EDIT_MATCH_MENU, MainViewState.EDIT_MATCH]
+        ctrl.current_match = self.match
+        ctrl.edited_data = copy.copy(self.match)
+        ctrl.previous_controllers.append(scripted(mec.EditMatchController(), MainViewState.CHOOSE_MATCH_WINNER))
+        ctrl.states.append(ctrl._edit_match())
+        ctrl.previous_controllers.append(
+            scripted(mc.WinnerChooserController(*self.players), MainViewState.CONTINUE_END_ROUND, 1))
+        ctrl.states.append(ctrl._choose_winner())
+        ctrl._back()
+
+    def test_edit_choose_save(self):
+        self.assertEqual(self.scores(), [1.0, 0.0])
+        self.choose_black_winner()
+        self.assertEqual(self.scores(), [1.0, 0.0])
+        self.ctrl.states.append(MainViewState.SAVE_ITEM)
+        self.ctrl._save_item()
+        self.assertEqual(self.match.result, Result.BLACK_WIN)
+        self.assertEqual(self.scores(), [0.0, 1.0])
+
+    def test_edit_choose_cancel(self):
+        self.choose_black_winner()
+        self.ctrl._back()
+        self.assertEqual(self.match.result, Result.WHITE_WIN)
+        self.assertEqual(self.scores(), [1.0, 0.0])
+
+
+class RevisionTest(TournamentTestCase):
+    """The live server responses are invalidated whenever the displayed data changes"""
+
+    def test_closing_round(self):
+        revision = self.ctrl.revision
+        self.ctrl.states = [MainViewState.MAIN_MENU, MainViewState.CONTINUE_END_ROUND]
+        self.ctrl._continue_end_round()
+        self.assertTrue(self.ctrl.rounds[0].finished)
+        self.assertEqual([x.rank for x in self.players], [1, 2])
+        self.assertGreater(self.ctrl.revision, revision)
+
+
+class RoundRobinStartTest(unittest.TestCase):
+    """A round-robin is not started without at least 2 players, and takes no late entry"""
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.ctrl = MainController(DBAdapter(self.workdir.name + "/db.json"))
+        self.tournament = Tournament(system=PairingSystem.ROUND_ROBIN)
+        self.ctrl.tournaments = [self.tournament]
+        self.ctrl.current_tournament = self.tournament
+        self.ctrl.current_system = RoundRobinSystem(self.tournament)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_start_without_players(self):
+        ctrl = self.ctrl
+        ctrl.states = [MainViewState.MAIN_MENU, MainViewState.CONTINUE_INIT_TOURNAMENT]
+        controller = scripted(mc.ContinueInitTournamentController(ctrl.current_system), MainViewState.CONTINUE_STARTED_ROUND)
+        ctrl.previous_controllers.append(controller)
+        self.assertIsNone(ctrl._continue_init_tournament())
+        self.assertEqual(ctrl.states, [MainViewState.MAIN_MENU, MainViewState.CONTINUE_INIT_TOURNAMENT])
+        self.assertEqual(ctrl.previous_controllers, [controller])
+        self.assertEqual(self.tournament.rounds, [])
+        self.assertIsNotNone(controller.err_str)
+
+    def test_no_late_entry(self):
+        for menu in (mc.ContinueStartedRoundController, mc.ContinueFinishedRoundController):
+            controller = menu(self.ctrl.current_system)
+            self.assertNotIn("Inscrire un joueur en retard", controller._items)
+            self.assertNotEqual(controller.handle_input(2)[0], MainViewState.LATE_ENTRY)
+
+
+class RejectedChangesTest(unittest.TestCase):
+    """A change rejected on save is shown and the models take the version saved by the other process"""
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        path = self.workdir.name + "/db.json"
+        with DBAdapter(path) as db:
+            db.save(Player(first_name="Jean", last_name="Martin", rank=1))
+        self.ctrl = MainController(DBAdapter(path))
+        self.other = MainController(DBAdapter(path))
+        self.ctrl.onLoadDatabase()
+        self.other.onLoadDatabase()
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_rejected_save(self):
+        self.other.players[0].first_name = "Paul"
+        self.assertEqual(self.other.onSaveDatabase(), [])
+        self.ctrl.players[0].first_name = "Pierre"
+        self.ctrl.states.append(MainViewState.SAVE_DATABASE)
+        self.assertEqual(self.ctrl._save_database(), MainViewState.REJECTED_CHANGES)
+        self.assertEqual(len(self.ctrl.rejected), 1)
+        self.assertEqual(self.ctrl.players[0].first_name, "Paul")
+        self.assertEqual(self.ctrl.onSaveDatabase(), [])
+
+        self.ctrl.states.append(MainViewState.REJECTED_CHANGES)
+        self.ctrl.previous_controllers.append(
+            scripted(mc.RejectedChangesController(self.ctrl.rejected), MainViewState.LOAD_DATABASE))
+        self.ctrl.states.append(self.ctrl._rejected_changes())
+        self.ctrl._load_database()
+        self.assertEqual(self.ctrl.states, [MainViewState.MAIN_MENU])
+        self.assertEqual(self.ctrl.previous_controllers, [])
+        self.assertEqual(self.ctrl.players[0].first_name, "Paul")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,332 @@
+import json
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from chess.database.dbadapter import SEQUENCES_TABLE, DBAdapter
+from chess.database.maintenance import CheckReport, check, compact
+from chess.models.match import Match
+from chess.models.round import Round
+from chess.models.tournament import Tournament
+
+
+def player(rank=1):
+    return {"first_name": f"P{rank}", "last_name": "", "birthdate": "", "gender": "", "rank": rank, "rating": 1500}
+
+
+def tournament(seeds, withdrawn=(), round_count=4):
+    return {"name": "T", "where": "", "when": "2020-01-01", "style": "", "round_count": round_count,
+            "seeds": list(seeds), "withdrawn": list(withdrawn)}
+
+
+def round_document(tid, number):
+    return {"name": f"Round {number}", "number": number, "tid": tid, "start_time": "2020-01-01T10:00:00",
+            "end_time": "2020-01-01T12:00:00"}
+
+
+def match(round_, player1, player2=-1, result=None, **fields):
+    if result is None:
+        result = 6 if player2 == -1 else 1
+    return dict({"round": round_, "player1": player1, "player2": player2, "result": result, "ratings": None}, **fields)
+
+
+def table(documents):
+    return {str(x): y for x, y in documents.items()}
+
+
+def write_database(path: pathlib.Path, main: dict, shards: dict):
+    """Main file and tournament files written as stored, tables by name then document id"""
+    path.write_text(json.dumps(main), encoding="utf-8")
+    if shards:
+        shards_path = DBAdapter(path).shards_path
+        shards_path.mkdir()
+        for tid, tables in shards.items():
+            (shards_path / f"{tid}.json").write_text(json.dumps(tables), encoding="utf-8")
+
+
+class DatabaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.workdir.name) / "db.json"
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def files(self):
+        with DBAdapter(self.path, read_only=True) as db:
+            return db.read_files()
+
+
+class CompactTest(DatabaseTestCase):
+    """Orphan rounds and matchs dropped, ids kept or renumbered with their references"""
+
+    def write_orphans(self):
+        write_database(self.path, {
+            "players": table({x: player(x) for x in (1, 2, 3)}),
+            "tournaments": table({1: tournament([1, 2]), 2: tournament([2, 3])}),
+            SEQUENCES_TABLE: {"1": {"rounds": 10, "matchs": 12}},
+        }, {
+            1: {"rounds": table({1: round_document(1, 1)}), "matchs": table({1: match(1, 1, 2), 3: match(8, 2, 1)})},
+            2: {"rounds": table({3: round_document(2, 1)}), "matchs": table({4: match(3, 2, 3)})},
+            9: {"rounds": table({10: round_document(9, 1)}), "matchs": table({12: match(10, 1, 3)})},
+        })
+
+    def test_orphans(self):
+        self.write_orphans()
+        report = compact(DBAdapter(self.path))
+        self.assertEqual(report.orphans, {"rounds": 1, "matchs": 2})
+        self.assertFalse(report.renumbered)
+        main, shards = self.files()
+        self.assertEqual(sorted(shards), [1, 2])
+        self.assertEqual(list(shards[1]["matchs"]), ["1"])
+        self.assertEqual(list(shards[2]["matchs"]), ["4"])
+        self.assertFalse((DBAdapter(self.path).shards_path / "9.json").exists())
+
+    def test_sequences_kept(self):
+        self.write_orphans()
+        compact(DBAdapter(self.path))
+        main, _ = self.files()
+        self.assertEqual(main[SEQUENCES_TABLE], {"1": {"rounds": 10, "matchs": 12}})
+        db = DBAdapter(self.path)
+        with db:
+            round_ = Round(number=2, tournament=db.fromID(Tournament, 1))
+            db.save(round_)
+        self.assertEqual(round_.model_id, 11)
+
+    def test_renumber(self):
+        write_database(self.path, {
+            "players": table({x: player(x) for x in (3, 7, 9)}),
+            "tournaments": table({4: tournament([7, 3, 9], withdrawn=[9])}),
+            SEQUENCES_TABLE: {"1": {"rounds": 8, "matchs": 10}},
+        }, {
+            4: {"rounds": table({5: round_document(4, 1), 8: round_document(4, 2)}),
+                "matchs": table({6: match(5, 7, 3), 10: match(8, 9)})},
+        })
+        report = compact(DBAdapter(self.path), renumber=True)
+        self.assertTrue(report.renumbered)
+        main, shards = self.files()
+        self.assertEqual(sorted(main["players"]), ["1", "2", "3"])
+        self.assertEqual(main["players"]["2"]["rank"], 7)
+        self.assertEqual(main["tournaments"]["1"]["seeds"], [2, 1, 3])
+        self.assertEqual(main["tournaments"]["1"]["withdrawn"], [3])
+        self.assertEqual(main[SEQUENCES_TABLE], {"1": {"rounds": 2, "matchs": 2}})
+        self.assertEqual(list(shards), [1])
+        self.assertEqual({x: y["tid"] for x, y in shards[1]["rounds"].items()}, {"1": 1, "2": 1})
+        matchs = shards[1]["matchs"]
+        self.assertEqual([matchs["1"][x] for x in ("round", "player1", "player2")], [1, 2, 1])
+        self.assertEqual([matchs["2"][x] for x in ("round", "player1", "player2")], [2, 3, -1])
+        with DBAdapter(self.path, read_only=True) as db:
+            loaded = db.fromID(Match, 1)
+            self.assertEqual((loaded.player1.rank, loaded.player2.rank, loaded.round.number), (7, 3, 1))
+
+    def test_renumber_dangling_player(self):
+        write_database(self.path, {
+            "players": table({1: player(1)}),
+            "tournaments": table({1: tournament([1, 5])}),
+        }, {})
+        before = self.path.read_bytes()
+        with self.assertRaises(ValueError):
+            compact(DBAdapter(self.path), renumber=True)
+        self.assertEqual(self.path.read_bytes(), before)
+        self.assertFalse(DBAdapter(self.path).shards_path.exists())
+
+
+class InterruptedRewriteTest(DatabaseTestCase):
+    """A rewrite interrupted once its manifest is written is completed by the next session"""
+
+    def setUp(self):
+        super().setUp()
+        write_database(self.path, {
+            "players": table({1: player(1), 2: player(2)}),
+            "tournaments": table({1: tournament([1, 2]), 2: tournament([1, 2])}),
+            SEQUENCES_TABLE: {"1": {"rounds": 2, "matchs": 1}},
+        }, {
+            1: {"rounds": table({1: round_document(1, 1)}), "matchs": table({1: match(1, 1, 2)})},
+            2: {"rounds": table({2: round_document(2, 1)}), "matchs": {}},
+        })
+        self.db = DBAdapter(self.path)
+        # Rewrite with the round of tournament 2 moved to the file of tournament 1 and the file 2 removed
+        with self.db:
+            main, shards = self.db.read_files()
+            shards[1]["rounds"]["2"] = dict(shards.pop(2)["rounds"]["2"], tid=1)
+            del main["tournaments"]["2"]
+            with mock.patch.object(DBAdapter, "_finish_rewrite", side_effect=OSError):
+                with self.assertRaises(OSError):
+                    self.db.rewrite_files(main, shards)
+        self.assertTrue(self.db._rewrite_manifest_path().exists())
+
+    def assertRewritten(self):
+        self.assertFalse(self.db._rewrite_manifest_path().exists())
+        self.assertFalse(self.db._rewrite_path().exists())
+        main, shards = self.files()
+        self.assertEqual(list(main["tournaments"]), ["1"])
+        self.assertEqual(list(shards), [1])
+        self.assertEqual(sorted(shards[1]["rounds"]), ["1", "2"])
+
+    def test_read_write(self):
+        with DBAdapter(self.path) as db:
+            self.assertEqual(len(list(db.all(Round))), 2)
+        self.assertRewritten()
+
+    def test_read_only(self):
+        with DBAdapter(self.path, read_only=True) as db:
+            self.assertEqual(len(list(db.all(Round))), 2)
+        self.assertRewritten()
+
+    def test_partly_moved(self):
+        (self.db._rewrite_path() / "1.json").replace(self.db.shards_path / "1.json")
+        with DBAdapter(self.path, read_only=True) as db:
+            self.assertEqual(len(list(db.all(Tournament))), 1)
+        self.assertRewritten()
+
+
+class CheckTest(DatabaseTestCase):
+    """Each class of problem is reported, then fixed in the files when repairable"""
+
+    players = table({x: player(x) for x in range(1, 16)})
+
+    def check(self, main: dict, shards: dict):
+        """Report of the check alone, the files left untouched, then report of the repair"""
+        write_database(self.path, dict({"players": self.players}, **main), shards)
+        before = self.files()
+        report = check(DBAdapter(self.path))
+        self.assertFalse(report.repaired)
+        self.assertEqual(self.files(), before)
+        repaired = check(DBAdapter(self.path), repair=True)
+        self.assertEqual(repaired.problems, report.problems)
+        self.assertEqual(check(DBAdapter(self.path)).problems, repaired.remaining)
+        return repaired
+
+    def found(self, report: CheckReport):
+        return sorted((x.table, x.doc_id, x.repairable) for x in report.problems)
+
+    def test_dangling_references(self):
+        report = self.check({
+            "tournaments": table({1: tournament([1, 99, 2, 1], withdrawn=[98])}),
+            SEQUENCES_TABLE: {"1": {"rounds": 2, "matchs": 5}},
+        }, {
+            1: {"rounds": table({1: round_document(1, 1)}),
+                "matchs": table({1: match(1, 1, 2), 3: match(7, 1, 2), 4: match(1, 3, 99), 5: match(1, 4, 4)})},
+            9: {"rounds": table({2: round_document(9, 1)}), "matchs": table({2: match(2, 3, 4)})},
+        })
+        self.assertEqual(self.found(report), [
+            ("matchs", 2, True), ("matchs", 3, True), ("matchs", 4, True), ("matchs", 5, True),
+            ("rounds", 2, True), ("tournaments", 1, True), ("tournaments", 1, True),
+        ])
+        self.assertTrue(report.repaired)
+        main, shards = self.files()
+        self.assertEqual(main["tournaments"]["1"]["seeds"], [1, 2])
+        self.assertEqual(main["tournaments"]["1"]["withdrawn"], [])
+        self.assertEqual(list(shards), [1])
+        self.assertEqual(list(shards[1]["rounds"]), ["1"])
+        self.assertEqual(list(shards[1]["matchs"]), ["1"])
+        self.assertEqual(main[SEQUENCES_TABLE], {"1": {"rounds": 2, "matchs": 5}})
+
+    def test_duplicate_ids(self):
+        report = self.check({
+            "tournaments": table({1: tournament([1, 2]), 2: tournament([3, 4])}),
+            SEQUENCES_TABLE: {"1": {"rounds": 1, "matchs": 1}},
+        }, {
+            1: {"rounds": table({1: round_document(1, 1)}), "matchs": table({1: match(1, 1, 2)})},
+            2: {"rounds": table({1: round_document(2, 1)}), "matchs": table({1: match(1, 3, 4)})},
+        })
+        self.assertEqual(self.found(report), [("matchs", 1, True), ("rounds", 1, True)])
+        main, shards = self.files()
+        self.assertEqual(list(shards), [1])
+        self.assertEqual(shards[1]["matchs"]["1"]["player1"], 1)
+
+    def test_sequences_behind(self):
+        report = self.check({
+            "tournaments": table({1: tournament([1, 2])}),
+            SEQUENCES_TABLE: {"1": {"rounds": 1, "matchs": 1}},
+        }, {
+            1: {"rounds": table({3: round_document(1, 1)}), "matchs": table({4: match(3, 1, 2)})},
+        })
+        self.assertEqual(self.found(report), [(SEQUENCES_TABLE, 1, True), (SEQUENCES_TABLE, 1, True)])
+        main, _ = self.files()
+        self.assertEqual(main[SEQUENCES_TABLE], {"1": {"rounds": 3, "matchs": 4}})
+
+    def test_misplaced_shard(self):
+        report = self.check({
+            "tournaments": table({1: tournament([1, 2]), 2: tournament([3, 4])}),
+            SEQUENCES_TABLE: {"1": {"rounds": 2, "matchs": 2}},
+        }, {
+            1: {"rounds": table({1: round_document(1, 1), 2: round_document(2, 1)}),
+                "matchs": table({1: match(1, 1, 2), 2: match(2, 3, 4)})},
+        })
+        self.assertEqual(self.found(report), [("matchs", 2, True), ("rounds", 2, True)])
+        _, shards = self.files()
+        self.assertEqual(sorted(shards), [1, 2])
+        self.assertEqual((list(shards[1]["rounds"]), list(shards[1]["matchs"])), (["1"], ["1"]))
+        self.assertEqual((list(shards[2]["rounds"]), list(shards[2]["matchs"])), (["2"], ["2"]))
+        with DBAdapter(self.path, read_only=True) as db:
+            self.assertEqual([x.model_id for x in db.search(Round, tid=2)], [2])
+
+    def test_results(self):
+        legacy = match(1, 1, 2, scores="0.5/0.5", forfeit=False)
+        del legacy["result"]
+        invalid_legacy = match(1, 3, 4, scores="gagné", forfeit=False)
+        del invalid_legacy["result"]
+        report = self.check({
+            "tournaments": table({1: tournament(range(1, 16))}),
+            SEQUENCES_TABLE: {"1": {"rounds": 1, "matchs": 8}},
+        }, {
+            1: {"rounds": table({1: round_document(1, 1)}),
+                "matchs": table({1: legacy, 2: invalid_legacy, 3: match(1, 5, 6, result=9), 4: match(1, 7, 8, result="1"),
+                                 5: match(1, 9, 10, result=True), 6: match(1, 11, 12, ratings=[1500]),
+                                 7: match(1, 13, result=1), 8: match(1, 14, 15, result=6)})},
+        })
+        self.assertEqual(self.found(report), [("matchs", x, True) for x in range(2, 9)])
+        matchs = self.files()[1][1]["matchs"]
+        self.assertEqual(matchs["1"], legacy)
+        self.assertEqual((matchs["2"]["result"], "scores" in matchs["2"]), (0, False))
+        self.assertEqual([matchs[str(x)]["result"] for x in range(3, 9)], [0, 0, 0, 1, 6, 0])
+        self.assertIsNone(matchs["6"]["ratings"])
+        with DBAdapter(self.path, read_only=True) as db:
+            self.assertEqual(db.fromID(Match, 1).scores, (0.5, 0.5))
+
+    def test_round_numbers(self):
+        report = self.check({
+            "tournaments": table({1: tournament([1, 2], round_count=2)}),
+            SEQUENCES_TABLE: {"1": {"rounds": 3, "matchs": 0}},
+        }, {
+            1: {"rounds": table({1: round_document(1, 3), 2: round_document(1, 1), 3: round_document(1, 3)}), "matchs": {}},
+        })
+        self.assertEqual(self.found(report), [("rounds", 1, True), ("tournaments", 1, False)])
+        self.assertEqual([(x.table, x.doc_id) for x in report.remaining], [("tournaments", 1)])
+        rounds = self.files()[1][1]["rounds"]
+        self.assertEqual({x: y["number"] for x, y in rounds.items()}, {"1": 2, "2": 1, "3": 3})
+
+    def test_repeated_pairs(self):
+        report = self.check({
+            "tournaments": table({1: tournament([1, 2, 3, 4])}),
+            SEQUENCES_TABLE: {"1": {"rounds": 2, "matchs": 5}},
+        }, {
+            1: {"rounds": table({1: round_document(1, 1), 2: round_document(1, 2)}),
+                "matchs": table({1: match(1, 1, 2), 2: match(1, 2, 1), 3: match(2, 2, 1), 4: match(2, 3, 4),
+                                 5: match(2, 4)})},
+        })
+        self.assertEqual(self.found(report), [("matchs", 2, True), ("matchs", 3, False), ("matchs", 5, False)])
+        self.assertEqual(sorted(self.files()[1][1]["matchs"]), ["1", "3", "4", "5"])
+
+
+class CheckReportTest(unittest.TestCase):
+    """A repair leaves the non repairable problems in the database"""
+
+    def setUp(self):
+        self.report = CheckReport()
+        self.report.add("matchs", 1, "ronde 9 absente")
+        self.report.add("matchs", 2, "joueur apparié deux fois", repairable=False)
+
+    def test_not_repaired(self):
+        self.assertEqual(len(self.report.remaining), 2)
+
+    def test_repaired(self):
+        self.report.repaired = True
+        self.assertEqual([x.doc_id for x in self.report.remaining], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from chess.models.match import Match, Result
+from chess.models.player import DEFAULT_RATING, Player
+from chess.models.round import Round
+from chess.models.tournament import Tournament
+from chess.rating import EloRating
+
+
+def finished_round(tournament: Tournament, number: int, *pairs: tuple[Player, Player, Result]):
+    start = datetime(2023, 1, 1, 9) + timedelta(days=number - 1)
+    round_ = Round(number=number, tournament=tournament, start_time=start, end_time=start + timedelta(hours=2))
+    for player1, player2, result in pairs:
+        round_.matchs.append(Match(mapped_round=round_, player1=player1, player2=player2, result=result))
+    tournament.rounds.append(round_)
+    return round_
+
+
+class CorrectMatchTest(unittest.TestCase):
+    """Correcting a match without rating snapshot only replays its tournament"""
+
+    def setUp(self):
+        self.rating = EloRating()
+        self.players = [Player(model_id=x + 1, rank=x + 1, rating=1800.0 - 100 * x) for x in range(4)]
+        self.bystander = Player(model_id=5, rank=5, rating=2222.0)
+
+    def test_unrated_tournament_left_alone(self):
+        a, b, c, d = self.players
+        round_ = finished_round(Tournament(), 1, (a, b, Result.WHITE_WIN), (c, d, Result.DRAW))
+        match = round_.matchs[0]
+        match.result = Result.BLACK_WIN
+        self.assertEqual(self.rating.correct_match(match, Result.WHITE_WIN, [round_]), set())
+        self.assertEqual([x.rating for x in self.players], [1800.0, 1700.0, 1600.0, 1500.0])
+
+    def test_result_entered_later_replays_the_tournament(self):
+        a, b, c, d = self.players
+        tournament = Tournament()
+        round_ = finished_round(tournament, 1, (a, b, Result.NOT_PLAYED), (c, d, Result.DRAW))
+        self.rating.rate_round(round_)
+        before = [x.rating for x in self.players]
+        match = round_.matchs[0]
+        match.result = Result.WHITE_WIN
+        changed = self.rating.correct_match(match, Result.NOT_PLAYED, [round_])
+        self.assertEqual(changed, {a, b})
+        self.assertGreater(a.rating, before[0])
+        self.assertLess(b.rating, before[1])
+        self.assertEqual([c.rating, d.rating], before[2:])
+        self.assertEqual(self.bystander.rating, 2222.0)
+        self.assertIsNotNone(match.rating_snapshot)
+
+    def test_recompute_keeps_players_without_rated_games(self):
+        a, b, _, _ = self.players
+        round_ = finished_round(Tournament(), 1, (a, b, Result.WHITE_WIN))
+        self.rating.recompute(self.players + [self.bystander], [round_])
+        self.assertEqual(self.bystander.rating, 2222.0)
+        self.assertEqual(self.players[2].rating, 1600.0)
+        self.assertGreater(a.rating, self.rating.default_rating)
+
+
+class CorrectionMatchesRecomputeTest(unittest.TestCase):
+    """A corrected result gives the ratings a full recompute gives, in every later tournament"""
+
+    def setUp(self):
+        self.players = [Player(model_id=x + 1, rank=x + 1) for x in range(6)]
+        self.rounds: list[Round] = []
+
+    def rate(self, default_rating=DEFAULT_RATING):
+        EloRating(default_rating).recompute(self.players, self.rounds)
+
+    def correct(self, match: Match, result: Result, default_rating=DEFAULT_RATING):
+        rating = EloRating(default_rating)
+        rating.count_games(self.rounds)
+        old_result = match.result
+        match.result = result
+        rating.correct_match(match, old_result, self.rounds)
+        corrected = [x.rating for x in self.players]
+        self.rate(default_rating)
+        for player, value in zip(self.players, corrected):
+            self.assertAlmostEqual(value, player.rating, delta=0.05)
+
+    def test_forfeit_reaches_later_tournaments(self):
+        a, b, c, _, _, _ = self.players
+        self.rounds.append(finished_round(Tournament(), 1, (a, b, Result.WHITE_WIN)))
+        self.rounds.append(finished_round(Tournament(), 2, (c, a, Result.DRAW)))
+        self.rate()
+        snapshot = self.rounds[1].matchs[0].rating_snapshot
+        self.correct(self.rounds[0].matchs[0], Result.WHITE_WIN_FORFEIT)
+        self.assertIsNone(self.rounds[0].matchs[0].rating_snapshot)
+        self.assertNotEqual(self.rounds[1].matchs[0].rating_snapshot, snapshot)
+        self.correct(self.rounds[0].matchs[0], Result.BLACK_WIN)
+        self.assertIsNotNone(self.rounds[0].matchs[0].rating_snapshot)
+
+    def test_random_corrections(self):
+        # Past 30 games around 2400, corrections move players across both K-factor thresholds
+        rng = random.Random(4)
+        outcomes = (Result.WHITE_WIN, Result.DRAW, Result.BLACK_WIN)
+        tournaments = [Tournament() for _ in range(3)]
+        for number in range(1, 37):
+            tournament = tournaments[(number - 1) // 12]
+            players = rng.sample(self.players, len(self.players))
+            pairs = [(x, y, rng.choice(outcomes)) for x, y in zip(players[::2], players[1::2])]
+            self.rounds.append(finished_round(tournament, number, *pairs))
+        self.rate(2395.0)
+        results = outcomes + (Result.WHITE_WIN_FORFEIT, Result.BLACK_WIN_FORFEIT, Result.NOT_PLAYED)
+        for _ in range(40):
+            match = rng.choice(rng.choice(self.rounds).matchs)
+            self.correct(match, rng.choice([x for x in results if x != match.result]), 2395.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
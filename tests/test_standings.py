@@ -0,0 +1,120 @@
+import unittest
+
+from chess.models.match import Match, Result
+from chess.models.player import Player
+from chess.models.round import Round
+from chess.models.standings import PlayerIndex, SortedIndex, Standings
+from chess.models.tournament import Tournament
+
+
+class SortedIndexTest(unittest.TestCase):
+    """Items stay sorted through incremental additions, removals and key changes"""
+
+    def setUp(self):
+        self.keys = {"a": 3, "b": 1, "c": 2}
+        self.index = SortedIndex(self.keys.__getitem__, "abc")
+
+    def test_add(self):
+        self.assertEqual(list(self.index), ["b", "c", "a"])
+        self.keys["d"] = 0
+        self.index.add("d")
+        self.assertEqual(list(self.index), ["d", "b", "c", "a"])
+        self.assertIn("d", self.index)
+
+    def test_add_twice(self):
+        self.index.add("a")
+        self.assertEqual(list(self.index), ["b", "c", "a"])
+
+    def test_equal_keys_keep_insertion_order(self):
+        self.keys.update(d=2, e=2)
+        self.index.add("e")
+        self.index.add("d")
+        self.assertEqual(list(self.index), ["b", "c", "e", "d", "a"])
+
+    def test_remove(self):
+        self.index.remove("c")
+        self.index.remove("z")
+        self.assertEqual(list(self.index), ["b", "a"])
+        self.assertNotIn("c", self.index)
+        self.assertEqual(len(self.index), 2)
+
+    def test_update(self):
+        self.keys["a"] = 0
+        self.index.update("a")
+        self.assertEqual(list(self.index), ["a", "b", "c"])
+        self.keys["b"] = 5
+        self.index.update("b")
+        self.assertEqual(list(self.index), ["a", "c", "b"])
+        self.assertEqual(self.index.page(1, 2), ["c"])
+
+    def test_update_unknown_adds(self):
+        self.keys["d"] = 2
+        self.index.update("d")
+        self.assertEqual(list(self.index), ["b", "c", "d", "a"])
+
+
+class PlayerIndexTest(unittest.TestCase):
+    """A player edit moves the player in the name and the rank orders"""
+
+    def setUp(self):
+        self.players = [Player(first_name=x, last_name="Martin", rank=y) for x, y in (("Alice", 2), ("Bruno", 1), ("Chloe", 3))]
+        self.index = PlayerIndex(self.players)
+
+    def names(self, index: SortedIndex[Player]):
+        return [x.first_name for x in index]
+
+    def test_orders(self):
+        self.assertEqual(self.names(self.index.by_name), ["Alice", "Bruno", "Chloe"])
+        self.assertEqual(self.names(self.index.by_rank), ["Bruno", "Alice", "Chloe"])
+
+    def test_rename(self):
+        self.players[0].first_name = "Zoe"
+        self.index.update(self.players[0])
+        self.assertEqual(self.names(self.index.by_name), ["Bruno", "Chloe", "Zoe"])
+        self.assertEqual(self.names(self.index.by_rank), ["Bruno", "Zoe", "Chloe"])
+
+    def test_rerank(self):
+        self.players[2].rank = 0
+        self.index.update(self.players[2])
+        self.assertEqual(self.names(self.index.by_rank), ["Chloe", "Bruno", "Alice"])
+
+    def test_remove(self):
+        self.index.remove(self.players[1])
+        self.assertNotIn(self.players[1], self.index)
+        self.assertEqual(self.names(self.index.by_rank), ["Alice", "Chloe"])
+
+    def test_update_unknown_ignored(self):
+        self.index.update(Player(first_name="Denis"))
+        self.assertEqual(len(self.index), 3)
+
+
+class StandingsTest(unittest.TestCase):
+    """Scores follow the results recorded, the score order follows them"""
+
+    def setUp(self):
+        self.players = [Player(model_id=x + 1, first_name=f"P{x}", rank=x + 1) for x in range(3)]
+        self.tournament = Tournament(seeds=self.players)
+        round_ = Round(number=1, tournament=self.tournament)
+        self.match = Match(mapped_round=round_, player1=self.players[0], player2=self.players[1], result=Result.BLACK_WIN)
+        round_.matchs += [self.match, Match(mapped_round=round_, player1=self.players[2], result=Result.BYE)]
+        self.tournament.rounds.append(round_)
+        self.standings = Standings(self.tournament)
+
+    def test_round(self):
+        self.assertEqual([self.standings.scores[x] for x in self.players], [0.0, 1.0, 1.0])
+        self.assertEqual(list(self.standings.by_score), [self.players[0], self.players[1], self.players[2]])
+
+    def test_corrected_result(self):
+        self.match.result = Result.DRAW
+        self.standings.record_result(self.match, Result.BLACK_WIN)
+        self.assertEqual([self.standings.scores[x] for x in self.players], [0.5, 0.5, 1.0])
+
+    def test_rerank_keeps_scores(self):
+        self.players[2].rank = 0
+        self.standings.update(self.players[2])
+        self.assertEqual(list(self.standings.by_score), [self.players[0], self.players[2], self.players[1]])
+        self.assertEqual(self.standings.scores[self.players[2]], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()